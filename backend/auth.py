@@ -77,3 +77,12 @@ def get_decoded_token(token: str = Depends(oauth2_scheme)):
         return decoded_token
     except Exception:
         raise credentials_exception
+
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="users/login", auto_error=False)
+
+def get_current_user_for_stream(token: Optional[str] = Depends(oauth2_scheme_optional), access_token: Optional[str] = None):
+    """
+    Same as get_current_user, but also accepts ?access_token= because the browser
+    EventSource API can't send an Authorization header.
+    """
+    return get_current_user(token or access_token or "")
@@ -0,0 +1,50 @@
+import random
+from typing import Dict, List
+
+# (base title, variant slot values) - variants are exactly what the guardrails must separate
+PRODUCTS = [
+    ("Sony WH-1000{v} Wireless Noise Cancelling Headphones", ["XM3", "XM4", "XM5"]),
+    ("Apple iPhone {v} (128GB) - Midnight", ["13", "14", "15", "15 Pro"]),
+    ("Samsung Galaxy S23 5G {v} Storage", ["128GB", "256GB", "512GB"]),
+    ("Fortune Sunflower Refined Oil {v} Pouch", ["1kg", "2kg", "5 L"]),
+    ("Tata Salt Vacuum Evaporated Iodised {v}", ["1kg", "1kg Pack of 2", "1kg Pack of 4"]),
+    ("Philips Air Fryer HD9200 {v} Capacity", ["4.1L", "6.2L"]),
+    ("boAt Airdopes {v} TWS Earbuds", ["141", "161", "311 Pro"]),
+    ("OnePlus Nord CE {v} Lite 5G (8GB RAM)", ["2", "3", "4"]),
+    ("Amul Pure Ghee {v} Tin", ["500ml", "1L", "5L"]),
+    ("Logitech MX Master {v} Wireless Mouse", ["2S", "3", "3S"]),
+]
+COLOURS = ["Black", "Blue", "Silver", "White", "Graphite"]
+NOISE = ["", " | Best Price", " with Bank Offer", " (Renewed)", " - Limited Deal", " Combo"]
+
+
+def synthetic_catalog(n: int, seed: int = 1) -> List[Dict]:
+    """
+    Offer dicts shaped like Firestore offer documents, with titles drawn from
+    product families and their variants (XM4/XM5, 1kg/2kg, ...).
+    """
+    rng = random.Random(seed)
+    offers = []
+    for i in range(n):
+        template, variants = rng.choice(PRODUCTS)
+        title = template.format(v=rng.choice(variants))
+        title = f"{title} {rng.choice(COLOURS)}{rng.choice(NOISE)}"
+        if rng.random() < 0.5:
+            title = f"{title} #{rng.randint(1, n)}"
+        offers.append({
+            "id": f"offer-{i}",
+            "title": title,
+            "price": float(rng.randint(99, 99999)),
+            "product_url": f"https://www.amazon.in/dp/B0{i:08d}",
+            "status": "APPROVED",
+        })
+    return offers
+
+
+def query_titles(count: int, seed: int = 2) -> List[str]:
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        template, variants = rng.choice(PRODUCTS)
+        titles.append(f"{template.format(v=rng.choice(variants))} {rng.choice(COLOURS)}")
+    return titles
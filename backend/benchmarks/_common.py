@@ -0,0 +1,67 @@
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+from typing import Callable, Dict, List
+
+
+def measure(fn: Callable, repeat: int = 20, warmup: int = 2) -> Dict[str, float]:
+    """
+    Runs `fn` repeatedly and returns latency stats in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max_ms": samples[-1],
+    }
+
+
+def allocations(fn: Callable, repeat: int = 5) -> Dict[str, float]:
+    """
+    Peak traced allocation of a single call, and what it leaves behind, in KB.
+    Kept separate from measure() because tracing slows every allocation down.
+    """
+    fn()
+    tracemalloc.start()
+    peaks: List[int] = []
+    retained: List[int] = []
+    for _ in range(repeat):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(after - before)
+    tracemalloc.stop()
+    return {
+        "peak_alloc_kb": max(peaks) / 1024,
+        "retained_kb": statistics.fmean(retained) / 1024,
+    }
+
+
+def print_row(name: str, stats: Dict[str, float]):
+    print(f"{name:<32} mean={stats['mean_ms']:9.2f}ms  p50={stats['p50_ms']:9.2f}ms  p95={stats['p95_ms']:9.2f}ms")
+
+
+def offline_firestore(db=None):
+    """
+    Registers a stand-in backend.firebase_setup so service modules import without
+    credentials or network. Call before importing anything from backend.services.
+    """
+    module = types.ModuleType("backend.firebase_setup")
+    module.db = db
+    module.auth = None
+    sys.modules["backend.firebase_setup"] = module
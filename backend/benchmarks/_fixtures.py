@@ -0,0 +1,29 @@
+import os
+from typing import Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+HEAD_FILLER = '<script type="text/javascript">P.when("A","ready").execute(function(A){var a=A.$("#nav");a.data("state",{"k":[1,2,3,4,5,6,7,8]});});</script>\n'
+BODY_FILLER = ('<div class="a-section review aok-relative"><div class="a-row"><span class="a-profile-name">Customer</span>'
+               '<i class="a-icon a-icon-star a-star-4"><span class="a-icon-alt">4.0 out of 5 stars</span></i></div>'
+               '<span class="a-size-base review-text"><span>Great sound, comfortable for long flights. Price drop to Rs. 24,990 in the sale was worth it.</span></span></div>\n')
+
+
+def load_fixture(name: str, head_kb: int = 300, body_kb: int = 2000) -> bytes:
+    """
+    Loads a recorded product page and pads it to a realistic size: real pages carry
+    hundreds of KB of inline script before the product block and MBs of reviews,
+    widgets and JSON after it.
+    """
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        html = f.read()
+    html = html.replace("<!-- filler:head -->", HEAD_FILLER * (head_kb * 1024 // len(HEAD_FILLER)))
+    html = html.replace("<!-- filler:body -->", BODY_FILLER * (body_kb * 1024 // len(BODY_FILLER)))
+    return html.encode("utf-8")
+
+
+def all_fixtures(**kwargs) -> Dict[str, bytes]:
+    return {
+        name: load_fixture(name, **kwargs)
+        for name in sorted(os.listdir(FIXTURES_DIR)) if name.endswith(".html")
+    }
@@ -0,0 +1,56 @@
+"""
+Recall@k and query latency of the IVF offer index vs exact brute force.
+
+    python -m backend.benchmarks.bench_ann --sizes 10000 100000 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backend.benchmarks._common import measure, print_row
+from backend.services.ann_index import IVFIndex
+
+
+def synthetic_offers(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    # Clustered like real titles: many near-variants around a smaller set of products
+    products = rng.standard_normal((max(1, n // 20), dim)).astype(np.float32)
+    vectors = products[rng.integers(0, len(products), n)] + 0.2 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    for n in args.sizes:
+        data = synthetic_offers(n, args.dim, rng)
+        queries = data[rng.integers(0, n, args.queries)] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        index = IVFIndex(dim=args.dim, nprobe=args.nprobe)
+        start = time.perf_counter()
+        for i, vector in enumerate(data):
+            index.add(str(i), vector)
+        build_s = time.perf_counter() - start
+
+        hits = 0
+        for q in queries:
+            exact = set(np.argpartition(-(data @ q), args.k)[:args.k].tolist())
+            found = {int(key) for key, _ in index.search(q, args.k)}
+            hits += len(exact & found)
+
+        print(f"\n{n} offers (build {build_s:.1f}s), recall@{args.k} = {hits / (args.k * args.queries):.3f}")
+        it = iter(range(10 ** 9))
+        print_row("ivf search", measure(lambda: index.search(queries[next(it) % args.queries], args.k), repeat=args.queries))
+        print_row("exact search", measure(lambda: np.argpartition(-(data @ queries[next(it) % args.queries]), args.k)[:args.k], repeat=args.queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Throughput of concurrent single-title encodes: each thread calling the model
+directly vs all threads going through the micro-batching dispatcher.
+
+    python -m backend.benchmarks.bench_batcher --threads 32 --requests 20
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.ai_core import models, embedding_batcher, _encode_batch
+
+
+def run(encode, threads: int, requests: int) -> float:
+    def worker(tid: int):
+        for i in range(requests):
+            encode([f"Product title {tid}-{i} with 8GB RAM 128GB storage"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return threads * requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    models.load()
+    print(f"{args.threads} threads x {args.requests} encodes")
+    print(f"direct   : {run(_encode_batch, args.threads, args.requests):8.1f} encodes/s")
+    print(f"batched  : {run(embedding_batcher.encode, args.threads, args.requests):8.1f} encodes/s")
+    print(f"batcher  : {embedding_batcher.stats()}")
+
+
+if __name__ == "__main__":
+    main()
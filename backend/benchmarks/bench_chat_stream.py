@@ -0,0 +1,196 @@
+"""
+Load test for the group chat SSE stream: opens thousands of idle connections
+against one worker, reports server memory per connection, then posts messages
+and measures fan-out latency to every connection.
+
+    python -m backend.benchmarks.bench_chat_stream --connections 2000 --messages 20
+
+The server runs in a subprocess (real uvicorn + the groups router) with an
+in-memory stand-in for Firestore, so the memory figures are the server's alone.
+Raise the open-files limit (ulimit -n) above the connection count first.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+from backend.benchmarks._common import offline_firestore
+
+GROUP_ID = "bench-group"
+USER_ID = "bench-user"
+
+
+class _Snap:
+    def __init__(self, data):
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _MessageRef:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+
+
+class _Collection:
+    def __init__(self, name):
+        self.name = name
+
+    def document(self, doc_id=None):
+        return _Document(doc_id)
+
+    def add(self, data):
+        return None, _MessageRef()
+
+
+class _Document:
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+    def get(self, field_paths=None):
+        return _Snap({"members": [{"user_id": USER_ID, "full_name": "Bench"}]} if self.id == GROUP_ID else None)
+
+    def collection(self, name):
+        return _Collection(name)
+
+    def update(self, data):
+        pass
+
+
+class FakeDB:
+    """Just enough of the Firestore client for the chat send and stream endpoints."""
+
+    def collection(self, name):
+        return _Collection(name)
+
+
+def rss_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def serve(port: int):
+    offline_firestore(FakeDB())
+    import uvicorn
+    from fastapi import FastAPI
+    from backend.auth import UserInDB, get_current_user, get_current_user_for_stream
+    from backend.routers import groups
+    from backend.services.chat_hub import chat_hub
+
+    chat_hub.shared_listener = False # No Firestore here; posts are published in-process
+    app = FastAPI()
+    app.include_router(groups.router, prefix="/groups")
+    user = UserInDB(id=USER_ID, full_name="Bench")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_for_stream] = lambda: user
+
+    @app.get("/_stats")
+    def stats():
+        return chat_hub.stats()
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+
+
+async def _request(port: int, method: str, path: str, body: bytes = b"") -> bytes:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return data
+
+
+async def _open_stream(port: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /groups/{GROUP_ID}/chat/stream HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readuntil(b"\r\n\r\n") # response headers
+    await reader.readuntil(b"\n\n") # retry: frame
+    return reader, writer
+
+
+async def _next_message(reader) -> dict:
+    while True:
+        frame = await reader.readuntil(b"\n\n")
+        for line in frame.decode().splitlines():
+            # Chunked transfer encoding interleaves size lines; only data lines matter
+            if line.startswith("data: "):
+                return json.loads(line[6:])
+
+
+async def run(args, port: int, pid: int):
+    baseline = rss_kb(pid)
+    streams = []
+    for start in range(0, args.connections, 200):
+        batch = range(start, min(start + 200, args.connections))
+        streams += await asyncio.gather(*(_open_stream(port) for _ in batch))
+    await asyncio.sleep(1)
+    loaded = rss_kb(pid)
+    stats = json.loads((await _request(port, "GET", "/_stats")).split(b"\r\n\r\n", 1)[1])
+    per_conn = (loaded - baseline) / max(args.connections, 1)
+    print(f"{args.connections} idle connections: server RSS {baseline / 1024:.1f} MB -> {loaded / 1024:.1f} MB"
+          f"  ({per_conn:.1f} KB/connection)  hub={stats}")
+
+    latencies = []
+    for i in range(args.messages):
+        waiters = [asyncio.create_task(_next_message(reader)) for reader, _ in streams]
+        sent = time.perf_counter()
+        await _request(port, "POST", f"/groups/{GROUP_ID}/chat", json.dumps({"text": f"msg {i}"}).encode())
+        arrivals = []
+        for waiter in asyncio.as_completed(waiters):
+            await waiter
+            arrivals.append((time.perf_counter() - sent) * 1000)
+        latencies.append((arrivals[len(arrivals) // 2], arrivals[-1]))
+
+    p50s = sorted(l[0] for l in latencies)
+    lasts = sorted(l[1] for l in latencies)
+    print(f"fan-out to {args.connections}: median delivery {p50s[len(p50s) // 2]:.1f} ms,"
+          f" last connection {lasts[len(lasts) // 2]:.1f} ms (median over {args.messages} messages,"
+          f" worst {lasts[-1]:.1f} ms)")
+
+    for _, writer in streams:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen([sys.executable, "-m", "backend.benchmarks.bench_chat_stream", "--serve", str(port)],
+                              env=dict(os.environ, PRELOAD_AI_MODELS="false"))
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                time.sleep(0.2)
+        asyncio.run(run(args, port, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
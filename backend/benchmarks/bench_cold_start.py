@@ -0,0 +1,48 @@
+"""
+Worker cold start: wall time and peak RSS to import the app, and time until the
+embedding model is ready. Each measurement runs in a fresh interpreter.
+
+    python -m backend.benchmarks.bench_cold_start
+"""
+import json
+import subprocess
+import sys
+
+PROBE = """
+import json, resource, time
+start = time.perf_counter()
+import backend.main
+imported = time.perf_counter() - start
+from backend.services.ai_core import models
+models.start_background_load()
+models._thread.join()
+ready = time.perf_counter() - start
+print(json.dumps({
+    "import_s": round(imported, 2),
+    "models_ready_s": round(ready, 2),
+    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "models": models.status()["state"],
+}))
+"""
+
+IMPORT_ONLY = """
+import json, resource, time
+start = time.perf_counter()
+import backend.main
+print(json.dumps({"import_s": round(time.perf_counter() - start, 2),
+                  "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}))
+"""
+
+
+def run(code: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print("import only (worker serving /groups, /payments):", run(IMPORT_ONLY))
+    print("import + background model load:", run(PROBE))
+
+
+if __name__ == "__main__":
+    main()
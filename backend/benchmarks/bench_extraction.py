@@ -0,0 +1,65 @@
+"""
+Parse time and peak memory of the extraction backends vs the old
+BeautifulSoup + html.parser path, over the saved product page fixtures.
+
+    python -m backend.benchmarks.bench_extraction --body-kb 2000
+"""
+import argparse
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from backend.benchmarks._common import measure, print_row
+from backend.benchmarks._fixtures import all_fixtures
+from backend.services.extraction import ExtractionEngine
+
+
+def legacy_amazon(content: bytes):
+    soup = BeautifulSoup(content, "html.parser")
+    title_tag = soup.find("span", {"id": "productTitle"})
+    price_tag = soup.find("span", {"class": "a-price-whole"})
+    return title_tag and title_tag.get_text().strip(), price_tag and price_tag.get_text()
+
+
+def legacy_flipkart(content: bytes):
+    soup = BeautifulSoup(content, "html.parser")
+    title_tag = soup.find("span", {"class": "B_NuCI"}) or soup.find("h1", {"class": "yhB1nd"})
+    price_tag = soup.find("div", {"class": "_30jeq3 _16Jk6d"})
+    return title_tag and title_tag.get_text().strip(), price_tag and price_tag.get_text()
+
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--head-kb", type=int, default=300)
+    parser.add_argument("--body-kb", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engines = {name: ExtractionEngine(name) for name in ("stream", "selectolax")}
+    for name, content in all_fixtures(head_kb=args.head_kb, body_kb=args.body_kb).items():
+        domain = name.split("_")[0]
+        legacy = legacy_amazon if domain == "amazon" else legacy_flipkart
+        print(f"\n{name} ({len(content) / (1024 * 1024):.1f} MB)  legacy={legacy(content)}")
+
+        candidates = {"legacy bs4 html.parser": lambda: legacy(content)}
+        for engine_name, engine in engines.items():
+            if engine.backend == engine_name:
+                candidates[engine_name] = lambda e=engine: e.extract(domain, content)
+                print(f"  {engine_name}: {engine.extract(domain, content)}")
+
+        for label, fn in candidates.items():
+            stats = measure(fn, repeat=args.repeat, warmup=1)
+            print_row(label, stats)
+            print(f"{'':<32} peak alloc={peak_mb(fn):.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Offline check of the geocode cache: replays a join-like stream of addresses
+(repeat addresses with formatting variations, several per pincode) through
+LocationService.geocode_address with a stubbed geocoder, and reports API
+calls saved, hit rates per tier and how far pincode fallbacks land from the
+true position.
+
+    python -m backend.benchmarks.bench_geocode --lookups 5000 --failure-rate 0.1
+    python -m backend.benchmarks.bench_geocode --prefer-centroid
+
+The stub answers after --api-ms with a fixed position per address and fails
+a --failure-rate fraction of calls; the cache runs memory-only.
+"""
+import argparse
+import random
+import time
+
+from backend.benchmarks._common import offline_firestore
+
+
+def synthetic_addresses(pincodes: int, per_pincode: int, seed: int = 7):
+    rng = random.Random(seed)
+    addresses = []
+    for p in range(pincodes):
+        pincode = f"{560001 + p}"
+        base = (12.8 + rng.random() * 0.4, 77.4 + rng.random() * 0.4)
+        for a in range(per_pincode):
+            addresses.append(({
+                "street": f"{a + 1}, {rng.choice(['MG', 'Church', 'Brigade', 'Residency'])} Road",
+                "city": "Bengaluru",
+                "state": "Karnataka",
+                "pincode": pincode,
+            }, (base[0] + rng.gauss(0, 0.01), base[1] + rng.gauss(0, 0.01))))
+    return addresses
+
+
+def variant(address, rng):
+    # Same place, typed differently
+    street = address["street"]
+    street = rng.choice([street, street.upper(), street.replace(",", ""), f"  {street.lower()} "])
+    return dict(address, street=street, pincode=rng.choice([address["pincode"], f" {address['pincode']}"]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--pincodes", type=int, default=50)
+    parser.add_argument("--per-pincode", type=int, default=40)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--api-ms", type=float, default=2.0, help="simulated GeoApify latency")
+    parser.add_argument("--prefer-centroid", action="store_true")
+    args = parser.parse_args()
+
+    offline_firestore()
+    from backend.services.geocode_cache import geocode_cache
+    from backend.services.location_service import location_service
+
+    geocode_cache.persistent = False
+    geocode_cache.prefer_centroid = args.prefer_centroid
+    rng = random.Random(11)
+    addresses = synthetic_addresses(args.pincodes, args.per_pincode)
+    truth = {geocode_cache.normalize(a): coords for a, coords in addresses}
+
+    def stub_remote(address):
+        time.sleep(args.api_ms / 1000)
+        if rng.random() < args.failure_rate:
+            return None
+        return truth[geocode_cache.normalize(address)]
+
+    location_service._geocode_remote = stub_remote
+
+    errors_km = []
+    began = time.perf_counter()
+    for _ in range(args.lookups):
+        # Popular addresses come back often (people join several groups)
+        address, coords = addresses[min(int(rng.paretovariate(1.2)) - 1, len(addresses) - 1)
+                                    if rng.random() < 0.5 else rng.randrange(len(addresses))]
+        result = location_service.geocode_address(variant(address, rng))
+        if result != (0.0, 0.0):
+            errors_km.append(location_service.haversine_distance(result, coords))
+    elapsed = time.perf_counter() - began
+
+    stats = geocode_cache.stats()
+    errors_km.sort()
+    off = [e for e in errors_km if e > 0.001]
+    print(f"{args.lookups} lookups over {len(addresses)} addresses in {args.pincodes} pincodes"
+          f" ({elapsed:.2f}s, {elapsed / args.lookups * 1000:.2f} ms/lookup; uncached would be"
+          f" {args.lookups} API calls, ~{args.lookups * args.api_ms / 1000:.1f}s)")
+    print(f"api_calls={stats['api_calls']} ({stats['api_calls'] / args.lookups:.1%} of lookups)"
+          f"  api_failures={stats['api_failures']}  unresolved={stats['unresolved']}")
+    print(f"hit_rate={stats['hit_rate']:.1%}  memory={stats['memory_hits']}  pincode={stats['pincode_hits']}")
+    if off:
+        print(f"pincode answers: {len(off)}, error median={off[len(off) // 2]:.2f} km, max={off[-1]:.2f} km")
+
+
+if __name__ == "__main__":
+    main()
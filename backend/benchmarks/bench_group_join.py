@@ -0,0 +1,82 @@
+"""
+Concurrency check for group joins: fires N simultaneous joins at one group
+through the join endpoint and verifies the outcome, then reports latency and
+the contention counters.
+
+    python -m backend.benchmarks.bench_group_join --joins 200 --target-size 200
+
+Firestore is replaced by the in-memory stand-in from backend/tests/fakes.py,
+with a per-RPC delay so requests interleave.
+Exits 1 if any invariant is violated: more members than seats, a seat held
+twice, current_size or member_ids out of step with the members, or the group
+not locked exactly once when full.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.benchmarks._common import offline_firestore
+from backend.tests.fakes import GROUP_ID, FakeDB, check, seed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--joins", type=int, default=200)
+    parser.add_argument("--target-size", type=int, default=200)
+    parser.add_argument("--rpc-ms", type=float, default=5.0, help="simulated latency per Firestore call")
+    args = parser.parse_args()
+
+    db = FakeDB(args.rpc_ms)
+    offline_firestore(db)
+    from backend.auth import UserInDB
+    from backend.routers import groups
+    from backend.schemas import GroupJoin
+    from backend.services.group_members import contention
+    from backend.services.location_service import location_service
+    from fastapi import HTTPException
+
+    location_service.geocode_address = lambda address: (12.9 + random.random() / 10, 77.5 + random.random() / 10)
+    seed(db, args.target_size)
+    join = GroupJoin(address_details={"street": "1 Bench Road", "city": "Bengaluru", "state": "KA",
+                                      "pincode": "560001"})
+    start = threading.Barrier(args.joins)
+    outcomes, latencies = {}, []
+
+    def one(i: int):
+        user = UserInDB(id=f"user-{i}", full_name=f"User {i}", trust_score=50.0)
+        start.wait()
+        began = time.perf_counter()
+        try:
+            groups.join_group(GROUP_ID, join, user)
+            outcome = "joined"
+        except HTTPException as e:
+            outcome = f"{e.status_code} {e.detail}"
+        latencies.append((time.perf_counter() - began) * 1000)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.joins) as pool:
+        list(pool.map(one, range(args.joins)))
+    elapsed = time.perf_counter() - began
+
+    latencies.sort()
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    print(f"{args.joins} simultaneous joins into a group of {args.target_size} (1 seat taken by the creator)"
+          f" in {elapsed:.2f}s, {db.rpcs} Firestore calls")
+    print(f"outcomes: {outcomes}")
+    print(f"latency: p50={pct(0.5):.1f}ms  p95={pct(0.95):.1f}ms  p99={pct(0.99):.1f}ms  max={latencies[-1]:.1f}ms")
+    print(f"contention: {contention.stats()}")
+
+    problems = check(db, args.target_size, outcomes.get("joined", 0))
+    for problem in problems:
+        print(f"INVARIANT VIOLATED: {problem}")
+    if problems:
+        sys.exit(1)
+    print("invariants hold")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+OCR throughput through the process pool on generated screenshot-like images.
+Pass --images-dir to use real sample screenshots instead.
+
+    python -m backend.benchmarks.bench_ocr --count 20
+"""
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from backend.services.ocr_pool import OCRPool, OCRPoolSaturated
+
+
+def generate_images(directory: str, count: int):
+    paths = []
+    for i in range(count):
+        image = Image.new("RGB", (1242, 2688), "white")  # phone screenshot size
+        draw = ImageDraw.Draw(image)
+        draw.text((60, 300), f"amazon.in  Sony WH-1000XM5 Headphones #{i}", fill="black")
+        draw.text((60, 420), f"Deal Price: Rs. {19990 + i:,}", fill="black")
+        path = os.path.join(directory, f"shot-{i}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--images-dir")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        sources = sorted(glob.glob(os.path.join(args.images_dir, "*"))) if args.images_dir else generate_images(workdir, args.count)
+        pool = OCRPool(workers=args.workers, max_pending=len(sources))
+
+        # Warm the workers (EasyOCR load) before timing
+        warm = os.path.join(workdir, "warm.png")
+        shutil.copy(sources[0], warm)
+        pool.submit(warm).result()
+
+        start = time.perf_counter()
+        futures = []
+        for i, src in enumerate(sources):
+            # The pool deletes what it's given, so hand it copies
+            copy = os.path.join(workdir, f"job-{i}{os.path.splitext(src)[1]}")
+            shutil.copy(src, copy)
+            try:
+                futures.append(pool.submit(copy))
+            except OCRPoolSaturated:
+                pass
+        texts = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+
+        print(f"{len(texts)} images, {args.workers} workers: {len(texts) / elapsed:.2f} images/s ({elapsed:.1f}s)")
+        print(f"pool: {pool.stats()}")
+        pool.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Two-stage matching (lexical shortlist -> semantic scoring) vs scoring every
+candidate with the model. Recall is the share of the exhaustive top-5
+(similarity > 0.60) that survives the shortlist.
+
+    python -m backend.benchmarks.bench_prefilter --candidates 500 --shortlist 50
+"""
+import argparse
+
+import numpy as np
+
+from backend.benchmarks._catalog import synthetic_catalog, query_titles
+from backend.benchmarks._common import measure, print_row
+from backend.services.ai_core import models, to_matcher, _encode_batch
+from backend.services.lexical_index import LexicalIndex
+
+
+def top_ids(query_vector, offers, vectors, k=5):
+    scores = vectors @ query_vector
+    order = np.argsort(-scores)[:k]
+    return {offers[i]["id"] for i in order if scores[i] > 0.60}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--shortlist", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    models.load()
+    offers = synthetic_catalog(args.candidates)
+    queries = query_titles(args.queries)
+    titles = [o["title"] for o in offers]
+    all_vectors = _encode_batch(titles)
+
+    lexical = LexicalIndex(to_matcher.lexical_tokens)
+    for i, offer in enumerate(offers):
+        lexical.add(i, offer["title"])
+
+    found = expected = 0
+    for q in queries:
+        qv = _encode_batch([q])[0]
+        truth = top_ids(qv, offers, all_vectors)
+        short = [i for i, _ in lexical.search(q, args.shortlist)]
+        kept = {offers[i]["id"] for i in short} & truth
+        found += len(kept)
+        expected += len(truth)
+    print(f"{args.candidates} candidates, shortlist {args.shortlist}: recall@5 = {found / max(expected, 1):.3f}")
+
+    it = iter(range(10 ** 9))
+
+    def exhaustive():
+        q = queries[next(it) % len(queries)]
+        vectors = _encode_batch([q] + titles)
+        return vectors[1:] @ vectors[0]
+
+    def two_stage():
+        q = queries[next(it) % len(queries)]
+        short = [i for i, _ in lexical.search(q, args.shortlist)]
+        vectors = _encode_batch([q] + [titles[i] for i in short])
+        return vectors[1:] @ vectors[0]
+
+    repeat = min(args.queries, 10)
+    print_row("exhaustive semantic", measure(exhaustive, repeat=repeat, warmup=1))
+    print_row("lexical + semantic", measure(two_stage, repeat=repeat, warmup=1))
+
+
+if __name__ == "__main__":
+    main()
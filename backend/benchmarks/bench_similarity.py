@@ -0,0 +1,48 @@
+"""
+Compares the old per-pair similarity loop against the batched API.
+
+    python -m backend.benchmarks.bench_similarity --candidates 50
+"""
+import argparse
+import random
+
+from backend.benchmarks._common import measure, print_row
+from backend.services.ai_core import ai_service, models
+
+BRANDS = ["Sony", "Apple", "Samsung", "boAt", "OnePlus", "Fortune", "Tata", "Philips"]
+PRODUCTS = ["WH-1000XM4 Headphones", "iPhone 13 Pro 128GB", "Galaxy S23 5G", "Airdopes 141",
+            "Nord CE 3 Lite", "Sunflower Oil 1kg", "Salt 1kg Pack of 2", "Air Fryer HD9200 4.1L"]
+
+
+def synthetic_titles(n: int):
+    return [f"{random.choice(BRANDS)} {random.choice(PRODUCTS)} ({random.choice(['Black', 'Blue', 'Silver'])})" for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    models.load()
+    random.seed(42)
+    query = "Sony WH-1000XM5 Wireless Noise Cancelling Headphones"
+    titles = synthetic_titles(args.candidates)
+
+    model = models.embedding_model
+
+    # Bypass the embedding cache so both variants pay the full model cost
+    def per_pair():
+        return [float(model.encode(query, normalize_embeddings=True) @ model.encode(t, normalize_embeddings=True)) for t in titles]
+
+    def batched():
+        vectors = model.encode([query] + titles, batch_size=64, normalize_embeddings=True)
+        return ai_service.cosine_scores(vectors[0], vectors[1:])
+
+    print(f"{args.candidates} candidates, {args.repeat} runs")
+    print_row("per-pair loop", measure(per_pair, repeat=args.repeat))
+    print_row("batched", measure(batched, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
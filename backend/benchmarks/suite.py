@@ -0,0 +1,230 @@
+"""
+Offline benchmark suite for the offer-verification pipeline.
+
+Times each stage (verify_offer_url, find_matches, _extract_critical_tokens,
+check_guardrails, extract_product_id) against the recorded HTML fixtures and a
+synthetic catalog of variant titles, and records latency percentiles and
+allocations as JSON so runs can be compared between versions.
+
+    python -m backend.benchmarks.suite --output bench.json
+    python -m backend.benchmarks.suite --output new.json --baseline bench.json
+
+No network or Firestore is touched: product pages are served from the fixtures,
+the caches run memory-only, and by default a hashing embedder stands in for
+the sentence-transformers model (--model real loads the configured one).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+import zlib
+from typing import Dict, List
+
+import numpy as np
+
+from backend.benchmarks._catalog import synthetic_catalog, query_titles
+from backend.benchmarks._common import allocations, measure, offline_firestore
+from backend.benchmarks._fixtures import all_fixtures
+
+STUB_DIM = 384
+
+
+class HashingEmbedder:
+    """
+    Stand-in for SentenceTransformer: word and character-trigram features hashed
+    into a fixed-size unit vector. Deterministic, fast and dependency-free, and
+    variant titles still land close to each other, so the matching stages see a
+    realistic score distribution.
+    """
+
+    def __init__(self, dim: int = STUB_DIM):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = text.lower().split()
+        grams = [w[i:i + 3] for w in words for i in range(max(1, len(w) - 2))]
+        return words + grams
+
+    def encode(self, texts, batch_size: int = 64, normalize_embeddings: bool = True):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                out[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        if normalize_embeddings:
+            out /= np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-12)
+        return out
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def _stage(fn, repeat: int, warmup: int) -> Dict[str, float]:
+    stats = measure(fn, repeat=repeat, warmup=warmup)
+    stats.update(allocations(fn, repeat=min(repeat, 5)))
+    return stats
+
+
+def run(args) -> Dict:
+    from backend.schemas import OfferCreate
+    from backend.services.ai_core import models, to_matcher
+    from backend.services.ann_index import offer_index
+    from backend.services.embedding_cache import embedding_cache
+    from backend.services.scrape_cache import scrape_cache
+    from backend.services.verification import verification_service
+    import httpx
+
+    embedding_cache.persistent = False
+    scrape_cache.persistent = False
+
+    if args.model == "real":
+        models.load()
+        if not models.embedding_ready:
+            raise SystemExit(f"Embedding model failed to load: {models.errors}")
+    else:
+        models.embedding_model = HashingEmbedder()
+        models.state["embedding"] = "ready"
+
+    pages = {name.split("_")[0]: content
+             for name, content in all_fixtures(head_kb=args.head_kb, body_kb=args.body_kb).items()}
+
+    async def fixture_fetch(url: str):
+        return httpx.Response(200, content=pages[verification_service.get_domain(url)])
+
+    verification_service.client.fetch = fixture_fetch
+
+    catalog = synthetic_catalog(args.catalog)
+    queries = query_titles(args.queries)
+    titles = [offer["title"] for offer in catalog]
+    new_offers = [OfferCreate(product_url=f"https://www.amazon.in/dp/BQ{i:08d}", title=title, price=999.0)
+                  for i, title in enumerate(queries)]
+    pairs = [(queries[i], titles[i % len(titles)]) for i in range(len(queries))]
+    urls = [offer["product_url"] for offer in catalog[:len(queries)]] + [
+        "https://www.flipkart.com/apple-iphone-15/p/itm6ac6485515ae4?pid=MOBGTAGPTB3VS24W",
+        "https://www.example.com/product/123",
+    ]
+    cycle = {"i": 0}
+
+    def next_index():
+        cycle["i"] += 1
+        return cycle["i"]
+
+    loop = asyncio.new_event_loop()
+    results: Dict[str, Dict] = {}
+
+    def verify_cold():
+        # Fresh product ID every call, so the scrape cache never answers
+        domain_url = ("https://www.amazon.in/dp/BC{:08d}" if next_index() % 2 else
+                      "https://www.flipkart.com/p/itm?pid=COLD{:08d}").format(cycle["i"])
+        loop.run_until_complete(verification_service.verify_offer_url(domain_url, 26990.0))
+
+    def verify_cached():
+        loop.run_until_complete(verification_service.verify_offer_url(
+            "https://www.amazon.in/dp/B0WARM0001", 26990.0))
+
+    stages = {
+        "verify_offer_url.cold": verify_cold,
+        "verify_offer_url.cached": verify_cached,
+        "extract_product_id": lambda: [to_matcher.extract_product_id(url) for url in urls],
+        "_extract_critical_tokens": lambda: [to_matcher._extract_critical_tokens(t) for t in queries],
+        "check_guardrails": lambda: [to_matcher.check_guardrails(a, b) for a, b in pairs],
+        "find_matches.list": lambda: to_matcher.find_matches(
+            new_offers[next_index() % len(new_offers)], catalog),
+    }
+    for name, fn in stages.items():
+        results[name] = _stage(fn, args.repeat, args.warmup)
+        print_stage(name, results[name])
+
+    # Same workload through the offer index, as the API runs it once warmed up
+    for offer in catalog:
+        offer_index.upsert(offer)
+    offer_index.loaded = True
+    name = "find_matches.index"
+    results[name] = _stage(lambda: to_matcher.find_matches(new_offers[next_index() % len(new_offers)]),
+                           args.repeat, args.warmup)
+    print_stage(name, results[name])
+
+    loop.close()
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "model": args.model,
+            "catalog": args.catalog,
+            "queries": args.queries,
+            "repeat": args.repeat,
+            "page_kb": {"head": args.head_kb, "body": args.body_kb},
+        },
+        "stages": results,
+    }
+
+
+def print_stage(name: str, stats: Dict[str, float]):
+    print(f"{name:<28} p50={stats['p50_ms']:9.3f}ms  p95={stats['p95_ms']:9.3f}ms  p99={stats['p99_ms']:9.3f}ms"
+          f"  peak={stats['peak_alloc_kb']:9.1f}KB")
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Stages whose p50 or p95 grew by more than `threshold` (0.2 = 20%) over the baseline.
+    """
+    regressions = []
+    print(f"\nvs baseline {baseline['meta'].get('git_revision')} ({baseline['meta'].get('timestamp')})")
+    for name, stats in current["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old:
+            print(f"{name:<28} (new stage)")
+            continue
+        changes = {key: stats[key] / old[key] - 1 for key in ("p50_ms", "p95_ms", "peak_alloc_kb") if old.get(key)}
+        flagged = [key for key in ("p50_ms", "p95_ms") if changes.get(key, 0) > threshold]
+        print(f"{name:<28} " + "  ".join(f"{key}={change:+.0%}" for key, change in changes.items())
+              + ("  REGRESSION" if flagged else ""))
+        if flagged:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown flagged as a regression")
+    parser.add_argument("--model", choices=["stub", "real"], default="stub")
+    parser.add_argument("--catalog", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--head-kb", type=int, default=300)
+    parser.add_argument("--body-kb", type=int, default=2000)
+    parser.add_argument("--firestore", action="store_true", help="import the real Firestore client instead of running offline")
+    args = parser.parse_args()
+
+    if not args.firestore:
+        # Nothing below reaches `db` once the caches are memory-only
+        offline_firestore()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
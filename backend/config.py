@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Dict, List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Dealicious"
@@ -20,6 +20,59 @@ class Settings(BaseSettings):
     
     # AI & Geo Services
     GEOAPIFY_API_KEY: Optional[str] = None
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0
+    # Longest a batched model call may take before waiting callers give up
+    EMBEDDING_ENCODE_TIMEOUT_SECONDS: float = 30.0
+    # Duplicate matching: first-stage candidate selection ("ann", "lexical", "hybrid", "none")
+    MATCHER_PREFILTER: str = "ann"
+    MATCHER_SHORTLIST_SIZE: int = 50
+
+    # Product page scraping
+    SCRAPE_DEADLINE_SECONDS: float = 8.0
+    SCRAPE_MAX_PER_DOMAIN: int = 4
+    # Product pages larger than this are abandoned mid-download
+    SCRAPE_MAX_BYTES: int = 5 * 1024 * 1024
+    SCRAPE_CACHE_TTL_SECONDS: float = 6 * 60 * 60
+    SCRAPE_CACHE_NEGATIVE_TTL_SECONDS: float = 60
+    # Geocoding (GeoApify) cache; prefer-centroid answers exact misses from a known
+    # pincode's centroid instead of calling the API (coarser receiver selection)
+    GEOCODE_CACHE_SIZE: int = 20000
+    GEOCODE_CACHE_TTL_SECONDS: float = 30 * 24 * 60 * 60
+    GEOCODE_PREFER_PINCODE_CENTROID: bool = False
+    # HTML extraction: "stream", "selectolax" or "bs4"; selectors override the
+    # per-domain defaults in services/extraction.py, e.g. {"amazon": {"price": ["span.a-offscreen"]}}
+    EXTRACTION_BACKEND: str = "stream"
+    EXTRACTION_SELECTORS: Dict[str, Dict[str, List[str]]] = {}
+
+    # Screenshot OCR (process pool)
+    OCR_WORKERS: int = 1
+    OCR_MAX_PENDING: int = 8
+    OCR_MAX_IMAGE_SIDE: int = 1600
+    SCREENSHOT_MAX_BYTES: int = 8 * 1024 * 1024
+    # Background offer ingestion (POST /offers/?background=true): "inprocess" or "inline"
+    INGEST_QUEUE_BACKEND: str = "inprocess"
+    INGEST_WORKERS: int = 4
+    INGEST_MAX_PENDING: int = 100
+    # Offers PROCESSING for longer than this when a worker starts are resubmitted (their job was lost)
+    INGEST_RECLAIM_AFTER_SECONDS: float = 600.0
+    # Group chat streaming (GET /groups/{id}/chat/stream)
+    CHAT_STREAM_HEARTBEAT_SECONDS: float = 15.0
+    CHAT_STREAM_QUEUE_SIZE: int = 100
+    CHAT_REPLAY_BUFFER_SIZE: int = 200
+    # One Firestore listener per watched group per worker; off = only this worker's posts are pushed
+    CHAT_SHARED_LISTENER: bool = True
+    # Group membership cache for chat authorization (per worker)
+    MEMBERSHIP_CACHE_SIZE: int = 10000
+    MEMBERSHIP_CACHE_TTL_SECONDS: float = 300.0
+    # Group joins: seat collisions retry with jittered exponential backoff
+    GROUP_JOIN_MAX_ATTEMPTS: int = 8
+    GROUP_JOIN_BACKOFF_BASE_SECONDS: float = 0.02
+    GROUP_JOIN_BACKOFF_CAP_SECONDS: float = 0.5
+    # Load AI models in a background thread at startup. When False they load on first use.
+    PRELOAD_AI_MODELS: bool = True
     
     # Payments
     RAZORPAY_KEY_ID: Optional[str] = None
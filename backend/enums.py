@@ -9,6 +9,7 @@ class OfferStatus(str, enum.Enum):
     PENDING = "PENDING"
     APPROVED = "APPROVED"
     REJECTED = "REJECTED"
+    PROCESSING = "PROCESSING" # Provisional, background verification still running
 
 class GroupStatus(str, enum.Enum):
     FORMING = "FORMING"
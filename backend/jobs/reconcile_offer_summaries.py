@@ -0,0 +1,62 @@
+"""
+Repairs drift between offers and the offer_summary embedded in their groups
+(edits made outside the API, or a crash between an offer write and its
+propagation). Also fills the summary on groups created before it existed.
+Meant to run on a schedule (e.g. hourly cron); staleness of group reads is
+bounded by how often it runs.
+
+    python -m backend.jobs.reconcile_offer_summaries --dry-run
+    python -m backend.jobs.reconcile_offer_summaries
+"""
+import argparse
+from collections import defaultdict
+
+from backend.firebase_setup import db
+from backend.services.firestore_limits import BATCH_WRITE_LIMIT, IN_QUERY_LIMIT, chunked
+from backend.services.offer_groups import offer_summary, summary_differs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="report drift without writing")
+    args = parser.parse_args()
+
+    groups_by_offer = defaultdict(list)
+    scanned = 0
+    for doc in db.collection('groups').select(['offer_id', 'offer_summary']).stream():
+        scanned += 1
+        data = doc.to_dict()
+        if data.get('offer_id'):
+            groups_by_offer[data['offer_id']].append((doc.reference, data.get('offer_summary')))
+
+    repaired = orphaned = pending = 0
+    batch = db.batch()
+    for offer_ids in chunked(list(groups_by_offer), IN_QUERY_LIMIT * 10):
+        refs = [db.collection('offers').document(offer_id) for offer_id in offer_ids]
+        for snap in db.get_all(refs):
+            if not snap.exists:
+                orphaned += len(groups_by_offer[snap.id])
+                continue
+            fresh = offer_summary(snap.id, snap.to_dict())
+            for group_ref, current in groups_by_offer[snap.id]:
+                if not summary_differs(current, fresh):
+                    continue
+                repaired += 1
+                if args.dry_run:
+                    print(f"Drift on group {group_ref.id} (offer {snap.id})")
+                    continue
+                batch.update(group_ref, {"offer_summary": fresh})
+                pending += 1
+                if pending >= BATCH_WRITE_LIMIT:
+                    batch.commit()
+                    batch = db.batch()
+                    pending = 0
+
+    if pending:
+        batch.commit()
+    action = "would repair" if args.dry_run else "repaired"
+    print(f"Scanned {scanned} groups, {action} {repaired}, {orphaned} point at missing offers")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.config import settings
+from backend.middleware import BodySizeLimitMiddleware
 # Database initialized in routers via Firebase
 from backend.routers import users, offers, groups, payments
 
@@ -18,6 +21,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# Multipart overhead on top of the file itself
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={"/offers/screenshot": settings.SCREENSHOT_MAX_BYTES + UPLOAD_FORM_OVERHEAD},
 )
 
 app.include_router(users.router, prefix="/users", tags=["users"])
@@ -26,12 +37,81 @@ app.include_router(groups.router, prefix="/groups", tags=["groups"])
 app.include_router(groups.router, prefix="/groups", tags=["groups"])
 app.include_router(payments.router, prefix="/payments", tags=["payments"])
 from backend.routers import admin
+from backend.routers.admin import verify_admin_secret
 app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
+@app.on_event("startup")
+def load_ai_models():
+    # Non-blocking: the worker serves requests while models load, matching degrades until then
+    if settings.PRELOAD_AI_MODELS:
+        from backend.services.ai_core import models
+        models.start_background_load()
+
+@app.on_event("startup")
+async def reclaim_stalled_offers():
+    # In the background: a slow Firestore must not hold up serving
+    async def run():
+        try:
+            await offers.reclaim_stalled_offers()
+        except Exception as e:
+            print(f"Warning: Stalled offer sweep failed {e}")
+
+    app.state.reclaim_task = asyncio.create_task(run())
+
+@app.on_event("shutdown")
+async def release_workers():
+    from backend.services.ingestion import ingestion_queue
+    from backend.services.ocr_pool import ocr_pool
+    from backend.services.verification import verification_service
+    await ingestion_queue.shutdown()
+    ocr_pool.shutdown()
+    await verification_service.client.aclose()
+
 @app.get("/")
 def root():
     return {"message": "Dealicious API is running", "status": "active"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "db": "connected"}
+    """
+    Readiness probe. With PRELOAD_AI_MODELS the worker reports 503 only while the
+    embedding model is still loading, so it joins rotation once matching works.
+    A failed load is reported as "degraded" with its error but stays 200: the
+    endpoints that don't match offers still work. Without preload the model
+    loads on first use and never gates readiness.
+    """
+    from backend.services.ai_core import models
+    model_status = models.status()
+    embedding = model_status["state"]["embedding"]
+    if embedding == "ready":
+        return {"status": "ok", "models": model_status}
+    if embedding == "failed":
+        return {"status": "degraded", "models": model_status}
+    if settings.PRELOAD_AI_MODELS:
+        return JSONResponse(status_code=503, content={"status": "loading", "models": model_status})
+    return {"status": "ok", "models": model_status}
+
+@app.get("/stats", dependencies=[Depends(verify_admin_secret)])
+def service_stats():
+    from backend.services.embedding_cache import embedding_cache
+    from backend.services.ai_core import embedding_batcher
+    from backend.services.ocr_pool import ocr_pool
+    from backend.services.scrape_cache import scrape_cache
+    from backend.services.singleflight import scrape_flight, match_flight
+    from backend.services.ingestion import ingestion_queue
+    from backend.services.chat_hub import chat_hub
+    from backend.services.membership_cache import membership_cache
+    from backend.services.group_members import contention
+    from backend.services.geocode_cache import geocode_cache
+    return {
+        "embedding_cache": embedding_cache.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "ocr_pool": ocr_pool.stats(),
+        "scrape_cache": scrape_cache.stats(),
+        "singleflight": {"scrape": scrape_flight.stats(), "matching": match_flight.stats()},
+        "ingestion": ingestion_queue.stats(),
+        "chat_streams": chat_hub.stats(),
+        "membership_cache": membership_cache.stats(),
+        "group_joins": contention.stats(),
+        "geocode_cache": geocode_cache.stats(),
+    }
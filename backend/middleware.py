@@ -0,0 +1,70 @@
+import json
+from typing import Dict
+
+from fastapi import HTTPException
+
+
+class RequestTooLarge(HTTPException):
+    # An HTTPException so FastAPI's body parsing re-raises it (as a 413) instead of a 400
+    def __init__(self):
+        super().__init__(status_code=413, detail="Request body too large")
+
+
+class BodySizeLimitMiddleware:
+    """
+    Rejects oversized request bodies on the given paths before they are read.
+    FastAPI parses (and spools) a multipart body before the endpoint runs, so a
+    cap checked inside the endpoint only fires after the whole upload arrived.
+    - A Content-Length above the limit gets a 413 without reading the body.
+    - Bodies without one (chunked) are counted as they stream in and cut off
+      with a 413 once they pass the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            return await self._reject(send)
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestTooLarge()
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if not started:
+                await self._reject(send)
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": "Request body too large"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
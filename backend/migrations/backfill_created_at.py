@@ -0,0 +1,53 @@
+"""
+One-off backfill: sets `created_at` on documents written without it, using
+the document's Firestore create time. Listings paged by created_at
+(GET /offers/, GET /groups/) skip documents that lack the field.
+
+    python -m backend.migrations.backfill_created_at --dry-run
+    python -m backend.migrations.backfill_created_at --collection offers
+
+Idempotent: documents that already have created_at are skipped.
+"""
+import argparse
+
+from backend.firebase_setup import db
+from backend.services.firestore_limits import BATCH_WRITE_LIMIT
+
+COLLECTIONS = ("offers", "groups", "users")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    parser.add_argument("--collection", choices=COLLECTIONS, action="append",
+                        help="limit to these collections (repeatable; default: all)")
+    args = parser.parse_args()
+
+    for collection in args.collection or COLLECTIONS:
+        scanned = updated = 0
+        batch = db.batch()
+        pending = 0
+        for doc in db.collection(collection).select(['created_at']).stream():
+            scanned += 1
+            if doc.to_dict().get('created_at') is not None:
+                continue
+
+            updated += 1
+            if args.dry_run:
+                print(f"Would set created_at={doc.create_time} on {collection}/{doc.id}")
+                continue
+            batch.update(doc.reference, {"created_at": doc.create_time})
+            pending += 1
+            if pending >= BATCH_WRITE_LIMIT:
+                batch.commit()
+                batch = db.batch()
+                pending = 0
+
+        if pending:
+            batch.commit()
+        action = "would update" if args.dry_run else "updated"
+        print(f"Scanned {scanned} {collection}, {action} {updated}")
+
+
+if __name__ == "__main__":
+    main()
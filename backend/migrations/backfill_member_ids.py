@@ -0,0 +1,52 @@
+"""
+One-off backfill: adds the indexed `member_ids` array to group documents
+created before it existed, so /groups/me/list can find them.
+
+    python -m backend.migrations.backfill_member_ids --dry-run
+    python -m backend.migrations.backfill_member_ids
+
+Idempotent: groups whose member_ids already match their members are skipped,
+as are groups moved to the members subcollection (joins keep member_ids there).
+"""
+import argparse
+
+from backend.firebase_setup import db
+from backend.services.firestore_limits import BATCH_WRITE_LIMIT
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    scanned = updated = 0
+    batch = db.batch()
+    pending = 0
+    for doc in db.collection('groups').select(['members', 'member_ids']).stream():
+        scanned += 1
+        data = doc.to_dict()
+        if 'members' not in data:
+            continue
+        member_ids = [m['user_id'] for m in data.get('members', []) if m.get('user_id')]
+        if data.get('member_ids') == member_ids:
+            continue
+
+        updated += 1
+        if args.dry_run:
+            print(f"Would set member_ids={member_ids} on group {doc.id}")
+            continue
+        batch.update(doc.reference, {"member_ids": member_ids})
+        pending += 1
+        if pending >= BATCH_WRITE_LIMIT:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+    action = "would update" if args.dry_run else "updated"
+    print(f"Scanned {scanned} groups, {action} {updated}")
+
+
+if __name__ == "__main__":
+    main()
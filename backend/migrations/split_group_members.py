@@ -0,0 +1,47 @@
+"""
+One-off migration: moves each group's `members` array into the
+groups/{id}/members and groups/{id}/seats subcollections that joins now use.
+
+    python -m backend.migrations.split_group_members --dry-run
+    python -m backend.migrations.split_group_members
+
+Not required for correctness (legacy groups are migrated on their first
+member write), but until it runs those groups still rewrite one document per
+join. Idempotent: groups without a `members` array are skipped.
+
+Deploy the indexes in firestore.indexes.json (repo root) first, e.g.
+`firebase deploy --only firestore:indexes`: group listings read members with a
+collection-group query on `members.group_id`, which needs the
+collection-group field override defined there, and the forming-groups page
+needs the (status, created_at, __name__) composite index.
+"""
+import argparse
+
+from backend.firebase_setup import db
+from backend.services.group_members import migrate_legacy
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    scanned = migrated = 0
+    for doc in db.collection('groups').select(['members']).stream():
+        scanned += 1
+        members = doc.to_dict().get('members')
+        if members is None:
+            continue
+        if args.dry_run:
+            print(f"Would move {len(members)} members of group {doc.id}")
+            migrated += 1
+            continue
+        if migrate_legacy(doc.reference):
+            migrated += 1
+
+    action = "would migrate" if args.dry_run else "migrated"
+    print(f"Scanned {scanned} groups, {action} {migrated}")
+
+
+if __name__ == "__main__":
+    main()
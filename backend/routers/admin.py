@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, Request, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
 from backend.firebase_setup import db
+from backend.services.pagination import paginate, InvalidCursor, NEXT_CURSOR_HEADER
+from backend.services.export import ndjson_chunks, parse_filter, InvalidFilter
 from backend.auth import get_current_user
 # We might want to secure this specifically for admin, but for now we'll just open it 
 # or use a simple hardcoded check in frontend. 
@@ -14,9 +18,20 @@ def verify_admin_secret(x_admin_secret: str = Header(...)):
     if x_admin_secret != "dealicious_admin_123":
         raise HTTPException(status_code=403, detail="Invalid Admin Secret")
 
+def _page(query, response: Response, limit: int, cursor: Optional[str]):
+    # Document-ID order, so documents without created_at are listed too;
+    # pass the X-Next-Cursor header back as ?cursor= for the next page
+    try:
+        docs, next_cursor = paginate(query, limit, cursor, order_field=None, descending=False, max_limit=500)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return docs
+
 @router.get("/users", dependencies=[Depends(verify_admin_secret)])
-def get_all_users():
-    docs = db.collection('users').stream()
+def get_all_users(response: Response, limit: int = 100, cursor: Optional[str] = None):
+    docs = _page(db.collection('users'), response, limit, cursor)
     users = []
     for doc in docs:
         d = doc.to_dict()
@@ -25,8 +40,8 @@ def get_all_users():
     return users
 
 @router.get("/offers", dependencies=[Depends(verify_admin_secret)])
-def get_all_offers():
-    docs = db.collection('offers').stream()
+def get_all_offers(response: Response, limit: int = 100, cursor: Optional[str] = None):
+    docs = _page(db.collection('offers'), response, limit, cursor)
     offers = []
     for doc in docs:
         d = doc.to_dict()
@@ -35,11 +50,55 @@ def get_all_offers():
     return offers
 
 @router.get("/groups", dependencies=[Depends(verify_admin_secret)])
-def get_all_groups():
-    docs = db.collection('groups').stream()
+def get_all_groups(response: Response, limit: int = 100, cursor: Optional[str] = None):
+    docs = _page(db.collection('groups'), response, limit, cursor)
     groups = []
     for doc in docs:
         d = doc.to_dict()
         d['id'] = doc.id
         groups.append(d)
     return groups
+
+EXPORTABLE = {"users", "offers", "groups"}
+
+@router.get("/{collection}/export", dependencies=[Depends(verify_admin_secret)])
+def export_collection(
+    collection: str,
+    request: Request,
+    fields: Optional[str] = None,
+    where: List[str] = Query(default=[]),
+    limit: Optional[int] = None,
+):
+    """
+    Streams a whole collection as NDJSON (one document per line), straight from
+    Firestore's stream() iterator with flat memory use.
+    - fields=title,price: server-side projection, only these fields are transferred
+    - where=status,==,APPROVED (repeatable): Firestore filters, values parsed as JSON
+    - gzip-encoded when the client sends Accept-Encoding: gzip
+    """
+    if collection not in EXPORTABLE:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+
+    query = db.collection(collection)
+    try:
+        for raw in where:
+            field, op, value = parse_filter(raw)
+            query = query.where(field, op, value)
+    except InvalidFilter as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    if field_list:
+        query = query.select(field_list)
+    if limit:
+        query = query.limit(limit)
+
+    compress = "gzip" in request.headers.get("accept-encoding", "")
+    headers = {"Content-Disposition": f'attachment; filename="{collection}.ndjson"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        ndjson_chunks(query.stream(), field_list, compress=compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
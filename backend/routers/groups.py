@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from backend.firebase_setup import db
-from backend.auth import get_current_user, UserInDB
+from backend.auth import get_current_user, get_current_user_for_stream, UserInDB
+from backend.config import settings
 from backend.schemas import GroupCreate, GroupResponse, GroupJoin, ChatMessageCreate
 
 from backend.enums import GroupStatus
+from backend.services.offer_groups import hydrate_offers, offer_summary
+from backend.services.pagination import paginate, encode_cursor, InvalidCursor, NEXT_CURSOR_HEADER
+from backend.services.chat_hub import chat_hub, sse_event, OVERFLOW
+from backend.services.membership_cache import membership_cache
+from backend.services import group_members
 from firebase_admin import firestore
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio
 import uuid
 
 router = APIRouter()
@@ -14,10 +24,15 @@ router = APIRouter()
 def create_group(group: GroupCreate, current_user: UserInDB = Depends(get_current_user)):
     print(f"DEBUG: Creating group for offer {group.offer_id}")
     
-    # Verify Offer
-    # In Firestore, references are just paths or separate calls
-    # For simplicity, we just assume it exists or do a quick get
-    # offer_ref = db.collection('offers').document(group.offer_id).get()
+    # Verify Offer first: its summary is embedded in the group document
+    print(f"DEBUG: Fetching offer data for {group.offer_id}")
+    offer_snapshot = db.collection('offers').document(group.offer_id).get()
+    if not offer_snapshot.exists:
+        print(f"ERROR: Offer {group.offer_id} not found!")
+        raise HTTPException(status_code=404, detail="Offer not found")
+
+    offer_data = offer_snapshot.to_dict()
+    offer_data['id'] = group.offer_id
     
     new_group_ref = db.collection('groups').document()
     
@@ -31,36 +46,37 @@ def create_group(group: GroupCreate, current_user: UserInDB = Depends(get_curren
     group_data = {
         "id": new_group_ref.id,
         "offer_id": group.offer_id,
+        # Denormalized for reads; see offer_summary() for the consistency guarantees
+        "offer_summary": offer_summary(group.offer_id, offer_data),
         "target_size": group.target_size,
         "current_size": 1,
         "receiver_id": current_user.id,
         "status": GroupStatus.FORMING,
         "created_at": datetime.utcnow(),
-        "members": [{
-            "user_id": current_user.id,
-            "full_name": current_user.full_name or "Unknown User",
-            "status": "JOINED",
-            "trust_score": current_user.trust_score,
-            "joined_at": datetime.utcnow().isoformat(),
-            "address": group.address_details.model_dump() if group.address_details else None,
-            "coordinates": coords
-        }]
+        # Indexed membership for /groups/me/list; members themselves live in the
+        # members subcollection (see group_members)
+        "member_ids": [current_user.id],
+    }
+    creator = {
+        "user_id": current_user.id,
+        "full_name": current_user.full_name or "Unknown User",
+        "status": "JOINED",
+        "trust_score": current_user.trust_score,
+        "joined_at": datetime.utcnow().isoformat(),
+        "address": group.address_details.model_dump() if group.address_details else None,
+        "coordinates": coords
     }
 
-    
-    new_group_ref.set(group_data)
-    
-    # We need to return a response that matches the Schema.
-    # The Schema expects nested 'offer' object.
-    # We should fetch the offer data to populate it.
-    print(f"DEBUG: Fetching offer data for {group.offer_id}")
-    offer_snapshot = db.collection('offers').document(group.offer_id).get()
-    if not offer_snapshot.exists:
-        print(f"ERROR: Offer {group.offer_id} not found!")
-        raise HTTPException(status_code=404, detail="Offer not found")
-        
-    offer_data = offer_snapshot.to_dict()
-    offer_data['id'] = group.offer_id
+    batch = db.batch()
+    batch.set(new_group_ref, group_data)
+    creator = group_members.create_first_member(batch, new_group_ref, creator)
+    # Maintain the offer -> group mapping read by duplicate enrichment (first group wins)
+    if not offer_data.get('group_id'):
+        batch.update(offer_snapshot.reference, {"group_id": new_group_ref.id})
+        offer_data['group_id'] = new_group_ref.id
+    batch.commit()
+    group_data['members'] = [creator]
+    membership_cache.update(new_group_ref.id, group_data['members'])
     
     print(f"DEBUG: Constructing response with offer data: {offer_data.keys()}")
     group_data['offer'] = offer_data
@@ -68,27 +84,33 @@ def create_group(group: GroupCreate, current_user: UserInDB = Depends(get_curren
     return group_data
 
 @router.get("/", response_model=list[GroupResponse])
-def get_groups(limit: int = 20):
-    docs = db.collection('groups').where("status", "==", GroupStatus.FORMING.value).limit(limit).stream()
+def get_groups(response: Response, limit: int = 20, cursor: Optional[str] = None):
+    """
+    Forming groups, newest first. Paged: pass the X-Next-Cursor header back as ?cursor=.
+    Needs the groups (status, created_at, __name__) index in firestore.indexes.json.
+    """
+    query = db.collection('groups').where("status", "==", GroupStatus.FORMING.value)
+    try:
+        docs, next_cursor = paginate(query, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     groups = []
-    
-    # Batch fetch offers might be better, but for now simple loop
     for doc in docs:
         g_data = doc.to_dict()
         g_data['id'] = doc.id
-        
-        # Fetch associated offer
         if 'offer_id' in g_data:
-            o_snap = db.collection('offers').document(g_data['offer_id']).get()
-            if o_snap.exists:
-                o_data = o_snap.to_dict()
-                o_data['id'] = g_data['offer_id']
-                g_data['offer'] = o_data
-                groups.append(g_data)
-            else:
-                print(f"WARNING: Group {doc.id} has invalid offer_id {g_data['offer_id']}")
-                
-    return groups
+            groups.append(g_data)
+
+    # All linked offers in one batched read
+    hydrate_offers(groups)
+    for g_data in groups:
+        if 'offer' not in g_data:
+            print(f"WARNING: Group {g_data['id']} has invalid offer_id {g_data['offer_id']}")
+
+    groups = [g_data for g_data in groups if 'offer' in g_data]
+    return group_members.members_for_groups(groups)
 
 @router.get("/{group_id}", response_model=GroupResponse)
 def get_group(group_id: str):
@@ -98,130 +120,85 @@ def get_group(group_id: str):
         
     g_data = doc.to_dict()
     g_data['id'] = group_id
+    g_data['members'] = group_members.read_members(doc.reference, g_data)
     
     # Fetch nested offer
-    if 'offer_id' in g_data:
-        o_snap = db.collection('offers').document(g_data['offer_id']).get()
-        if o_snap.exists:
-            o_data = o_snap.to_dict()
-            o_data['id'] = g_data['offer_id']
-            g_data['offer'] = o_data
+    hydrate_offers([g_data])
     
     return g_data
 
 @router.get("/me/list", response_model=list[GroupResponse])
-def get_my_groups(current_user: UserInDB = Depends(get_current_user)):
-    # Query groups where user is a member
-    # Firestore doesn't support array-contains-any easily on complex objects, 
-    # but we can query by 'members.user_id' if we index it, or just client side filter for MVP
-    # Ideally, we should have a top-level array "member_ids" for querying.
-    
-    # For now, let's fetch all (inefficient) or better, fix data model later.
-    # Actually, let's iterate.
-    docs = db.collection('groups').stream()
+def get_my_groups(
+    response: Response,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Groups the user is a member of, via the indexed `member_ids` array (groups
+    created before it existed need `python -m backend.migrations.backfill_member_ids`).
+    Paged: pass the X-Next-Cursor header back as ?cursor=.
+    """
+    query = db.collection('groups').where('member_ids', 'array_contains', current_user.id)
+    try:
+        # Document-ID order only, so no composite index is needed
+        docs, next_cursor = paginate(query, limit, cursor, order_field=None, descending=False)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
     my_groups = []
-    
     for doc in docs:
         data = doc.to_dict()
         data['id'] = doc.id
-        
-        # Check membership
-        is_member = any(m['user_id'] == current_user.id for m in data.get('members', []))
-        if is_member:
-            # Fetch offer
-            if 'offer_id' in data:
-                 o_snap = db.collection('offers').document(data['offer_id']).get()
-                 if o_snap.exists:
-                     o_data = o_snap.to_dict()
-                     o_data['id'] = data['offer_id']
-                     data['offer'] = o_data
-            my_groups.append(data)
-            
-    return my_groups
+        my_groups.append(data)
+
+    # Offers and members for all my groups in batched reads
+    hydrate_offers(my_groups)
+    return group_members.members_for_groups(my_groups)
 
 @router.post("/{group_id}/join", response_model=GroupResponse)
 def join_group(group_id: str, join_data: GroupJoin, current_user: UserInDB = Depends(get_current_user)):
-    transaction = db.transaction()
+    """
+    Joins without a transaction on the group document, so simultaneous joins
+    don't abort each other; see group_members.join.
+    """
     group_ref = db.collection('groups').document(group_id)
-    
-    # Pre-calculate expensive stuff outside transaction (Geocoding)
-    # Ideally we do this inside if we want to be sure, but it's an external API call which bad for txn lock time.
-    # We will do it outside.
+
+    if current_user.trust_score < 30.0:
+         raise HTTPException(status_code=403, detail="Trust score too low.")
+
+    # Geocode before touching the group (external API call)
     from backend.services.location_service import location_service
     lat, lon = location_service.geocode_address(join_data.address_details.model_dump())
 
-    @firestore.transactional
-    def join_in_transaction(transaction, group_ref):
-        snapshot = group_ref.get(transaction=transaction)
-        if not snapshot.exists:
-            raise HTTPException(status_code=404, detail="Group not found")
-            
-        group_data = snapshot.to_dict()
-        
-        # Validation checks
-        if group_data['status'] != GroupStatus.FORMING:
-             raise HTTPException(status_code=400, detail="Group is no longer accepting members")
-        
-        if group_data['current_size'] >= group_data['target_size']:
-             raise HTTPException(status_code=400, detail="Group is full")
-             
-        # Check membership
-        if any(m['user_id'] == current_user.id for m in group_data.get('members', [])):
-             raise HTTPException(status_code=400, detail="Already a member")
-
-        if current_user.trust_score < 30.0:
-             raise HTTPException(status_code=403, detail="Trust score too low.")
-
-        # Add Member
-        new_member = {
-            "user_id": current_user.id,
-            "full_name": current_user.full_name or "Unknown User", 
-            "status": "JOINED",
-            "trust_score": current_user.trust_score,
-            "joined_at": datetime.utcnow().isoformat(),
-            "address": join_data.address_details.model_dump(),
-            "coordinates": (lat, lon)
-        }
-        
-        updated_members = group_data.get('members', []) + [new_member]
-        updated_size = group_data['current_size'] + 1
-        
-        updates = {
-            "members": updated_members,
-            "current_size": updated_size
-        }
-        
-        # AI Logic: Check if Full
-        if updated_size >= group_data['target_size']:
-            best_receiver_id = location_service.select_optimal_host(updated_members)
-            updates['status'] = GroupStatus.LOCKED
-            updates['receiver_id'] = best_receiver_id
-            
-        transaction.update(group_ref, updates)
-        
-        # Update local dict for response
-        group_data.update(updates)
-        return group_data
+    new_member = {
+        "user_id": current_user.id,
+        "full_name": current_user.full_name or "Unknown User", 
+        "status": "JOINED",
+        "trust_score": current_user.trust_score,
+        "joined_at": datetime.utcnow().isoformat(),
+        "address": join_data.address_details.model_dump(),
+        "coordinates": (lat, lon)
+    }
 
     try:
-        updated_data = join_in_transaction(transaction, group_ref)
-        updated_data['id'] = group_id
-        
-        # Re-fetch offer
-        if 'offer_id' in updated_data:
-            o_snap = db.collection('offers').document(updated_data['offer_id']).get()
-            if o_snap.exists:
-                o_data = o_snap.to_dict()
-                o_data['id'] = updated_data['offer_id']
-                updated_data['offer'] = o_data
-                
-        return updated_data
-        
-    except HTTPException as he:
-        raise he
+        updated_data = group_members.join(group_ref, new_member)
+    except group_members.JoinRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Join failed: {str(e)}")
 
+    updated_data['id'] = group_id
+    updated_data['members'] = group_members.read_members(group_ref)
+    membership_cache.update(group_id, updated_data['members'])
+
+    # Re-fetch offer
+    hydrate_offers([updated_data])
+
+    return updated_data
+
 
 @router.post("/{group_id}/pay", response_model=GroupResponse)
 def pay_group_share(group_id: str, current_user: UserInDB = Depends(get_current_user)):
@@ -243,17 +220,13 @@ def pay_group_share(group_id: str, current_user: UserInDB = Depends(get_current_
         else:
              raise HTTPException(status_code=400, detail="Payment not allowed at this stage.")
 
-    # Find member index
-    member_idx = -1
-    for i, m in enumerate(g_data.get('members', [])):
-        if m['user_id'] == current_user.id:
-            member_idx = i
-            break
+    members = group_members.list_members(group_ref, g_data)
+    member = next((m for m in members if m['user_id'] == current_user.id), None)
             
-    if member_idx == -1:
+    if member is None:
          raise HTTPException(status_code=403, detail="Not a member")
          
-    if g_data['members'][member_idx].get('status') == 'PAID':
+    if member.get('status') == 'PAID':
          raise HTTPException(status_code=400, detail="Already paid")
 
     # Calculate Share
@@ -277,21 +250,22 @@ def pay_group_share(group_id: str, current_user: UserInDB = Depends(get_current_
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Payment Failed: {str(e)}")
         
-    # Update Member Status
-    g_data['members'][member_idx]['status'] = 'PAID'
+    # Update Member Status (own document only)
+    group_members.update_member(group_ref, current_user.id, {"status": "PAID"})
     
-    # Check if ALL Paid
-    all_paid = all(m.get('status') == 'PAID' for m in g_data['members'])
+    # Check if ALL Paid. Re-read after our write: of two concurrent last payers,
+    # at least one sees both payments.
+    members = group_members.read_members(group_ref)
+    all_paid = all(m.get('status') == 'PAID' for m in members)
     
-    updates = {"members": g_data['members']}
     if all_paid:
-        updates['status'] = GroupStatus.FUNDED
+        group_ref.update({"status": GroupStatus.FUNDED})
         g_data['status'] = GroupStatus.FUNDED
         
-    group_ref.update(updates)
+    membership_cache.update(group_id, members)
     
     # Return structure
-    g_data.update(updates)
+    g_data['members'] = members
     g_data['id'] = group_id
     
     # Refetch offer for response
@@ -319,6 +293,7 @@ def confirm_order(group_id: str, current_user: UserInDB = Depends(get_current_us
     group_ref.update(updates)
     g_data.update(updates)
     g_data['id'] = group_id
+    g_data['members'] = group_members.read_members(group_ref, g_data)
     return g_data
 
 @router.post("/{group_id}/confirm_arrival", response_model=GroupResponse)
@@ -336,24 +311,23 @@ def confirm_arrival(group_id: str, current_user: UserInDB = Depends(get_current_
         raise HTTPException(status_code=400, detail="Order not placed yet")
         
     # Generate OTPs for all members (except receiver if they are a member, though usually they are)
-    members = g_data.get('members', [])
-    updated_members = []
+    members = group_members.list_members(group_ref, g_data)
+    otp_updates = {}
     
     for m in members:
         if m['user_id'] != current_user.id:
             raw_otp = otp_service.generate_otp()
             m['distribution_otp_hash'] = otp_service.hash_otp(raw_otp)
+            otp_updates[m['user_id']] = {"distribution_otp_hash": m['distribution_otp_hash']}
             # In a real app, send raw_otp via SMS/Push to m['user_id']
             # For demo, we might need a way to see it. We'll store raw text in a debug field or just log it
             print(f"DEBUG: OTP for {m['user_id']} is {raw_otp}") 
-        updated_members.append(m)
         
-    updates = {
-        "status": GroupStatus.DELIVERED,
-        "members": updated_members
-    }
-    group_ref.update(updates)
+    updates = {"status": GroupStatus.DELIVERED}
+    group_members.update_members(group_ref, otp_updates, group_updates=updates)
+    membership_cache.update(group_id, members)
     g_data.update(updates)
+    g_data['members'] = members
     g_data['id'] = group_id
     return g_data
 
@@ -372,15 +346,11 @@ def verify_handoff(group_id: str, otp: str, member_id: str, current_user: UserIn
     if g_data['status'] != GroupStatus.DELIVERED:
         raise HTTPException(status_code=400, detail="Items not yet arrived")
         
-    member_idx = -1
-    for i, m in enumerate(g_data['members']):
-        if m['user_id'] == member_id:
-            member_idx = i
-            break
+    members = group_members.list_members(group_ref, g_data)
+    member = next((m for m in members if m['user_id'] == member_id), None)
             
-    if member_idx == -1: raise HTTPException(status_code=404, detail="Member not found")
+    if member is None: raise HTTPException(status_code=404, detail="Member not found")
     
-    member = g_data['members'][member_idx]
     if member.get('status') == 'DELIVERED_CONFIRMED':
         raise HTTPException(status_code=400, detail="Already delivered")
         
@@ -389,18 +359,20 @@ def verify_handoff(group_id: str, otp: str, member_id: str, current_user: UserIn
         raise HTTPException(status_code=400, detail="Invalid OTP")
         
     # Update Status
-    g_data['members'][member_idx]['status'] = 'DELIVERED_CONFIRMED'
+    group_members.update_member(group_ref, member_id, {"status": "DELIVERED_CONFIRMED"})
     
-    # Check if ALL (except receiver) are confirmed
+    # Check if ALL (except receiver) are confirmed. Re-read after our write: of two
+    # concurrent last confirmations, at least one sees both.
     # Receiver is also a member usually, but they don't need OTP verification with themselves.
-    others = [m for m in g_data['members'] if m['user_id'] != current_user.id]
+    members = group_members.read_members(group_ref)
+    others = [m for m in members if m['user_id'] != current_user.id]
     all_confirmed = all(m.get('status') == 'DELIVERED_CONFIRMED' for m in others)
     
-    updates = {"members": g_data['members']}
+    updates = {}
     
-    if all_confirmed:
+    # Only the caller whose guarded DELIVERED -> COMPLETED update lands releases escrow
+    if all_confirmed and group_members.complete_if_delivered(group_ref):
         updates['status'] = GroupStatus.COMPLETED
-        g_data['status'] = GroupStatus.COMPLETED
         
         # RELEASE ESCROW
         # Calculate amount per person
@@ -416,7 +388,7 @@ def verify_handoff(group_id: str, otp: str, member_id: str, current_user: UserIn
         # Usually Receiver pays themselves? Or just unlocks.
         # "Escrow release" -> Sender to Receiver. 
         # For Receiver, it's just Unlock.
-        for m in g_data['members']:
+        for m in members:
             if m['user_id'] != current_user.id:
                  wallet_service.release_escrow(m['user_id'], current_user.id, share)
             else:
@@ -424,8 +396,9 @@ def verify_handoff(group_id: str, otp: str, member_id: str, current_user: UserIn
                  # wallet_service.unlock(m['user_id'], share) -> Needed helper
                  pass 
                  
-    group_ref.update(updates)
+    membership_cache.update(group_id, members)
     g_data.update(updates)
+    g_data['members'] = members
     g_data['id'] = group_id
     return g_data
 
@@ -433,15 +406,11 @@ def verify_handoff(group_id: str, otp: str, member_id: str, current_user: UserIn
 def send_chat_message(group_id: str, message: ChatMessageCreate, current_user: UserInDB = Depends(get_current_user)):
     
     group_ref = db.collection('groups').document(group_id)
-    doc = group_ref.get()
-    
-    if not doc.exists:
+
+    # Check membership (cached; no group read on the hot path)
+    is_member = membership_cache.is_member(group_id, current_user.id)
+    if is_member is None:
         raise HTTPException(status_code=404, detail="Group not found")
-        
-    g_data = doc.to_dict()
-    
-    # Check membership
-    is_member = any(m['user_id'] == current_user.id for m in g_data.get('members', []))
     if not is_member:
         raise HTTPException(status_code=403, detail="Not a member of this group")
 
@@ -453,48 +422,172 @@ def send_chat_message(group_id: str, message: ChatMessageCreate, current_user: U
         "createdAt": firestore.SERVER_TIMESTAMP
     }
     
-    group_ref.collection('messages').add(msg_data)
-    
-    # Retroactive Fix: Update member name in group list if missing/unknown
-    need_update = False
-    updated_members = []
-    
-    for m in g_data.get('members', []):
-        if m['user_id'] == current_user.id:
-            # If name is missing or is explicitly "Unknown User", update it
-            if (not m.get('full_name') or m.get('full_name') == "Unknown User") and current_user.full_name:
+    _, msg_ref = group_ref.collection('messages').add(msg_data)
+
+    # Push to this worker's open streams now; other workers get it from their listener
+    chat_hub.publish_threadsafe(group_id, {
+        **msg_data,
+        "id": msg_ref.id,
+        "createdAt": datetime.now(timezone.utc),
+    })
+    
+    # Retroactive Fix: Update member name in group list if missing/unknown.
+    # The cached name decides, so the group is only read when a fix is due.
+    cached_name = membership_cache.member_name(group_id, current_user.id)
+    if (not cached_name or cached_name == "Unknown User") and current_user.full_name:
+        g_data = group_ref.get().to_dict()
+        updated_members = group_members.list_members(group_ref, g_data)
+        for m in updated_members:
+            if m['user_id'] == current_user.id:
                 m['full_name'] = current_user.full_name
-                need_update = True
-        updated_members.append(m)
-        
-    if need_update:
         print(f"DEBUG: Backfilling name for user {current_user.id} in group {group_id}")
-        group_ref.update({"members": updated_members})
+        group_members.update_member(group_ref, current_user.id, {"full_name": current_user.full_name})
+        membership_cache.update(group_id, updated_members)
 
     return {"status": "sent"}
 
-@router.get("/{group_id}/chat")
-def get_chat_messages(group_id: str, limit: int = 50, current_user: UserInDB = Depends(get_current_user)):
-    group_ref = db.collection('groups').document(group_id)
-    doc = group_ref.get()
-    
-    if not doc.exists:
-         raise HTTPException(status_code=404, detail="Group not found")
-         
-    # Check membership
-    g_data = doc.to_dict()
-    is_member = any(m['user_id'] == current_user.id for m in g_data.get('members', []))
-    if not is_member:
-         raise HTTPException(status_code=403, detail="Not a member")
-         
-    # Query Messages
-    msgs = group_ref.collection('messages').order_by('createdAt', direction=firestore.Query.ASCENDING).limit(limit).stream()
-    
+# Largest page of chat messages a single request returns
+CHAT_PAGE_LIMIT = 200
+
+def _message_cursor(group_ref, message_id: str) -> Optional[str]:
+    """
+    Pagination cursor positioned at a message (its createdAt + ID), or None if
+    the message doesn't exist.
+    """
+    snap = group_ref.collection('messages').document(message_id).get()
+    if not snap.exists or not snap.get('createdAt'):
+        return None
+    return encode_cursor([snap.get('createdAt'), message_id])
+
+def _message_dicts(docs):
     results = []
-    for m in msgs:
+    for m in docs:
         d = m.to_dict()
         d['id'] = m.id
         # Convert timestamp to string if needed, or let Pydantic/FastAPI handle json encoding of datetime
         results.append(d)
-        
     return results
+
+@router.get("/{group_id}/chat")
+def get_chat_messages(
+    group_id: str,
+    response: Response,
+    limit: int = 50,
+    after: Optional[str] = None,
+    since: Optional[datetime] = None,
+    before: Optional[str] = None,
+    cursor: Optional[str] = None,
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Chat messages, always returned oldest first.
+    - no parameters: the latest `limit` messages
+    - after=<message id> or since=<ISO timestamp>: only messages newer than that
+      (incremental poll; pass the last ID you have)
+    - before=<message id>: the page of history just older than that message
+      (pass the first ID you have to scroll back)
+    - cursor: continues a forward page from the X-Next-Cursor header
+    Every mode is one range query on (createdAt, id), so a poll transfers only
+    the messages it returns.
+    """
+    group_ref = db.collection('groups').document(group_id)
+
+    # Check membership (cached; no group read on the hot path)
+    is_member = membership_cache.is_member(group_id, current_user.id)
+    if is_member is None:
+         raise HTTPException(status_code=404, detail="Group not found")
+    if not is_member:
+         raise HTTPException(status_code=403, detail="Not a member")
+
+    messages = group_ref.collection('messages')
+    anchor_id = before or after
+    if anchor_id:
+        anchor = _message_cursor(group_ref, anchor_id)
+        if anchor is None:
+            raise HTTPException(status_code=404, detail="Message not found")
+
+    try:
+        if before:
+            # Newest-first from the anchor, flipped back to chronological order
+            msgs, _ = paginate(messages, limit, anchor, order_field='createdAt',
+                               descending=True, max_limit=CHAT_PAGE_LIMIT)
+            msgs.reverse()
+        elif after or since or cursor:
+            query = messages.where('createdAt', '>', since) if since else messages
+            msgs, next_cursor = paginate(query, limit, anchor if after else cursor, order_field='createdAt',
+                                         descending=False, max_limit=CHAT_PAGE_LIMIT)
+            if next_cursor:
+                response.headers[NEXT_CURSOR_HEADER] = next_cursor
+        else:
+            msgs, _ = paginate(messages, limit, None, order_field='createdAt',
+                               descending=True, max_limit=CHAT_PAGE_LIMIT)
+            msgs.reverse()
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return _message_dicts(msgs)
+
+def _messages_after(group_ref, last_id: str):
+    cursor = _message_cursor(group_ref, last_id)
+    if cursor is None:
+        return []
+    docs, _ = paginate(group_ref.collection('messages'), CHAT_PAGE_LIMIT, cursor,
+                       order_field='createdAt', descending=False, max_limit=CHAT_PAGE_LIMIT)
+    return _message_dicts(docs)
+
+@router.get("/{group_id}/chat/stream")
+async def stream_chat_messages(
+    group_id: str,
+    after: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    current_user: UserInDB = Depends(get_current_user_for_stream)
+):
+    """
+    Server-Sent Events push channel for a group's chat (replaces polling GET /chat).
+    Membership is checked once at connect. Each event's `id` is the message ID; on
+    reconnect the browser sends it back as Last-Event-ID (or pass ?after=<id>) and
+    missed messages are replayed before live ones. EventSource clients can pass
+    the token as ?access_token=.
+    """
+    group_ref = db.collection('groups').document(group_id)
+    is_member = await run_in_threadpool(membership_cache.is_member, group_id, current_user.id)
+    if is_member is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    if not is_member:
+        raise HTTPException(status_code=403, detail="Not a member")
+
+    resume_id = last_event_id or after
+
+    async def events():
+        # Subscribe before reading the backlog so nothing posted in between is lost
+        sub = chat_hub.subscribe(group_id)
+        try:
+            yield "retry: 3000\n\n"
+            backlog = []
+            if resume_id:
+                backlog = chat_hub.replay_after(group_id, resume_id)
+                if backlog is None:
+                    backlog = await run_in_threadpool(_messages_after, group_ref, resume_id)
+            replayed = set()
+            for message in backlog:
+                replayed.add(message['id'])
+                yield sse_event(message)
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), settings.CHAT_STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is OVERFLOW:
+                    break # Too far behind: client reconnects and resumes from its last ID
+                if message['id'] in replayed:
+                    continue
+                yield sse_event(message)
+        finally:
+            chat_hub.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
@@ -1,30 +1,221 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from backend.firebase_setup import db
 from backend.auth import get_current_user, UserInDB
-from backend.schemas import OfferCreate, OfferResponse
+from backend.config import settings
+from backend.schemas import OfferCreate, OfferResponse, OfferVerificationResult
 from backend.enums import OfferStatus
-from backend.services.ai_core import ai_service, to_matcher
+from backend.services.ai_core import ai_service, to_matcher, models
+from backend.services.ann_index import offer_index
+from backend.services.offer_groups import group_ids_for_offers, propagate_offer_summary
+from backend.services.ocr_pool import ocr_pool, OCRPoolSaturated
+from backend.services.singleflight import match_flight
+from backend.services.ingestion import ingestion_queue, job_store, IngestQueueFull
+from backend.services.pagination import paginate, InvalidCursor, NEXT_CURSOR_HEADER
 from firebase_admin import firestore
 from datetime import datetime
+from typing import Optional
+import asyncio
+import copy
+import os
+import tempfile
+import time
 import uuid
 
 router = APIRouter()
 
+# Public listing: offers still PROCESSING are unverified and not shown
+LISTED_STATUSES = [s.value for s in OfferStatus if s != OfferStatus.PROCESSING]
+
+
+class OfferRejected(HTTPException):
+    """
+    The offer failed validation. Unlike any other error while storing it, this
+    is final: a background job rejects the offer instead of leaving it for review.
+    """
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=400, detail=detail)
+
+
 @router.post("/", response_model=OfferResponse)
-def create_offer(
+async def create_offer(
     offer: OfferCreate, 
+    background: bool = False,
     current_user: UserInDB = Depends(get_current_user)
 ):
+    """
+    With ?background=true the offer is stored as PROCESSING and the response is a
+    202 with a job ID; verification and matching then run on the ingest queue and
+    progress is polled at GET /offers/jobs/{job_id}.
+    """
+    if background:
+        return await _enqueue_offer(offer, current_user)
+
+    # Verify Offer. Scraping is async, so no worker thread is pinned while the page downloads.
+    from backend.services.verification import verification_service
+    try:
+        verification_result = await verification_service.verify_offer_url(offer.product_url, offer.price)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+    # Matching and Firestore calls are blocking, so they run in the threadpool
+    return await run_in_threadpool(_store_offer, offer, verification_result, current_user)
+
+async def _enqueue_offer(offer: OfferCreate, current_user: UserInDB):
+    if not ingestion_queue.has_capacity():
+        raise HTTPException(status_code=503, detail="Offer queue is full, try again shortly", headers={"Retry-After": "5"})
+
+    offer_ref = db.collection('offers').document()
+    job_id = uuid.uuid4().hex
+    provisional = {
+        "id": offer_ref.id,
+        "posted_by_id": current_user.id,
+        "product_url": offer.product_url,
+        "product_id": to_matcher.extract_product_id(offer.product_url) if offer.product_url else None,
+        # Placeholders until verification fills them in: stored offers always have both
+        "title": offer.title or "",
+        "price": offer.price if offer.price is not None else 0.0,
+        "location": offer.location or "Unknown",
+        "status": OfferStatus.PROCESSING,
+        "verification_score": 0.0,
+        "warnings": [],
+        "ingest_job_id": job_id,
+        "processing_since": time.time(),
+        "created_at": datetime.utcnow()
+    }
+    payload = {
+        "job_id": job_id,
+        "offer_id": offer_ref.id,
+        "offer": offer.model_dump(mode="json"),
+        "user": current_user.model_dump(mode="json"),
+    }
+
+    def write():
+        batch = db.batch()
+        batch.set(offer_ref, provisional)
+        # The payload rides along so a sweep can resubmit the job if this worker dies
+        job_store.create(job_id, {"offer_id": offer_ref.id, "posted_by_id": current_user.id, "payload": payload},
+                         batch=batch)
+        batch.commit()
+
+    def discard():
+        offer_ref.delete()
+        db.collection(job_store.collection).document(job_id).delete()
+
+    await run_in_threadpool(write)
+    try:
+        await ingestion_queue.submit(payload)
+    except IngestQueueFull:
+        await run_in_threadpool(discard)
+        raise HTTPException(status_code=503, detail="Offer queue is full, try again shortly", headers={"Retry-After": "5"})
+
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job_id, "offer_id": offer_ref.id, "state": "queued"},
+        headers={"Location": f"/offers/jobs/{job_id}"},
+    )
+
+async def _run_ingest_job(payload: dict):
+    """
+    Ingest queue handler: the same verification and matching as the synchronous
+    path, writing over the provisional offer and recording progress on the job.
+    """
+    from backend.services.verification import verification_service
+    job_id, offer_id = payload["job_id"], payload["offer_id"]
+    offer = OfferCreate(**payload["offer"])
+    current_user = UserInDB(**payload["user"])
+
+    try:
+        await run_in_threadpool(job_store.update, job_id, "verifying")
+        verification_result = await verification_service.verify_offer_url(offer.product_url, offer.price)
+        await run_in_threadpool(job_store.update, job_id, "matching", verification_score=verification_result.confidence_score)
+        offer_data = await run_in_threadpool(_store_offer, offer, verification_result, current_user, offer_id)
+    except OfferRejected as rejected:
+        # Failed verification: the provisional offer is rejected, not left dangling
+        await run_in_threadpool(_finish_offer, offer_id, OfferStatus.REJECTED, rejected.detail)
+        await run_in_threadpool(job_store.update, job_id, "failed", error=rejected.detail, offer_status=OfferStatus.REJECTED.value)
+        return
+    except Exception as e:
+        # Anything else (scrape or Firestore trouble) says nothing about the offer: it goes to manual review
+        error = str(getattr(e, "detail", e))
+        await run_in_threadpool(_finish_offer, offer_id, OfferStatus.PENDING, f"Background processing failed: {error}")
+        await run_in_threadpool(job_store.update, job_id, "failed", error=error, offer_status=OfferStatus.PENDING.value)
+        raise
+
+    await run_in_threadpool(
+        job_store.update, job_id, "done",
+        offer_status=OfferStatus(offer_data["status"]).value,
+        duplicate_of=offer_data.get("duplicate_of"),
+        similar_count=len(offer_data.get("similar_offers") or []),
+    )
+
+ingestion_queue.set_handler(_run_ingest_job)
+
+async def reclaim_stalled_offers():
+    """
+    Startup sweep for offers left PROCESSING by a worker that exited with their
+    job still queued or running: resubmits each one that has been processing for
+    longer than INGEST_RECLAIM_AFTER_SECONDS. Offers without a stored payload go
+    to manual review (PENDING) instead. Returns how many were resubmitted.
+    """
+    cutoff = time.time() - settings.INGEST_RECLAIM_AFTER_SECONDS
+
+    def stalled():
+        docs = db.collection('offers').where('status', '==', OfferStatus.PROCESSING).stream()
+        return [doc.to_dict() for doc in docs if (doc.to_dict().get('processing_since') or 0) < cutoff]
+
+    resubmitted = 0
+    for offer_data in await run_in_threadpool(stalled):
+        if not ingestion_queue.has_capacity():
+            print("Warning: Ingest queue full, leaving the remaining stalled offers for the next sweep")
+            break
+        job_id = offer_data.get('ingest_job_id')
+        job = None
+        if job_id:
+            job = await run_in_threadpool(job_store.claim, job_id, cutoff)
+            if job is None:
+                continue  # still progressing, or another worker took it
+        payload = (job or {}).get("payload")
+        if payload is None:
+            await run_in_threadpool(_finish_offer, offer_data['id'], OfferStatus.PENDING, "Background processing was interrupted")
+            continue
+        await run_in_threadpool(db.collection('offers').document(offer_data['id']).update, {"processing_since": time.time()})
+        try:
+            await ingestion_queue.submit(payload)
+        except IngestQueueFull:
+            break
+        resubmitted += 1
+    if resubmitted:
+        print(f"Resubmitted {resubmitted} stalled offer ingest jobs")
+    return resubmitted
+
+def _finish_offer(offer_id: str, status: OfferStatus, warning: str):
+    db.collection('offers').document(offer_id).update({
+        "status": status,
+        "warnings": firestore.ArrayUnion([warning]),
+    })
+    propagate_offer_summary(offer_id)
+
+@router.get("/jobs/{job_id}")
+def get_offer_job(job_id: str, current_user: UserInDB = Depends(get_current_user)):
+    """
+    Progress of a background offer: queued -> verifying -> matching -> done | failed.
+    """
+    job = job_store.get(job_id)
+    if not job or job.get("posted_by_id") != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("payload", None)
+    return job
+
+def _store_offer(offer: OfferCreate, verification_result: OfferVerificationResult, current_user: UserInDB, offer_id: str = None):
     try:
-        # Verify Offer
-        from backend.services.verification import verification_service
-        
-        verification_result = verification_service.verify_offer_url(offer.product_url, offer.price)
-        
         if not verification_result.is_valid:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Offer verification failed (Score: {verification_result.confidence_score}). Warning: {verification_result.warnings}"
+            raise OfferRejected(
+                f"Offer verification failed (Score: {verification_result.confidence_score}). Warning: {verification_result.warnings}"
             )
             
         # Status Logic
@@ -34,20 +225,21 @@ def create_offer(
         # Removed explicit rejection for < 60.0 because 'is_valid' check above already handles rejection.
         # This allows "Manual Review" items (Score 10.0) to pass as PENDING.
 
+        product_id = to_matcher.extract_product_id(offer.product_url) if offer.product_url else None
+
         # DUPLICATE & SIMILARITY CHECK (AI Feature)
         duplicate_info = {"match_id": None, "reason": None}
         similar_list = []
         
         try:
-            # Fetch active offers
-            active_docs = db.collection('offers').where("status", "in", [OfferStatus.APPROVED.value, OfferStatus.PENDING.value]).limit(50).stream()
-            active_offers = []
-            for d in active_docs:
-                ad = d.to_dict()
-                ad['id'] = d.id
-                active_offers.append(ad)
-                
-            match_result = to_matcher.find_matches(offer, active_offers)
+            # Exact and semantic matching search the offer index over the whole catalog
+            offer_index.ensure_loaded()
+            # Concurrent posts of the same product share one duplicate check
+            match_key = product_id or (f"title:{offer.title.lower().strip()}" if offer.title else None)
+            if match_key:
+                match_result = copy.deepcopy(match_flight.do(match_key, lambda: to_matcher.find_matches(offer)))
+            else:
+                match_result = to_matcher.find_matches(offer)
             
             # 1. Exact Duplicate
             if match_result['duplicate']:
@@ -60,33 +252,37 @@ def create_offer(
             if similar_list:
                 print(f"Found {len(similar_list)} similar offers.")
                 
-            # Enrich with Group IDs
-            # Helper to find group
-            def get_group_id(oid):
-                gs = db.collection('groups').where('offer_id', '==', oid).limit(1).stream()
-                for g in gs: return g.id
-                return None
+            # Enrich with Group IDs: one batched lookup for the duplicate and all similar offers
+            group_ids = group_ids_for_offers([duplicate_info['match_id']] + [sim['id'] for sim in similar_list])
 
-            match_group_id = None
-            if duplicate_info['match_id']:
-                match_group_id = get_group_id(duplicate_info['match_id'])
-            
+            match_group_id = group_ids.get(duplicate_info['match_id'])
             for sim in similar_list:
-                sim['group_id'] = get_group_id(sim['id'])
+                sim['group_id'] = group_ids.get(sim['id'])
 
         except Exception as e:
             print(f"Warning: Duplicate check failed {e}") 
             match_group_id = None
 
-        # Create new document ref
-        new_offer_ref = db.collection('offers').document()
+        # Create new document ref (background jobs overwrite their provisional offer)
+        new_offer_ref = db.collection('offers').document(offer_id) if offer_id else db.collection('offers').document()
+        title = verification_result.detected_title or offer.title or "" # Prefer detected title
+        price = offer.price if offer.price is not None else (verification_result.detected_price or 0.0)
+
+        # Store the title vector so later matches never re-embed this offer
+        title_embedding = None
+        if title and models.embedding_ready:
+            try:
+                title_embedding = ai_service.embed_titles([title])[0].tolist()
+            except Exception as e:
+                print(f"Warning: Title embedding failed {e}")
         
         offer_data = {
             "id": new_offer_ref.id,
             "posted_by_id": current_user.id,
             "product_url": offer.product_url,
-            "title": verification_result.detected_title or offer.title, # Prefer detected title
-            "price": offer.price,
+            "product_id": product_id,
+            "title": title,
+            "price": price,
             "location": offer.location or "Unknown",
             "status": status,
             "verification_score": verification_result.confidence_score,
@@ -95,10 +291,15 @@ def create_offer(
             "matched_group_id": match_group_id,
             "matching_reason": duplicate_info.get("reason"),
             "similar_offers": similar_list,
+            "title_embedding": title_embedding,
             "created_at": datetime.utcnow()
         }
         
         new_offer_ref.set(offer_data)
+        offer_index.upsert(offer_data)
+        if offer_id:
+            # Overwrote a provisional offer, which may already have groups
+            propagate_offer_summary(offer_id, offer_data)
         
         return offer_data
 
@@ -109,9 +310,64 @@ def create_offer(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router.post("/screenshot", response_model=OfferVerificationResult)
+async def verify_screenshot(
+    file: UploadFile = File(...),
+    current_user: UserInDB = Depends(get_current_user)
+):
+    """
+    Reads a product screenshot with OCR and returns what was detected, so the
+    client can confirm title/price before posting the offer.
+    """
+    if not (file.content_type or "").startswith("image/"):
+        raise HTTPException(status_code=415, detail="Screenshot must be an image")
+
+    # Oversized bodies are refused before upload by BodySizeLimitMiddleware (main.py);
+    # this cap covers the file part itself. Disk writes stay off the event loop.
+    # The OCR pool deletes the file.
+    size = 0
+    spool = await run_in_threadpool(tempfile.NamedTemporaryFile, delete=False, suffix=".img")
+    path = spool.name
+    try:
+        while chunk := await file.read(64 * 1024):
+            size += len(chunk)
+            if size > settings.SCREENSHOT_MAX_BYTES:
+                break
+            await run_in_threadpool(spool.write, chunk)
+    finally:
+        await run_in_threadpool(spool.close)
+
+    if size > settings.SCREENSHOT_MAX_BYTES:
+        os.remove(path)
+        raise HTTPException(status_code=413, detail="Screenshot too large")
+
+    try:
+        future = ocr_pool.submit(path)
+    except OCRPoolSaturated:
+        raise HTTPException(status_code=429, detail="OCR is busy, try again shortly", headers={"Retry-After": "2"})
+
+    try:
+        text = await asyncio.wait_for(asyncio.wrap_future(future), timeout=60)
+    except Exception as e:
+        print(f"Warning: Screenshot OCR failed {e}")
+        text = ""
+
+    return ai_service.verify_screenshot_text(text)
+
 @router.get("/", response_model=list[OfferResponse])
-def get_offers(limit: int = 20):
-    docs = db.collection('offers').limit(limit).stream()
+def get_offers(response: Response, limit: int = 20, cursor: Optional[str] = None):
+    """
+    Newest first, without offers still being verified in the background.
+    Paged: pass the X-Next-Cursor header back as ?cursor=.
+    Needs the offers (status, created_at, __name__) index in firestore.indexes.json.
+    """
+    query = db.collection('offers').where('status', 'in', LISTED_STATUSES)
+    try:
+        docs, next_cursor = paginate(query, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     offers = []
     for doc in docs:
         data = doc.to_dict()
@@ -1,31 +1,103 @@
+import asyncio
 import logging
 import re
+import tempfile
+import threading
+import time
 from typing import List, Dict
-from sentence_transformers import SentenceTransformer, util
-import easyocr
 import numpy as np
-from PIL import Image
-import io
-import requests
-from bs4 import BeautifulSoup
 from backend.schemas import OfferVerificationResult
+from backend.config import settings
+from backend.services.embedding_cache import embedding_cache
+from backend.services.ann_index import offer_index
+from backend.services.embedding_batcher import EmbeddingBatcher
+from backend.services.extraction import extraction_engine
+from backend.services.lexical_index import LexicalIndex
+from backend.services.ocr_pool import ocr_pool
 
 logger = logging.getLogger(__name__)
 
-# Initialize Global Models (Lazy loading recommended in production, but loading here for "Real" feel)
-print("Loading AI Models... This might take a moment.")
-try:
-    # Lightweight BERT model for sentence embeddings
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2') 
-    # NOTE for User: 'all-MiniLM-L6-v2' is the best trade-off for speed/accuracy. 
-    # If higher accuracy is needed at cost of speed, switch to 'all-mpnet-base-v2'.
-    
-    # OCR Reader
-    ocr_reader = easyocr.Reader(['en']) # GPU=False if needed by environment
-    MODELS_LOADED = True
-except Exception as e:
-    print(f"Failed to load AI models: {e}")
-    MODELS_LOADED = False
+# Only the best-scoring candidates go through the (regex-heavy) guardrail checks
+MATCH_TOP_K = 20
+
+
+class ModelRegistry:
+    """
+    Loads the AI models off the import path.
+    sentence_transformers is only imported inside load(), so workers that never
+    touch matching don't pay for it. Until a model is ready, callers get None and
+    fall back to their degraded path. (OCR runs in its own process pool, see
+    ocr_pool.py.)
+    """
+
+    def __init__(self):
+        self.embedding_model = None
+        self.state = {"embedding": "not_loaded"}
+        self.errors: Dict[str, str] = {}
+        self.load_seconds: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def embedding_ready(self) -> bool:
+        return self.state["embedding"] == "ready"
+
+    def start_background_load(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.load, name="ai-model-loader", daemon=True)
+            self._thread.start()
+
+    def load(self):
+        self._load("embedding", self._load_embedding)
+
+    def get_embedding_model(self):
+        if not self.embedding_ready:
+            self.start_background_load()
+        return self.embedding_model
+
+    def status(self) -> Dict:
+        return {"state": dict(self.state), "errors": dict(self.errors), "load_seconds": dict(self.load_seconds)}
+
+    def _load(self, name: str, loader):
+        self.state[name] = "loading"
+        start = time.perf_counter()
+        try:
+            loader()
+            self.state[name] = "ready"
+            logger.info(f"AI model '{name}' loaded in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            self.state[name] = "failed"
+            self.errors[name] = str(e)
+            logger.error(f"Failed to load AI model '{name}': {e}")
+        self.load_seconds[name] = round(time.perf_counter() - start, 2)
+
+    def _load_embedding(self):
+        from sentence_transformers import SentenceTransformer
+        # Lightweight BERT model for sentence embeddings
+        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        # NOTE for User: 'all-MiniLM-L6-v2' is the best trade-off for speed/accuracy. 
+        # If higher accuracy is needed at cost of speed, switch to 'all-mpnet-base-v2'.
+
+
+models = ModelRegistry()
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    model = models.get_embedding_model()
+    if model is None:
+        raise RuntimeError("Embedding model not loaded yet")
+    return model.encode(texts, batch_size=64, normalize_embeddings=True)
+
+
+# Concurrent requests share one model call instead of contending inside torch
+embedding_batcher = EmbeddingBatcher(
+    _encode_batch,
+    max_batch=settings.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+    encode_timeout=settings.EMBEDDING_ENCODE_TIMEOUT_SECONDS,
+)
 
 class AIService:
     
@@ -34,35 +106,100 @@ class AIService:
         Calculates semantic similarity between two product titles using BERT embeddings.
         Returns score between 0.0 and 1.0
         """
-        if not MODELS_LOADED:
+        if not models.embedding_ready:
             return 0.5 # Fallback
             
-        embedding1 = embedding_model.encode(text1, convert_to_tensor=True)
-        embedding2 = embedding_model.encode(text2, convert_to_tensor=True)
-        
-        score = util.pytorch_cos_sim(embedding1, embedding2).item()
-        return float(score)
+        embedding1, embedding2 = self.embed_titles([text1, text2])
+        return float(embedding1 @ embedding2)
+
+    def calculate_similarities(self, text: str, candidates: List[str]) -> List[float]:
+        """
+        Batched version of calculate_similarity.
+        Embeds `text` and all candidates in one pass (through the embedding cache),
+        then scores them with one matrix cosine operation. Scores follow candidate order.
+        """
+        if not candidates:
+            return []
+        if not models.embedding_ready:
+            return [0.5] * len(candidates) # Fallback
+
+        vectors = self.embed_titles([text] + candidates)
+        return self.cosine_scores(vectors[0], vectors[1:])
+
+    def embed_titles(self, titles: List[str]) -> np.ndarray:
+        """
+        Returns unit-normalized embeddings (one row per title).
+        Cached titles are served from the embedding cache; only misses hit the model.
+        """
+        vectors = embedding_cache.get_many(titles)
+        missing = [t for t in dict.fromkeys(titles) if t not in vectors]
+        if missing:
+            encoded = embedding_batcher.encode(missing)
+            embedding_cache.put_many(zip(missing, encoded))
+            vectors.update(zip(missing, encoded))
+
+        return np.vstack([vectors[t] for t in titles]).astype(np.float32)
+
+    def embed_offers(self, offers: List[Dict]) -> np.ndarray:
+        """
+        Embeddings for offer documents. Reuses the vector stored on the offer
+        at creation time and only embeds offers that predate it.
+        """
+        rows = [None] * len(offers)
+        missing = []
+        for i, offer in enumerate(offers):
+            stored = offer.get('title_embedding')
+            if stored is not None and len(stored):
+                rows[i] = np.asarray(stored, dtype=np.float32)
+            else:
+                missing.append(i)
+
+        if missing:
+            embedded = self.embed_titles([offers[i]['title'] for i in missing])
+            for i, vector in zip(missing, embedded):
+                rows[i] = vector
+
+        return np.vstack(rows)
+
+    def cosine_scores(self, query: np.ndarray, matrix: np.ndarray) -> List[float]:
+        # Rows are unit-normalized, so the dot product is the cosine similarity
+        return [float(s) for s in matrix @ query]
 
     def extract_text_from_image(self, image_bytes: bytes) -> str:
         """
-        Uses EasyOCR to extract text from screenshot.
+        Uses EasyOCR (in the OCR worker pool) to extract text from screenshot.
         """
-        if not MODELS_LOADED:
-            return ""
-            
         try:
-            image = Image.open(io.BytesIO(image_bytes))
-            # Convert to numpy for EasyOCR
-            image_np = np.array(image)
-            
-            result = ocr_reader.readtext(image_np)
-            text = " ".join([res[1] for res in result])
-            return text
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".img") as f:
+                f.write(image_bytes)
+            return ocr_pool.submit(f.name).result(timeout=60)
         except Exception as e:
             logger.error(f"OCR Error: {e}")
             return ""
 
-    def verify_offer_intelligence(self, url: str = None, image_bytes: bytes = None) -> OfferVerificationResult:
+    def verify_screenshot_text(self, text: str) -> OfferVerificationResult:
+        """
+        Scores OCR text from a product screenshot (platform, price, enough text).
+        """
+        detected_platform = "Unknown"
+        if "amazon" in text.lower(): detected_platform = "Amazon"
+        elif "flipkart" in text.lower(): detected_platform = "Flipkart"
+
+        detected_price = self._find_price_in_text(text)
+        confidence = 0.0
+        confidence += 40 if len(text) > 20 else 0
+        confidence += 30 if detected_price > 0 else 0
+
+        return OfferVerificationResult(
+            is_valid=confidence > 40,
+            confidence_score=confidence,
+            detected_platform=detected_platform,
+            detected_title=text[:50] + "..." if text else None,
+            detected_price=detected_price,
+            warnings=[] if text else ["No text found in screenshot"]
+        )
+
+    async def verify_offer_intelligence(self, url: str = None, image_bytes: bytes = None) -> OfferVerificationResult:
         """
         Real AI Pipeline:
         1. Source verification
@@ -86,21 +223,28 @@ class AIService:
                 
             # Scrape
             try:
-                headers = {"User-Agent": "Mozilla/5.0 ..."}
-                resp = requests.get(url, headers=headers, timeout=5)
+                # Shared async client: pooled connections, per-domain limits, one deadline
+                from backend.services.verification import verification_service
+                resp = await verification_service.client.fetch(url)
                 if resp.status_code == 200:
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    detected_title = soup.title.string[:100] if soup.title else ""
-                    # Naive price finding for demo purpose
-                    text_blob = soup.get_text().lower()
-                    detected_price = self._find_price_in_text(text_blob)
+                    # Targeted extraction instead of a full tree + get_text()
+                    fields = extraction_engine.extract(domain.lower(), resp.content, resp.charset_encoding)
+                    detected_title = (fields.get("title") or "")[:100]
+                    if fields.get("price"):
+                        detected_price = self._find_price_in_text(f"₹{fields['price']}")
+                    else:
+                        # Naive price finding over what the page shows, not its scripts and markup
+                        page_text = await asyncio.to_thread(
+                            extraction_engine.visible_text, resp.content, resp.charset_encoding)
+                        detected_price = self._find_price_in_text(page_text)
                     confidence += 30 if detected_price > 0 else 0
             except:
                 warnings.append("Scraping failed")
 
         # 2. Image Path
         if image_bytes:
-            text = self.extract_text_from_image(image_bytes)
+            # Blocks on the OCR pool; keep it off the event loop
+            text = await asyncio.to_thread(self.extract_text_from_image, image_bytes)
             detected_title = text[:50] + "..."
             detected_price = self._find_price_in_text(text)
             
@@ -157,6 +301,31 @@ class ProductMatcher:
             
         return tokens
 
+    def lexical_tokens(self, text: str) -> set:
+        """
+        Tokens for the lexical prefilter: plain words plus critical tokens, so
+        "1 kg" and "1kg" still share a token.
+        """
+        return set(re.findall(r'[a-z0-9]+', text.lower())) | self._extract_critical_tokens(text)
+
+    def shortlist(self, title: str, query_vector: np.ndarray, active_offers: List[Dict]) -> List[Dict]:
+        """
+        Stage one of matching: picks the candidates that get semantic scoring.
+        Configured by MATCHER_PREFILTER ("ann", "lexical", "hybrid", "none").
+        """
+        stage = settings.MATCHER_PREFILTER
+        k = settings.MATCHER_SHORTLIST_SIZE
+        if offer_index.loaded:
+            return offer_index.shortlist(title, query_vector, k, stage)
+
+        candidates = [offer for offer in active_offers if offer.get('title')]
+        if stage in ("lexical", "hybrid") and len(candidates) > k:
+            lexical = LexicalIndex(self.lexical_tokens)
+            for i, offer in enumerate(candidates):
+                lexical.add(i, offer['title'])
+            candidates = [candidates[i] for i, _ in lexical.search(title, k)]
+        return candidates
+
     def check_guardrails(self, title1: str, title2: str) -> bool:
         """
         Returns True if SAFE (likely same product), False if MISMATCH detected.
@@ -205,49 +374,70 @@ class ProductMatcher:
         except: pass
         return None
 
-    def find_matches(self, new_offer, active_offers: List[Dict]) -> Dict:
+    def find_matches(self, new_offer, active_offers: List[Dict] = None) -> Dict:
         """
-        Checks active_offers for duplicates AND similar items.
+        Checks the catalog for duplicates AND similar items.
+        Exact duplicates and semantic candidates come from the offer index, which
+        covers all active offers. When active_offers is given and the index isn't
+        loaded (e.g. offline benchmarks), those are scored exhaustively instead.
         Returns: {
             "duplicate": { "id": str, "reason": str } or None,
             "similar": [ { "id": str, "title": str, "score": float, "reason": str } ]
         }
         """
         new_id = self.extract_product_id(new_offer.product_url) if new_offer.product_url else None
+        active_offers = active_offers or []
         
         result = {"duplicate": None, "similar": []}
         
         # 1. Product ID Verification (HARD MATCH -> DUPLICATE)
         if new_id:
-            for offer in active_offers:
-                existing_id = self.extract_product_id(offer.get('product_url', ''))
-                if existing_id == new_id:
-                     result["duplicate"] = {"id": offer.get('id'), "reason": "Exact Product ID Match"}
-                     return result # Return early if exact match found? Or still look for others? Usually strictly sufficient.
+            if offer_index.loaded or not active_offers:
+                match_id = offer_index.find_by_product_id(new_id)
+            else:
+                match_id = next((o.get('id') for o in active_offers
+                                 if (o.get('product_id') or self.extract_product_id(o.get('product_url') or '')) == new_id), None)
+            if match_id:
+                result["duplicate"] = {"id": match_id, "reason": "Exact Product ID Match"}
+                return result # Exact product ID is strictly sufficient
 
-        # 2. Semantic Match Loop
+        # 2. Semantic Match: stage one shortlists, stage two is one batched
+        #    encode + matrix cosine over the shortlist only
         if not new_offer.title: return result
-        
-        for offer in active_offers:
-            existing_title = offer.get('title')
-            if not existing_title: continue
-            
-            similarity = ai_service.calculate_similarity(new_offer.title, existing_title)
-            
+
+        if models.get_embedding_model() is not None:
+            query_vector = ai_service.embed_titles([new_offer.title])[0]
+            candidates = self.shortlist(new_offer.title, query_vector, active_offers)
+            if not candidates: return result
+            scores = ai_service.cosine_scores(query_vector, ai_service.embed_offers(candidates))
+        else:
+            candidates = [offer for offer in active_offers if offer.get('title')]
+            scores = [0.5] * len(candidates) # Fallback
+        ranked = sorted(zip(scores, candidates), key=lambda x: x[0], reverse=True)
+
+        # Guardrails are regex-heavy, so only run them on the top candidates
+        for similarity, offer in ranked[:MATCH_TOP_K]:
+            if similarity <= 0.60:
+                break # Ranked descending, nothing below can qualify
+            if result["duplicate"] and len(result["similar"]) >= 5:
+                break
+
+            existing_title = offer['title']
+
             # GUARDRAIL CHECK
             is_safe = self.check_guardrails(new_offer.title, existing_title)
             
             # Thresholds
             # A. High Confidence + Safe = DUPLICATE
             if similarity > 0.85 and is_safe:
-                if not result["duplicate"]: # Keep the best match or first match
+                if not result["duplicate"]: # Ranked, so the first one is the best match
                     result["duplicate"] = {
                         "id": offer.get('id'), 
                         "reason": f"Semantic High Confidence: {similarity:.2f}"
                     }
             
             # B. Medium Confidence OR (High Confidence + Unsafe) = SIMILAR (Did you mean?)
-            elif similarity > 0.60:
+            else:
                 reason = f"Similarity: {similarity:.2f}"
                 if not is_safe:
                     reason += " (Variant Mismatch)"
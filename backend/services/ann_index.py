@@ -0,0 +1,418 @@
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.enums import OfferStatus
+from backend.firebase_setup import db
+from backend.services.lexical_index import LexicalIndex
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [OfferStatus.APPROVED.value, OfferStatus.PENDING.value]
+
+
+def _lexical_tokens(title: str):
+    from backend.services.ai_core import to_matcher
+    return to_matcher.lexical_tokens(title)
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over unit-normalized vectors (cosine == dot product).
+
+    Vectors are bucketed under their nearest k-means centroid; a query only scans
+    the `nprobe` closest buckets. Below `min_train_size` vectors the index is exact
+    (brute force), which is also cheaper at that size. The quantizer is retrained
+    whenever the index doubles in size since the last training. Re-adding a key
+    overwrites its row in place; removed rows are tombstoned and compacted away
+    once they outnumber the live ones.
+    """
+
+    COMPACT_MIN_TOMBSTONES = 1024
+
+    def __init__(self, dim: int, nprobe: int = 16, min_train_size: int = 2048):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self._vectors = np.zeros((1024, dim), dtype=np.float32)
+        self._alive = np.zeros(1024, dtype=bool)
+        self._keys: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self._trained_size = 0
+        self._tombstones = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                if self._centroids is not None:
+                    old = int(np.argmax(self._centroids @ self._vectors[row]))
+                    new = int(np.argmax(self._centroids @ vector))
+                    if old != new:
+                        self._lists[old].remove(row)
+                        self._lists[new].append(row)
+                        self._list_arrays.pop(old, None)
+                        self._list_arrays.pop(new, None)
+                self._vectors[row] = vector
+                return
+
+            row = len(self._keys)
+            if row >= len(self._vectors):
+                self._grow(row + 1)
+            self._vectors[row] = vector
+            self._alive[row] = True
+            self._keys.append(key)
+            self._rows[key] = row
+
+            if self._centroids is not None:
+                bucket = int(np.argmax(self._centroids @ vector))
+                self._lists[bucket].append(row)
+                self._list_arrays.pop(bucket, None)
+
+            if len(self._rows) >= max(self.min_train_size, 2 * self._trained_size):
+                self._train()
+
+    def remove(self, key: str):
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is not None:
+                # Tombstone; the row is dropped on the next compaction or retrain
+                self._alive[row] = False
+                self._tombstones += 1
+                if self._tombstones > max(self.COMPACT_MIN_TOMBSTONES, len(self._rows)):
+                    self._compact()
+
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            total = len(self._keys)
+            if not self._rows:
+                return []
+
+            if self._centroids is None:
+                rows = np.flatnonzero(self._alive[:total])
+            else:
+                nprobe = min(self.nprobe, len(self._centroids))
+                centroid_scores = self._centroids @ query
+                buckets = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+                rows = np.concatenate([self._bucket_rows(int(b)) for b in buckets])
+                rows = rows[self._alive[rows]]
+
+            if not len(rows):
+                return []
+            scores = self._vectors[rows] @ query
+            k = min(k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self._keys[rows[i]], float(scores[i])) for i in top]
+
+    def _bucket_rows(self, bucket: int) -> np.ndarray:
+        arr = self._list_arrays.get(bucket)
+        if arr is None:
+            arr = np.asarray(self._lists[bucket], dtype=np.int64)
+            self._list_arrays[bucket] = arr
+        return arr
+
+    def _grow(self, needed: int):
+        capacity = max(needed, 2 * len(self._vectors))
+        vectors = np.zeros((capacity, self.dim), dtype=np.float32)
+        vectors[:len(self._vectors)] = self._vectors
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._vectors, self._alive = vectors, alive
+
+    def _compact(self):
+        # Drop tombstoned rows, renumbering the live ones in the bucket lists
+        keys = list(self._rows)
+        live = np.asarray([self._rows[key] for key in keys], dtype=np.int64)
+        renumber = np.full(len(self._keys), -1, dtype=np.int64)
+        renumber[live] = np.arange(len(keys))
+        data = self._vectors[live]
+        self._vectors = np.zeros((max(1024, 2 * len(keys)), self.dim), dtype=np.float32)
+        self._vectors[:len(keys)] = data
+        self._alive = np.zeros(len(self._vectors), dtype=bool)
+        self._alive[:len(keys)] = True
+        self._keys = keys
+        self._rows = {key: row for row, key in enumerate(keys)}
+        lists = [renumber[np.asarray(rows, dtype=np.int64)] for rows in self._lists]
+        self._lists = [rows[rows >= 0].tolist() for rows in lists]
+        self._list_arrays = {}
+        self._tombstones = 0
+
+    def _train(self, iterations: int = 10):
+        # Compact tombstones so bucket lists only hold live rows
+        self._compact()
+        n = len(self._keys)
+        data = self._vectors[:n]
+        nlist = max(1, int(math.sqrt(n)))
+        rng = np.random.default_rng(0)
+        sample = data[rng.choice(n, size=min(n, nlist * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        # Spherical k-means on the sample
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        assign = np.concatenate([
+            np.argmax(data[i:i + 65536] @ centroids.T, axis=1) for i in range(0, n, 65536)
+        ])
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[b]:bounds[b + 1]].tolist() for b in range(nlist)]
+        self._list_arrays = {}
+        self._centroids = centroids
+        self._trained_size = n
+        logger.info(f"ANN index trained: {n} vectors, {nlist} lists")
+
+
+class OfferIndex:
+    """
+    In-memory indexes over all active (APPROVED/PENDING) offers:
+    - ANN index over title embeddings (semantic matches)
+    - lexical token index over titles (cheap prefilter)
+    - product_id -> offer_ids map (exact duplicates)
+    Loaded lazily from Firestore on first use, then kept in sync incrementally:
+    local creates call `upsert`, and a snapshot listener applies creates and
+    status changes made by other workers.
+    Offers stored without a title embedding are embedded in one batch; while the
+    model isn't ready they wait in `_pending` (already findable by product ID)
+    and are indexed on the first search after it is.
+    All maps are guarded by `_lock`: the listener writes from its own thread.
+    """
+
+    FIELDS = ["title", "price", "product_url", "product_id", "status", "title_embedding", "group_id"]
+
+    def __init__(self):
+        self._index: Optional[IVFIndex] = None
+        self._meta: Dict[str, Dict] = {}
+        self._pending: Dict[str, Dict] = {}
+        self._by_product_id: Dict[str, Set[str]] = {}
+        self._product_id_of: Dict[str, str] = {}
+        self._lexical = LexicalIndex(_lexical_tokens)
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._watch = None
+        self.loaded = False
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        with self._load_lock:
+            if self.loaded:
+                return
+            docs = db.collection('offers').where("status", "in", ACTIVE_STATUSES).select(self.FIELDS).stream()
+            count = 0
+            for doc in docs:
+                data = doc.to_dict()
+                data['id'] = doc.id
+                self.upsert(data, embed=False)
+                count += 1
+            self.index_pending()
+            self.loaded = True
+            logger.info(f"Offer index loaded with {count} active offers ({len(self._pending)} awaiting embeddings)")
+            self._start_watch()
+
+    def upsert(self, offer: Dict, embed: bool = True):
+        """
+        Adds or refreshes an offer. One without a stored embedding is embedded
+        right away when `embed` and the model is ready, otherwise queued for
+        index_pending().
+        """
+        offer_id = offer.get('id')
+        if not offer_id:
+            return
+        if offer.get('status') not in ACTIVE_STATUSES:
+            self.remove(offer_id)
+            return
+
+        product_id = offer.get('product_id')
+        if not product_id and offer.get('product_url'):
+            # Offers written before product_id was stored: derive it once at load
+            from backend.services.ai_core import to_matcher
+            product_id = to_matcher.extract_product_id(offer['product_url'])
+
+        with self._lock:
+            previous = self._product_id_of.get(offer_id)
+            if previous and previous != product_id:
+                self._unmap_product(previous, offer_id)
+            if product_id:
+                self._by_product_id.setdefault(product_id, set()).add(offer_id)
+                self._product_id_of[offer_id] = product_id
+
+            existing = self._meta.get(offer_id)
+            if existing and existing['title'] == offer.get('title'):
+                # Vector unchanged (e.g. listener replaying a doc we already hold)
+                existing.update(price=offer.get('price'), product_url=offer.get('product_url'), group_id=offer.get('group_id'))
+                return
+
+        vector = offer.get('title_embedding')
+        if vector is None or not len(vector):
+            if not offer.get('title'):
+                return
+            with self._lock:
+                self._pending[offer_id] = offer
+            if embed:
+                self.index_pending()
+            return
+
+        self._add(offer, vector)
+
+    def index_pending(self) -> int:
+        """
+        Embeds every queued offer in one batched call, once the model is ready.
+        Returns how many were indexed.
+        """
+        from backend.services.ai_core import ai_service, models
+        if not self._pending or not models.embedding_ready:
+            return 0
+        with self._lock:
+            offers = list(self._pending.values())
+        try:
+            vectors = ai_service.embed_titles([offer['title'] for offer in offers])
+        except Exception as e:
+            logger.warning(f"Embedding {len(offers)} pending offers failed, will retry: {e}")
+            return 0
+        indexed = 0
+        for offer, vector in zip(offers, vectors):
+            with self._lock:
+                # Skip offers removed or re-queued with a new title meanwhile
+                if self._pending.get(offer['id']) is not offer:
+                    continue
+                del self._pending[offer['id']]
+            self._add(offer, vector)
+            indexed += 1
+        return indexed
+
+    def _add(self, offer: Dict, vector):
+        offer_id = offer['id']
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if self._index is None:
+                self._index = IVFIndex(dim=len(vector))
+            self._index.add(offer_id, vector)
+            self._lexical.add(offer_id, offer.get('title'))
+            self._pending.pop(offer_id, None)
+            self._meta[offer_id] = {
+                "id": offer_id,
+                "title": offer.get('title'),
+                "price": offer.get('price'),
+                "product_url": offer.get('product_url'),
+                "group_id": offer.get('group_id'),
+                "title_embedding": vector,
+            }
+
+    def remove(self, offer_id: str):
+        with self._lock:
+            if self._index is not None:
+                self._index.remove(offer_id)
+            self._lexical.remove(offer_id)
+            self._meta.pop(offer_id, None)
+            self._pending.pop(offer_id, None)
+            product_id = self._product_id_of.pop(offer_id, None)
+            if product_id:
+                self._unmap_product(product_id, offer_id)
+
+    def _unmap_product(self, product_id: str, offer_id: str):
+        # Other active offers for the same product keep the key alive
+        offer_ids = self._by_product_id.get(product_id)
+        if offer_ids is None:
+            return
+        offer_ids.discard(offer_id)
+        if not offer_ids:
+            del self._by_product_id[product_id]
+
+    def find_by_product_id(self, product_id: str) -> Optional[str]:
+        """
+        Active offer with this canonical product ID (AMZN:/FLIP:), if any.
+        One dict lookup once loaded; a single indexed query (product_id, status)
+        before that.
+        """
+        if self.loaded:
+            with self._lock:
+                offer_ids = self._by_product_id.get(product_id)
+                # Several active offers can share a product; any one is a duplicate, pick a stable one
+                return min(offer_ids) if offer_ids else None
+
+        query = db.collection('offers').where("product_id", "==", product_id).where("status", "in", ACTIVE_STATUSES)
+        for doc in query.select(["product_id"]).limit(1).stream():
+            return doc.id
+        return None
+
+    def group_id_of(self, offer_id: str) -> Optional[str]:
+        """
+        Group recorded on the offer (offers.group_id, set when its first group is
+        created). None when unknown, including offers that predate the field.
+        """
+        with self._lock:
+            meta = self._meta.get(offer_id) or self._pending.get(offer_id)
+            return meta.get('group_id') if meta else None
+
+    def search(self, vector: np.ndarray, k: int = 20) -> List[Dict]:
+        """
+        Top-k active offers by cosine similarity; each dict carries the offer's
+        stored vector, so callers never re-embed the candidates.
+        """
+        self.index_pending()
+        if self._index is None:
+            return []
+        hits = self._index.search(vector, k)
+        with self._lock:
+            return [self._meta[key] for key, _ in hits if key in self._meta]
+
+    def shortlist(self, title: str, vector: np.ndarray, k: int, stage: str = "ann") -> List[Dict]:
+        """
+        First matching stage over the whole catalog.
+        stage: "ann" (embedding neighbours), "lexical" (shared rare tokens),
+        "hybrid" (union of both) or "none" (every active offer).
+        """
+        self.index_pending()
+        if stage == "none":
+            with self._lock:
+                return list(self._meta.values())
+
+        keys: List[str] = []
+        if stage in ("ann", "hybrid"):
+            keys += [offer['id'] for offer in self.search(vector, k)]
+        if stage in ("lexical", "hybrid"):
+            keys += [key for key, _ in self._lexical.search(title, k)]
+        with self._lock:
+            return [self._meta[key] for key in dict.fromkeys(keys) if key in self._meta]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._meta)
+
+    def _start_watch(self):
+        def on_snapshot(col_snapshot, changes, read_time):
+            for change in changes:
+                data = change.document.to_dict() or {}
+                data['id'] = change.document.id
+                if change.type.name == 'REMOVED':
+                    self.remove(data['id'])
+                else:
+                    self.upsert(data)
+
+        try:
+            query = db.collection('offers').where("status", "in", ACTIVE_STATUSES)
+            self._watch = query.on_snapshot(on_snapshot)
+        except Exception as e:
+            logger.warning(f"Offer index listener not started, relying on local updates: {e}")
+
+
+offer_index = OfferIndex()
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from backend.config import settings
+from backend.firebase_setup import db
+
+logger = logging.getLogger(__name__)
+
+# Queued to a subscriber that fell too far behind; its stream closes and the
+# client reconnects with Last-Event-ID
+OVERFLOW = object()
+
+
+class Subscription:
+    __slots__ = ("group_id", "queue", "__weakref__")
+
+    def __init__(self, group_id: str, queue_size: int):
+        self.group_id = group_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+
+class ChatHub:
+    """
+    In-process pub/sub for group chat streams.
+    - Each worker holds one Firestore listener per group with at least one local
+      subscriber (shared by all of them), so messages posted through any worker
+      reach every connection; posts through this worker are also published
+      directly for lower latency. Deliveries are deduplicated by message ID.
+    - The last `replay_size` messages of each watched group are kept, so most
+      Last-Event-ID resumes are answered without reading Firestore.
+    - Subscribers get a bounded queue; one that overflows is disconnected
+      (it resumes from its last ID) instead of growing memory.
+    All subscriber state lives on the event loop; listener callbacks hop onto it
+    with call_soon_threadsafe.
+    """
+
+    def __init__(self, queue_size: int = 100, replay_size: int = 200, shared_listener: bool = True):
+        self.queue_size = queue_size
+        self.replay_size = replay_size
+        self.shared_listener = shared_listener
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._recent: Dict[str, "OrderedDict[str, Dict]"] = {}
+        self._watches: Dict[str, object] = {}
+        self._watch_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.delivered = 0
+        self.overflowed = 0
+
+    def subscribe(self, group_id: str) -> Subscription:
+        """
+        Must be called on the event loop.
+        """
+        self._loop = asyncio.get_running_loop()
+        sub = Subscription(group_id, self.queue_size)
+        subs = self._subs.setdefault(group_id, set())
+        subs.add(sub)
+        if len(subs) == 1:
+            self._recent[group_id] = OrderedDict()
+            if self.shared_listener:
+                # Opening a listener does network I/O; keep it off the loop
+                self._loop.run_in_executor(None, self._start_watch, group_id)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        subs = self._subs.get(sub.group_id)
+        if not subs:
+            return
+        subs.discard(sub)
+        if not subs:
+            del self._subs[sub.group_id]
+            self._recent.pop(sub.group_id, None)
+            if self.shared_listener:
+                asyncio.get_running_loop().run_in_executor(None, self._stop_watch, sub.group_id)
+
+    def publish(self, group_id: str, message: Dict):
+        """
+        Fans a message out to this worker's subscribers. Event loop only.
+        """
+        subs = self._subs.get(group_id)
+        recent = self._recent.get(group_id)
+        if not subs or recent is None or message['id'] in recent:
+            return
+        recent[message['id']] = message
+        while len(recent) > self.replay_size:
+            recent.popitem(last=False)
+
+        self.published += 1
+        for sub in list(subs):
+            try:
+                sub.queue.put_nowait(message)
+                self.delivered += 1
+            except asyncio.QueueFull:
+                self.overflowed += 1
+                self._force_overflow(sub)
+
+    def publish_threadsafe(self, group_id: str, message: Dict):
+        loop = self._loop
+        if loop is None or loop.is_closed() or group_id not in self._subs:
+            return
+        loop.call_soon_threadsafe(self.publish, group_id, message)
+
+    def replay_after(self, group_id: str, last_id: str) -> Optional[List[Dict]]:
+        """
+        Messages after `last_id` from the in-memory buffer, or None when the ID
+        isn't buffered (caller falls back to Firestore).
+        """
+        recent = self._recent.get(group_id)
+        if not recent or last_id not in recent:
+            return None
+        ids = list(recent)
+        return [recent[i] for i in ids[ids.index(last_id) + 1:]]
+
+    def stats(self) -> Dict:
+        return {
+            "groups": len(self._subs),
+            "connections": sum(len(s) for s in self._subs.values()),
+            "listeners": len(self._watches),
+            "published": self.published,
+            "delivered": self.delivered,
+            "overflowed": self.overflowed,
+        }
+
+    def _force_overflow(self, sub: Subscription):
+        # Make room for the marker so the stream sees it next
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(OVERFLOW)
+
+    def _start_watch(self, group_id: str):
+        def on_snapshot(col_snapshot, changes, read_time):
+            for change in changes:
+                if change.type.name != 'ADDED':
+                    continue
+                data = change.document.to_dict() or {}
+                data['id'] = change.document.id
+                self.publish_threadsafe(group_id, data)
+
+        try:
+            query = (db.collection('groups').document(group_id).collection('messages')
+                     .where('createdAt', '>', datetime.now(timezone.utc)))
+            watch = query.on_snapshot(on_snapshot)
+        except Exception as e:
+            logger.warning(f"Chat listener for group {group_id} not started, local posts only: {e}")
+            return
+
+        with self._watch_lock:
+            # The last subscriber may have left (or a listener started) meanwhile
+            if group_id in self._subs and group_id not in self._watches:
+                self._watches[group_id] = watch
+                return
+        watch.unsubscribe()
+
+    def _stop_watch(self, group_id: str):
+        with self._watch_lock:
+            if group_id in self._subs:
+                return # Someone subscribed again meanwhile
+            watch = self._watches.pop(group_id, None)
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Failed to stop chat listener for group {group_id}: {e}")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def sse_event(message: Dict) -> str:
+    data = json.dumps(message, default=_json_default, separators=(",", ":"))
+    return f"id: {message['id']}\nevent: message\ndata: {data}\n\n"
+
+
+chat_hub = ChatHub(
+    queue_size=settings.CHAT_STREAM_QUEUE_SIZE,
+    replay_size=settings.CHAT_REPLAY_BUFFER_SIZE,
+    shared_listener=settings.CHAT_SHARED_LISTENER,
+)
@@ -0,0 +1,132 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingTimeout(TimeoutError):
+    pass
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces encode calls from many request threads into one model call.
+    A single dispatcher thread drains the queue and flushes when `max_batch`
+    texts are pending or `max_wait_ms` has passed since the first one arrived.
+    Callers block on a Future for their own rows only, for at most the batch
+    window plus `encode_timeout`; a dispatcher found dead is restarted.
+    """
+
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch: int = 32, max_wait_ms: float = 5.0,
+                 encode_timeout: float = 30.0):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.encode_timeout = encode_timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        future = self.submit(texts)
+        # Queued behind at most one running batch, then our own
+        timeout = 2 * (self.max_wait + self.encode_timeout)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            future.cancel()
+            self.timeouts += 1
+            self._ensure_worker()
+            raise EmbeddingTimeout(f"Embedding {len(texts)} titles timed out after {timeout:.1f}s")
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._ensure_worker()
+        self._queue.put((list(texts), future))
+        return future
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+            "worker_alive": self._thread is not None and self._thread.is_alive(),
+        }
+
+    def _ensure_worker(self):
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            if self._thread is not None:
+                self.restarts += 1
+                logger.error("Embedding batcher worker died; restarting it")
+            self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self._run_once()
+            except Exception as e:
+                # Keep dispatching; callers of a batch lost here hit their timeout instead of hanging
+                logger.exception(f"Embedding batcher loop error: {e}")
+
+    def _run_once(self):
+        pending = [self._queue.get()]
+        count = len(pending[0][0])
+        deadline = time.monotonic() + self.max_wait
+
+        while count < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            count += len(item[0])
+
+        self._flush(pending, count)
+
+    def _flush(self, pending, count: int):
+        texts = [t for texts, _ in pending for t in texts]
+        try:
+            vectors = self.encode_fn(texts)
+        except Exception as e:
+            logger.error(f"Batched encode failed: {e}")
+            for _, future in pending:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.items += count
+        self.max_batch_seen = max(self.max_batch_seen, count)
+
+        offset = 0
+        for texts, future in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_result(vectors[offset:offset + len(texts)])
+            offset += len(texts)
@@ -0,0 +1,130 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.firebase_setup import db
+from backend.services.firestore_limits import BATCH_WRITE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache for title embeddings.
+    - Tier 1: bounded in-memory LRU (per worker)
+    - Tier 2: Firestore collection shared by all workers (skipped when persistent=False)
+    Keys are a hash of the model name + normalized title, so switching models never
+    serves stale vectors.
+    """
+
+    def __init__(self, namespace: str, max_size: int = 10000, collection: str = "title_embeddings", persistent: bool = True):
+        self.namespace = namespace
+        self.persistent = persistent
+        self.max_size = max_size
+        self.collection = collection
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(title: str) -> str:
+        return " ".join(title.lower().split())
+
+    def key_for(self, title: str) -> str:
+        return hashlib.sha1(f"{self.namespace}|{self.normalize(title)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, titles: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Returns {title: vector} for every title found in either tier.
+        """
+        found: Dict[str, np.ndarray] = {}
+        pending: Dict[str, List[str]] = {}
+
+        with self._lock:
+            for title in dict.fromkeys(titles):
+                key = self.key_for(title)
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    self.memory_hits += 1
+                    found[title] = vector
+                else:
+                    pending.setdefault(key, []).append(title)
+
+        if not pending or not self.persistent:
+            self.misses += sum(len(t) for t in pending.values())
+            return found
+
+        try:
+            refs = [db.collection(self.collection).document(key) for key in pending]
+            for snap in db.get_all(refs):
+                if not snap.exists:
+                    continue
+                vector = np.asarray(snap.to_dict()["vector"], dtype=np.float32)
+                self._remember(snap.id, vector)
+                for title in pending.pop(snap.id, []):
+                    self.persistent_hits += 1
+                    found[title] = vector
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+
+        self.misses += sum(len(t) for t in pending.values())
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]):
+        batch = db.batch() if self.persistent else None
+        pending = 0
+        for title, vector in items:
+            key = self.key_for(title)
+            vector = np.asarray(vector, dtype=np.float32)
+            self._remember(key, vector)
+            if batch is None:
+                continue
+            batch.set(db.collection(self.collection).document(key), {
+                "vector": vector.tolist(),
+                "model": self.namespace,
+            })
+            pending += 1
+            # Firestore rejects batches over 500 writes; a large re-embed spans several
+            if pending >= BATCH_WRITE_LIMIT:
+                self._commit(batch)
+                batch = db.batch()
+                pending = 0
+
+        if pending:
+            self._commit(batch)
+
+    @staticmethod
+    def _commit(batch):
+        try:
+            batch.commit()
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "size": len(self._lru),
+            "max_size": self.max_size,
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+        }
+
+
+embedding_cache = EmbeddingCache(settings.EMBEDDING_MODEL, max_size=settings.EMBEDDING_CACHE_SIZE)
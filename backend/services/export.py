@@ -0,0 +1,80 @@
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, Iterator, List, Tuple
+
+# Lines are buffered into chunks of roughly this size before being sent
+CHUNK_BYTES = 64 * 1024
+
+FILTER_OPS = {"==", "!=", "<", "<=", ">", ">=", "in", "not-in", "array_contains", "array_contains_any"}
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.hex()
+    if hasattr(value, "latitude") and hasattr(value, "longitude"):
+        return {"latitude": value.latitude, "longitude": value.longitude}
+    if hasattr(value, "path"):
+        return value.path # DocumentReference
+    return str(value)
+
+
+def _lookup(data, field_path: str):
+    for part in field_path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(part)
+    return data
+
+
+def parse_filter(raw: str) -> Tuple[str, str, object]:
+    """
+    "field,op,value" -> (field, op, value). The value is parsed as JSON when it
+    can be (numbers, booleans, lists for `in`), otherwise kept as a string.
+    """
+    parts = raw.split(",", 2)
+    if len(parts) != 3 or not parts[0]:
+        raise InvalidFilter(f"Filter '{raw}' must look like field,op,value")
+    field, op, value = parts
+    op = op.replace("-", "_") if op.startswith("array") else op
+    if op not in FILTER_OPS:
+        raise InvalidFilter(f"Unsupported filter operator '{op}'")
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return field, op, value
+
+
+def ndjson_chunks(docs: Iterable, fields: List[str] = None, compress: bool = False) -> Iterator[bytes]:
+    """
+    One JSON object per document, straight off a Firestore stream() iterator.
+    Only one chunk is held at a time, so memory stays flat however large the
+    collection; with `compress` the chunks are gzip-encoded incrementally.
+    """
+    gz = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    buffer = bytearray()
+    for doc in docs:
+        data = doc.to_dict() or {}
+        if fields:
+            data = {field: _lookup(data, field) for field in fields}
+        data['id'] = doc.id
+        buffer += json.dumps(data, default=_default, separators=(",", ":")).encode("utf-8")
+        buffer += b"\n"
+        if len(buffer) >= CHUNK_BYTES:
+            yield gz.compress(bytes(buffer)) if gz else bytes(buffer)
+            buffer.clear()
+
+    if gz:
+        yield gz.compress(bytes(buffer)) + gz.flush()
+    elif buffer:
+        yield bytes(buffer)
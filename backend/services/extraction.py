@@ -0,0 +1,240 @@
+import codecs
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-domain field selectors, tried in order. Syntax: tag, tag#id, tag.class1.class2
+DEFAULT_SELECTORS: Dict[str, Dict[str, List[str]]] = {
+    "amazon": {
+        "title": ["span#productTitle"],
+        "price": ["span.a-price-whole"],
+    },
+    "flipkart": {
+        "title": ["span.B_NuCI", "h1.yhB1nd"],
+        "price": ["div._30jeq3._16Jk6d"],
+    },
+    "generic": {
+        "title": ["title"],
+    },
+}
+
+Selector = Tuple[str, Optional[str], frozenset]
+
+# Where the HTML spec's prescan looks for a <meta> charset declaration
+META_PRESCAN_BYTES = 1024
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+# Elements whose text never shows on the page
+_INVISIBLE_TAGS = {'script', 'style', 'noscript', 'template', 'svg'}
+
+
+def detect_charset(content: bytes, declared: Optional[str] = None) -> str:
+    """
+    Encoding to decode a page with, in the browser's order of precedence: a
+    byte order mark, the charset from the Content-Type header (`declared`), a
+    <meta> declaration near the top of the document, then UTF-8. Unknown
+    names are skipped.
+    """
+    for bom, name in _BOMS:
+        if content.startswith(bom):
+            return name
+    candidates = [declared]
+    match = _META_CHARSET.search(content[:META_PRESCAN_BYTES])
+    if match:
+        candidates.append(match.group(1).decode('ascii', 'ignore'))
+    for name in candidates:
+        if not name:
+            continue
+        try:
+            return codecs.lookup(name.strip()).name
+        except LookupError:
+            logger.debug(f"Unknown charset {name!r}")
+    return 'utf-8'
+
+
+def parse_selector(selector: str) -> Selector:
+    match = re.fullmatch(r'([a-zA-Z0-9]+)(?:#([\w-]+))?((?:\.[\w-]+)*)', selector.strip())
+    if not match:
+        raise ValueError(f"Unsupported selector: {selector}")
+    tag, element_id, classes = match.groups()
+    return tag.lower(), element_id, frozenset(c for c in classes.split('.') if c)
+
+
+class _StopParsing(Exception):
+    pass
+
+
+class _TargetedParser(HTMLParser):
+    """
+    Streaming parser that only collects text inside elements matching the
+    selectors. Like the tree backends, a field takes the first element that
+    matches its earliest selector, so a later match can still replace a
+    lower-priority one; parsing stops once every field has matched its first
+    selector.
+    """
+
+    def __init__(self, fields: Dict[str, List[Selector]]):
+        super().__init__(convert_charrefs=True)
+        self.fields = fields
+        self.found: Dict[str, str] = {}
+        self._rank: Dict[str, int] = {}  # field -> index of the selector that matched
+        self._captures: List[List] = []  # [field, rank, tag, depth, chunks]
+
+    def handle_starttag(self, tag, attrs):
+        for capture in self._captures:
+            if tag == capture[2]:
+                capture[3] += 1
+
+        attrs = dict(attrs)
+        classes = set((attrs.get('class') or '').split())
+        for field, selectors in self.fields.items():
+            best = min([self._rank.get(field, len(selectors))] + [c[1] for c in self._captures if c[0] == field])
+            for rank, (sel_tag, sel_id, sel_classes) in enumerate(selectors[:best]):
+                if tag == sel_tag and (sel_id is None or attrs.get('id') == sel_id) and sel_classes <= classes:
+                    self._captures.append([field, rank, tag, 1, []])
+                    break
+
+    def handle_endtag(self, tag):
+        for capture in list(self._captures):
+            if tag != capture[2]:
+                continue
+            capture[3] -= 1
+            if capture[3] == 0:
+                self._captures.remove(capture)
+                field, rank, _, _, chunks = capture
+                if rank < self._rank.get(field, len(self.fields[field])):
+                    self._rank[field] = rank
+                    self.found[field] = "".join(chunks).strip()
+        if not self._captures and len(self._rank) == len(self.fields) and not any(self._rank.values()):
+            raise _StopParsing()
+
+    def handle_data(self, data):
+        for capture in self._captures:
+            capture[4].append(data)
+
+
+class _VisibleTextParser(HTMLParser):
+    """
+    Collects the page's visible text, skipping scripts, styles and the like.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks: List[str] = []
+        self._hidden = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _INVISIBLE_TAGS:
+            self._hidden += 1
+
+    def handle_endtag(self, tag):
+        if tag in _INVISIBLE_TAGS and self._hidden:
+            self._hidden -= 1
+
+    def handle_data(self, data):
+        if not self._hidden and data.strip():
+            self.chunks.append(data.strip())
+
+
+class ExtractionEngine:
+    """
+    Pulls title/price text out of product pages without building a full tree.
+    Backends:
+    - "stream": stdlib streaming parser, fed in chunks and stopped early once all
+      fields are found (default, no extra dependency)
+    - "selectolax": lexbor C parser with CSS selectors
+    - "bs4": full BeautifulSoup tree (the old path, kept for comparison)
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, backend: str = "stream", overrides: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        if backend == "selectolax":
+            try:
+                import selectolax  # noqa: F401
+            except ImportError:
+                logger.warning("selectolax not installed, falling back to stream extraction")
+                backend = "stream"
+        self.backend = backend
+        self.selectors = {domain: dict(fields) for domain, fields in DEFAULT_SELECTORS.items()}
+        for domain, fields in (overrides or {}).items():
+            self.selectors.setdefault(domain, {}).update(fields)
+        self._compiled = {
+            domain: {field: [parse_selector(s) for s in sels] for field, sels in fields.items()}
+            for domain, fields in self.selectors.items()
+        }
+
+    def extract(self, domain: str, content: bytes, encoding: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Returns {field: text or None} for the domain's configured fields.
+        `encoding` is the charset from the response's Content-Type, if any.
+        """
+        domain = domain if domain in self.selectors else "generic"
+        if isinstance(content, str):
+            content, encoding = content.encode('utf-8'), 'utf-8'
+        charset = detect_charset(content, encoding)
+        if self.backend == "selectolax":
+            found = self._extract_selectolax(domain, content.decode(charset, errors='replace'))
+        elif self.backend == "bs4":
+            found = self._extract_bs4(domain, content.decode(charset, errors='replace'))
+        else:
+            found = self._extract_stream(domain, content, charset)
+        return {field: found.get(field) or None for field in self.selectors[domain]}
+
+    def visible_text(self, content: bytes, encoding: Optional[str] = None) -> str:
+        """
+        The page's text as a reader sees it: no markup, scripts or styles.
+        """
+        if isinstance(content, str):
+            content, encoding = content.encode('utf-8'), 'utf-8'
+        parser = _VisibleTextParser()
+        self._feed(parser, content, detect_charset(content, encoding))
+        return " ".join(parser.chunks)
+
+    def _extract_stream(self, domain: str, content: bytes, charset: str) -> Dict[str, str]:
+        parser = _TargetedParser(self._compiled[domain])
+        try:
+            self._feed(parser, content, charset)
+        except _StopParsing:
+            pass
+        return parser.found
+
+    def _feed(self, parser: HTMLParser, content: bytes, charset: str):
+        # Decode chunk by chunk too, so stopping early also skips decoding the rest
+        decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+        for i in range(0, len(content), self.CHUNK_SIZE):
+            parser.feed(decoder.decode(content[i:i + self.CHUNK_SIZE]))
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+
+    def _extract_selectolax(self, domain: str, content: str) -> Dict[str, str]:
+        from selectolax.lexbor import LexborHTMLParser
+        tree = LexborHTMLParser(content)
+        found = {}
+        for field, selectors in self.selectors[domain].items():
+            for selector in selectors:
+                node = tree.css_first(selector)
+                if node is not None:
+                    found[field] = node.text().strip()
+                    break
+        return found
+
+    def _extract_bs4(self, domain: str, content: str) -> Dict[str, str]:
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(content, "html.parser")
+        found = {}
+        for field, selectors in self.selectors[domain].items():
+            for selector in selectors:
+                node = soup.select_one(selector)
+                if node is not None:
+                    found[field] = node.get_text().strip()
+                    break
+        return found
+
+
+extraction_engine = ExtractionEngine(settings.EXTRACTION_BACKEND, settings.EXTRACTION_SELECTORS)
@@ -0,0 +1,11 @@
+from typing import Iterable, List
+
+# Firestore caps the number of values in an `in` filter
+IN_QUERY_LIMIT = 30
+# ... and the number of writes in a batch (500); stay under it
+BATCH_WRITE_LIMIT = 400
+
+
+def chunked(items: List, size: int = IN_QUERY_LIMIT) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from firebase_admin import firestore
+
+from backend.config import settings
+from backend.firebase_setup import db
+
+logger = logging.getLogger(__name__)
+
+Coords = Tuple[float, float]
+
+ADDRESS_FIELDS = ("street", "city", "state", "pincode")
+
+
+class GeocodeCache:
+    """
+    Geocoding results keyed by normalized address, plus per-pincode centroids.
+    - Exact tier: in-memory LRU per worker, then a Firestore collection shared by
+      all workers (skipped when persistent=False). Addresses don't move, so the
+      TTL is long.
+    - Pincode tier: running mean of every address geocoded in a pincode, kept as
+      Increment-ed sums in Firestore so workers add to it without contention.
+      Used when the exact lookup misses and the API can't answer (or, with
+      prefer_centroid, instead of calling it).
+    Only successful geocodes are stored; (0.0, 0.0) never enters either tier.
+    """
+
+    def __init__(self, ttl: float, max_size: int = 20000, collection: str = "geocode_cache",
+                 centroid_collection: str = "pincode_centroids", persistent: bool = True,
+                 prefer_centroid: bool = False, centroid_refresh: float = 3600.0):
+        self.ttl = ttl
+        self.prefer_centroid = prefer_centroid
+        self.centroid_refresh = centroid_refresh
+        self.max_size = max_size
+        self.collection = collection
+        self.centroid_collection = centroid_collection
+        self.persistent = persistent
+        self._lru: "OrderedDict[str, Tuple[float, Coords]]" = OrderedDict()
+        # pincode -> (loaded_at, lat_sum, lon_sum, count)
+        self._centroids: Dict[str, Tuple[float, float, float, int]] = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.pincode_hits = 0
+        self.api_calls = 0
+        self.api_failures = 0
+        self.unresolved = 0
+
+    @staticmethod
+    def normalize_pincode(pincode) -> str:
+        return re.sub(r"\D", "", str(pincode or ""))
+
+    @classmethod
+    def normalize(cls, address: Dict) -> str:
+        """
+        Case, punctuation and whitespace insensitive, so "12, MG Road" and
+        "12 mg road" share an entry.
+        """
+        parts = []
+        for field in ADDRESS_FIELDS:
+            value = str(address.get(field) or "")
+            if field == "pincode":
+                value = cls.normalize_pincode(value)
+            else:
+                value = " ".join(re.sub(r"[^\w\s]", " ", value.lower()).split())
+            parts.append(value)
+        return "|".join(parts)
+
+    def get(self, key: str) -> Optional[Coords]:
+        with self._lock:
+            self.lookups += 1
+            entry = self._lru.get(key)
+            if entry is not None and entry[0] >= time.time():
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+
+        if not self.persistent:
+            return None
+        try:
+            snap = db.collection(self.collection).document(self._doc_id(key)).get()
+        except Exception as e:
+            logger.warning(f"Geocode cache read failed: {e}")
+            return None
+        if not snap.exists or snap.get('expires_at') < time.time():
+            return None
+
+        self._count('persistent_hits')
+        coords = (snap.get('lat'), snap.get('lon'))
+        self._remember(key, snap.get('expires_at'), coords)
+        return coords
+
+    def put(self, key: str, pincode: str, coords: Coords):
+        """
+        Stores an API result in the exact tier and folds it into its pincode centroid.
+        """
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, coords)
+        pincode = self.normalize_pincode(pincode)
+        if pincode:
+            with self._lock:
+                # With the shared tier, a pincode not seen yet is loaded from it on first use instead
+                entry = self._centroids.get(pincode)
+                if entry is None and not self.persistent:
+                    entry = (time.time(), 0.0, 0.0, 0)
+                if entry is not None:
+                    self._centroids[pincode] = (entry[0], entry[1] + coords[0], entry[2] + coords[1], entry[3] + 1)
+        if not self.persistent:
+            return
+        try:
+            batch = db.batch()
+            batch.set(db.collection(self.collection).document(self._doc_id(key)), {
+                "key": key,
+                "lat": coords[0],
+                "lon": coords[1],
+                "expires_at": expires_at,
+            })
+            if pincode:
+                batch.set(db.collection(self.centroid_collection).document(pincode), {
+                    "lat_sum": firestore.Increment(coords[0]),
+                    "lon_sum": firestore.Increment(coords[1]),
+                    "count": firestore.Increment(1),
+                }, merge=True)
+            batch.commit()
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed: {e}")
+
+    def centroid(self, pincode: str) -> Optional[Coords]:
+        """
+        Mean position of the addresses geocoded in this pincode, or None.
+        """
+        pincode = self.normalize_pincode(pincode)
+        if not pincode:
+            return None
+        with self._lock:
+            entry = self._centroids.get(pincode)
+        if self.persistent and (entry is None or time.time() - entry[0] > self.centroid_refresh):
+            try:
+                snap = db.collection(self.centroid_collection).document(pincode).get()
+                if snap.exists and snap.get('count'):
+                    entry = (time.time(), snap.get('lat_sum'), snap.get('lon_sum'), snap.get('count'))
+                    with self._lock:
+                        self._centroids[pincode] = entry
+            except Exception as e:
+                logger.warning(f"Pincode centroid read failed: {e}")
+        if not entry or not entry[3]:
+            return None
+        return (entry[1] / entry[3], entry[2] / entry[3])
+
+    def record_api_call(self, ok: bool):
+        """
+        Counts a geocoding API call; failures (errors or no match) separately.
+        """
+        self._count('api_calls')
+        if not ok:
+            self._count('api_failures')
+
+    def record_pincode_hit(self):
+        self._count('pincode_hits')
+
+    def record_unresolved(self):
+        self._count('unresolved')
+
+    def stats(self) -> Dict:
+        # Answered without the API: exact tiers, or a pincode centroid in its place
+        answered = self.memory_hits + self.persistent_hits + self.pincode_hits
+        return {
+            "size": len(self._lru),
+            "lookups": self.lookups,
+            "pincodes": len(self._centroids),
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "pincode_hits": self.pincode_hits,
+            "api_calls": self.api_calls,
+            "api_failures": self.api_failures,
+            "unresolved": self.unresolved,
+            "hit_rate": answered / self.lookups if self.lookups else 0.0,
+        }
+
+    def _count(self, field: str):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _remember(self, key: str, expires_at: float, coords: Coords):
+        with self._lock:
+            self._lru[key] = (expires_at, coords)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    @staticmethod
+    def _doc_id(key: str) -> str:
+        # Addresses can contain '/' and run long; document IDs can't
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+geocode_cache = GeocodeCache(
+    ttl=settings.GEOCODE_CACHE_TTL_SECONDS,
+    max_size=settings.GEOCODE_CACHE_SIZE,
+    prefer_centroid=settings.GEOCODE_PREFER_PINCODE_CENTROID,
+)
@@ -0,0 +1,302 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from firebase_admin import firestore
+from google.api_core import exceptions as gexc
+
+from backend.config import settings
+from backend.enums import GroupStatus
+from backend.firebase_setup import db
+from backend.services.firestore_limits import BATCH_WRITE_LIMIT, chunked
+
+logger = logging.getLogger(__name__)
+
+# groups/{group_id}/members/{user_id}: one document per member
+MEMBERS = 'members'
+# groups/{group_id}/seats/{n}, n in 1..target_size: a member holds exactly one
+SEATS = 'seats'
+
+
+class JoinRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class ContentionStats:
+    """
+    Counters for the join path, exposed on /stats.
+    - seat_conflicts: join batches that lost a seat to a concurrent joiner
+    - lock_races: guarded FORMING -> LOCKED updates that lost to another writer
+    - attempts: histogram of batches needed per successful join
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.joins = 0
+        self.seat_conflicts = 0
+        self.lock_races = 0
+        self.exhausted = 0
+        self.backoff_seconds = 0.0
+        self.attempts = Counter()
+
+    def record(self, field: str, amount=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + amount)
+
+    def record_join(self, attempts: int):
+        with self._lock:
+            self.joins += 1
+            self.attempts[attempts] += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            retried = sum(count for n, count in self.attempts.items() if n > 1)
+            return {
+                "joins": self.joins,
+                "seat_conflicts": self.seat_conflicts,
+                "lock_races": self.lock_races,
+                "exhausted": self.exhausted,
+                "retried_join_rate": retried / self.joins if self.joins else 0.0,
+                "backoff_seconds": round(self.backoff_seconds, 3),
+                "attempts": {str(n): count for n, count in sorted(self.attempts.items())},
+            }
+
+
+contention = ContentionStats()
+
+
+def backoff(attempt: int) -> float:
+    """
+    Sleeps before retry `attempt` (0-based) with full jitter: a uniform delay up
+    to base * 2**attempt, capped, so colliding joiners spread out instead of
+    retrying in lockstep. Returns the delay.
+    """
+    ceiling = min(settings.GROUP_JOIN_BACKOFF_CAP_SECONDS,
+                  settings.GROUP_JOIN_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    time.sleep(delay)
+    contention.record("backoff_seconds", delay)
+    return delay
+
+
+def member_ref(group_ref, user_id: str):
+    return group_ref.collection(MEMBERS).document(user_id)
+
+
+def read_members(group_ref, group_data: Optional[Dict] = None, fields: Optional[List[str]] = None) -> List[Dict]:
+    """
+    Members in join order. Groups created before the subcollection still carry a
+    `members` array on the group document; that is returned as-is.
+    """
+    if group_data is not None and 'members' in group_data:
+        return group_data['members']
+    query = group_ref.collection(MEMBERS)
+    if fields:
+        query = query.select(fields + ['joined_at'])
+    members = [doc.to_dict() for doc in query.stream()]
+    members.sort(key=lambda m: m.get('joined_at') or '')
+    return members
+
+
+def list_members(group_ref, group_data: Dict) -> List[Dict]:
+    """
+    Like read_members, for callers about to write member state: a legacy group
+    is moved to the subcollection first so the write has a document to target.
+    """
+    if 'members' in group_data:
+        migrate_legacy(group_ref)
+    return read_members(group_ref)
+
+
+def members_for_groups(groups: List[Dict]) -> List[Dict]:
+    """
+    Fills group['members'] for a page of groups: one collection-group query per
+    IN_QUERY_LIMIT groups rather than one subcollection read per group. Needs
+    the members.group_id collection-group index in firestore.indexes.json.
+    """
+    pending = {g['id']: g for g in groups if 'members' not in g}
+    found: Dict[str, List[Dict]] = {group_id: [] for group_id in pending}
+    for chunk in chunked(list(pending)):
+        for doc in db.collection_group(MEMBERS).where('group_id', 'in', chunk).stream():
+            data = doc.to_dict()
+            if data.get('group_id') in found:
+                found[data['group_id']].append(data)
+    for group_id, members in found.items():
+        members.sort(key=lambda m: m.get('joined_at') or '')
+        pending[group_id]['members'] = members
+    return groups
+
+
+def create_first_member(batch, group_ref, member: Dict):
+    """
+    Adds the creator to a new group's batch, holding seat 1.
+    """
+    member = dict(member, group_id=group_ref.id, seat=1)
+    batch.create(member_ref(group_ref, member['user_id']), member)
+    batch.create(group_ref.collection(SEATS).document('1'), {"user_id": member['user_id']})
+    return member
+
+
+def update_member(group_ref, user_id: str, fields: Dict):
+    member_ref(group_ref, user_id).update(fields)
+
+
+def update_members(group_ref, updates: Dict[str, Dict], group_updates: Optional[Dict] = None):
+    """
+    {user_id: fields} in as few batches as the write limit allows; `group_updates`
+    goes out with the last one.
+    """
+    items = list(updates.items())
+    batches = list(chunked(items, BATCH_WRITE_LIMIT - 1)) or [[]]
+    for i, chunk in enumerate(batches):
+        batch = db.batch()
+        for user_id, fields in chunk:
+            batch.update(member_ref(group_ref, user_id), fields)
+        if group_updates and i == len(batches) - 1:
+            batch.update(group_ref, group_updates)
+        batch.commit()
+
+
+def migrate_legacy(group_ref) -> bool:
+    """
+    Moves a group's `members` array into the members/seats subcollections.
+    No-op (False) for groups already migrated.
+    """
+
+    @firestore.transactional
+    def migrate(transaction):
+        snap = group_ref.get(transaction=transaction)
+        if not snap.exists:
+            return False
+        members = (snap.to_dict() or {}).get('members')
+        if members is None:
+            return False
+        for seat, member in enumerate(members, start=1):
+            transaction.set(member_ref(group_ref, member['user_id']), dict(member, group_id=group_ref.id, seat=seat))
+            transaction.set(group_ref.collection(SEATS).document(str(seat)), {"user_id": member['user_id']})
+        transaction.update(group_ref, {
+            "members": firestore.DELETE_FIELD,
+            "member_ids": [m['user_id'] for m in members],
+            "current_size": len(members),
+        })
+        return True
+
+    return migrate(db.transaction())
+
+
+def join(group_ref, member: Dict) -> Dict:
+    """
+    Adds `member` to the group without a transaction on the group document.
+
+    Capacity is enforced by seats: the joiner creates members/{user_id} and a
+    free seats/{n} in one batch, alongside an atomic current_size increment and
+    member_ids union on the group. Both creates carry an exists=False
+    precondition, so a second join by the same user or two joiners picking the
+    same seat fail the whole batch and nothing is half-written. Joiners only
+    collide on a seat, retry on another one after a jittered backoff, and never
+    block each other otherwise.
+
+    Returns the group data after the join (and the lock, when it filled the group).
+    """
+    user_id = member['user_id']
+    for attempt in range(settings.GROUP_JOIN_MAX_ATTEMPTS):
+        snap = group_ref.get()
+        if not snap.exists:
+            raise JoinRejected(404, "Group not found")
+        group_data = snap.to_dict()
+        if 'members' in group_data:
+            migrate_legacy(group_ref)
+            continue
+        if group_data['status'] != GroupStatus.FORMING:
+            raise JoinRejected(400, "Group is no longer accepting members")
+
+        taken = {doc.id for doc in group_ref.collection(SEATS).select([]).stream()}
+        free = [n for n in range(1, group_data['target_size'] + 1) if str(n) not in taken]
+        if not free:
+            # Full but not yet locked: the joiner that filled it may have died before locking
+            lock_if_full(group_ref)
+            raise JoinRejected(400, "Group is full")
+
+        seat = random.choice(free)
+        batch = db.batch()
+        batch.create(member_ref(group_ref, user_id), dict(member, group_id=group_ref.id, seat=seat))
+        batch.create(group_ref.collection(SEATS).document(str(seat)), {"user_id": user_id})
+        batch.update(group_ref, {
+            "current_size": firestore.Increment(1),
+            "member_ids": firestore.ArrayUnion([user_id]),
+        })
+        try:
+            batch.commit()
+        except gexc.Conflict:
+            if member_ref(group_ref, user_id).get().exists:
+                raise JoinRejected(400, "Already a member")
+            contention.record("seat_conflicts")
+            backoff(attempt)
+            continue
+
+        contention.record_join(attempt + 1)
+        return lock_if_full(group_ref)
+
+    contention.record("exhausted")
+    raise JoinRejected(409, "Group is busy, please retry")
+
+
+def lock_if_full(group_ref) -> Dict:
+    """
+    FORMING -> LOCKED once every seat is taken, picking the receiver. Guarded by
+    the group's update time, so when several joiners see the group full at
+    once exactly one transition lands; the rest re-read and find it LOCKED.
+    """
+    for attempt in range(settings.GROUP_JOIN_MAX_ATTEMPTS):
+        snap = group_ref.get()
+        group_data = snap.to_dict()
+        if group_data['status'] != GroupStatus.FORMING or group_data['current_size'] < group_data['target_size']:
+            return group_data
+
+        from backend.services.location_service import location_service
+        members = read_members(group_ref)
+        updates = {
+            "status": GroupStatus.LOCKED,
+            "receiver_id": location_service.select_optimal_host(members),
+        }
+        try:
+            group_ref.update(updates, option=db.write_option(last_update_time=snap.update_time))
+        except gexc.FailedPrecondition:
+            contention.record("lock_races")
+            backoff(attempt)
+            continue
+        group_data.update(updates)
+        return group_data
+
+    # Still FORMING: the next join attempt or read of a full group retries the lock
+    logger.warning(f"Gave up locking full group {group_ref.id}")
+    return group_ref.get().to_dict()
+
+
+def complete_if_delivered(group_ref) -> bool:
+    """
+    DELIVERED -> COMPLETED, guarded by the group's update time like lock_if_full:
+    when the last handoffs are confirmed at once, exactly one caller makes the
+    transition. Returns True only for that caller, which then releases escrow.
+    """
+    for attempt in range(settings.GROUP_JOIN_MAX_ATTEMPTS):
+        snap = group_ref.get()
+        if snap.to_dict()['status'] != GroupStatus.DELIVERED:
+            return False
+        try:
+            group_ref.update({"status": GroupStatus.COMPLETED},
+                             option=db.write_option(last_update_time=snap.update_time))
+        except gexc.FailedPrecondition:
+            contention.record("lock_races")
+            backoff(attempt)
+            continue
+        return True
+
+    logger.warning(f"Gave up completing delivered group {group_ref.id}")
+    return False
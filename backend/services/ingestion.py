@@ -0,0 +1,215 @@
+import abc
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from google.api_core import exceptions as gexc
+
+from backend.config import settings
+from backend.firebase_setup import db
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Dict], Awaitable[None]]
+
+
+class IngestQueueFull(Exception):
+    pass
+
+
+class JobQueue(abc.ABC):
+    """
+    Where background offer-ingestion jobs run. Payloads are plain JSON-able dicts
+    so a backend can hand them to an external broker; the handler is registered
+    once by the offers router.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.handler: Optional[JobHandler] = None
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def set_handler(self, handler: JobHandler):
+        self.handler = handler
+
+    @abc.abstractmethod
+    async def submit(self, payload: Dict):
+        """
+        Hands the job to the backend; raises IngestQueueFull when it can't take it.
+        """
+
+    def has_capacity(self) -> bool:
+        return True
+
+    async def shutdown(self, timeout: float = 10.0):
+        pass
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    async def _run(self, payload: Dict):
+        try:
+            await self.handler(payload)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Ingest job {payload.get('job_id')} failed: {e}")
+
+
+class InProcessJobQueue(JobQueue):
+    """
+    asyncio queue drained by `workers` tasks on the serving event loop. Verification
+    is async and matching/writes already hop to the threadpool, so a handful of
+    tasks keeps many jobs in flight. Bounded: submit raises IngestQueueFull once
+    `max_pending` jobs are waiting. Jobs still queued when the process exits are
+    lost; the startup sweep (reclaim_stalled_offers in the offers router)
+    resubmits their offers once they have been PROCESSING for too long.
+    """
+
+    name = "inprocess"
+
+    def __init__(self, workers: int = 4, max_pending: int = 100):
+        super().__init__()
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def submit(self, payload: Dict):
+        self._ensure_workers()
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            raise IngestQueueFull()
+        self.submitted += 1
+
+    def has_capacity(self) -> bool:
+        return self._queue is None or not self._queue.full()
+
+    async def shutdown(self, timeout: float = 10.0):
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Ingest queue shut down with {self._queue.qsize()} jobs pending")
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        stats.update(
+            workers=self.workers,
+            queue_depth=self._queue.qsize() if self._queue else 0,
+            max_pending=self.max_pending,
+        )
+        return stats
+
+    def _ensure_workers(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"ingest-worker-{i}") for i in range(self.workers)]
+
+    async def _worker(self):
+        while True:
+            payload = await self._queue.get()
+            try:
+                await self._run(payload)
+            finally:
+                self._queue.task_done()
+
+
+class InlineJobQueue(JobQueue):
+    """
+    Stand-in broker: the job runs to completion inside submit(), after the payload
+    has been round-tripped through JSON the way a real broker would. Makes the
+    background path deterministic for tests and local debugging.
+    """
+
+    name = "inline"
+
+    async def submit(self, payload: Dict):
+        self.submitted += 1
+        await self._run(json.loads(json.dumps(payload)))
+
+
+QUEUE_BACKENDS: Dict[str, Callable[[], JobQueue]] = {
+    "inprocess": lambda: InProcessJobQueue(settings.INGEST_WORKERS, settings.INGEST_MAX_PENDING),
+    "inline": InlineJobQueue,
+}
+
+
+def register_queue_backend(name: str, factory: Callable[[], JobQueue]):
+    QUEUE_BACKENDS[name] = factory
+
+
+def build_queue(name: str) -> JobQueue:
+    if name not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown ingest queue backend '{name}', expected one of {sorted(QUEUE_BACKENDS)}")
+    return QUEUE_BACKENDS[name]()
+
+
+class JobStore:
+    """
+    Job status lives in Firestore so any worker process can answer a status poll.
+    All methods block; call them from a worker thread.
+    """
+
+    def __init__(self, collection: str = "offer_jobs"):
+        self.collection = collection
+
+    def create(self, job_id: str, data: Dict, batch=None):
+        now = time.time()
+        doc = {"id": job_id, "state": "queued", "created_at": now, "updated_at": now, **data}
+        ref = db.collection(self.collection).document(job_id)
+        if batch is not None:
+            batch.set(ref, doc)
+        else:
+            ref.set(doc)
+
+    def update(self, job_id: str, state: str, **fields):
+        fields.update(state=state, updated_at=time.time())
+        try:
+            db.collection(self.collection).document(job_id).update(fields)
+        except Exception as e:
+            logger.warning(f"Could not update ingest job {job_id}: {e}")
+
+    def claim(self, job_id: str, stale_before: float) -> Optional[Dict]:
+        """
+        Takes over a job whose worker went away: returns it if it was last touched
+        before `stale_before` and this caller won the guarded update, else None.
+        Two workers sweeping at once can't both resubmit it.
+        """
+        ref = db.collection(self.collection).document(job_id)
+        snap = ref.get()
+        if not snap.exists:
+            return None
+        job = snap.to_dict()
+        if job.get("state") in ("done", "failed") or job.get("updated_at", 0) >= stale_before:
+            return None
+        try:
+            ref.update({"state": "queued", "updated_at": time.time(), "reclaimed": job.get("reclaimed", 0) + 1},
+                       option=db.write_option(last_update_time=snap.update_time))
+        except gexc.FailedPrecondition:
+            return None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        snap = db.collection(self.collection).document(job_id).get()
+        return snap.to_dict() if snap.exists else None
+
+
+ingestion_queue = build_queue(settings.INGEST_QUEUE_BACKEND)
+job_store = JobStore()
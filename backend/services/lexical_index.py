@@ -0,0 +1,70 @@
+import heapq
+import math
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Hashable, List, Set, Tuple
+
+
+class LexicalIndex:
+    """
+    Inverted token index with IDF-weighted overlap scoring.
+    Used as the cheap first stage of matching: a title only reaches the
+    semantic scorer if it shares rare tokens (model numbers, sizes, brands)
+    with the new title. Very common tokens (df above `max_df`) are skipped,
+    so a query only walks short posting lists.
+    """
+
+    def __init__(self, tokenize: Callable[[str], Set[str]], max_df: float = 0.2):
+        self.tokenize = tokenize
+        self.max_df = max_df
+        self._postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self._docs: Dict[Hashable, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, key: Hashable, text: str):
+        tokens = self.tokenize(text or "")
+        with self._lock:
+            self._remove(key)
+            self._docs[key] = tokens
+            for token in tokens:
+                self._postings[token].add(key)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def search(self, text: str, k: int = 50) -> List[Tuple[Hashable, float]]:
+        """
+        Top-k keys by the share of the query's IDF weight they match (0..1].
+        """
+        tokens = self.tokenize(text or "")
+        with self._lock:
+            n = len(self._docs)
+            if not n or not tokens:
+                return []
+
+            scores: Dict[Hashable, float] = defaultdict(float)
+            total = 0.0
+            for token in tokens:
+                posting = self._postings.get(token)
+                df = len(posting) if posting else 0
+                idf = math.log(1 + n / (df or 1))
+                total += idf
+                if not df or (n > 100 and df > self.max_df * n):
+                    continue
+                for key in posting:
+                    scores[key] += idf
+
+        top = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(key, score / total) for key, score in top]
+
+    def _remove(self, key: Hashable):
+        for token in self._docs.pop(key, ()):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[token]
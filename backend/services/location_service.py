@@ -16,10 +16,43 @@ class LocationService:
         """
         Converts structured address to (lat, lon).
         Address dict should have: street, city, state, pincode
+        Answers from the geocode cache when it can; when the API can't answer,
+        falls back to the pincode's centroid, then (0.0, 0.0).
+        """
+        from backend.services.geocode_cache import geocode_cache
+
+        key = geocode_cache.normalize(address)
+        cached = geocode_cache.get(key)
+        if cached is not None:
+            return cached
+
+        pincode = address.get('pincode', '')
+        if geocode_cache.prefer_centroid:
+            centroid = geocode_cache.centroid(pincode)
+            if centroid is not None:
+                geocode_cache.record_pincode_hit()
+                return centroid
+
+        coords = self._geocode_remote(address)
+        geocode_cache.record_api_call(ok=coords is not None)
+        if coords is not None:
+            geocode_cache.put(key, pincode, coords)
+            return coords
+
+        centroid = geocode_cache.centroid(pincode)
+        if centroid is not None:
+            geocode_cache.record_pincode_hit()
+            return centroid
+        geocode_cache.record_unresolved()
+        return (0.0, 0.0)
+
+    def _geocode_remote(self, address: dict) -> Optional[Tuple[float, float]]:
+        """
+        One GeoApify lookup; None when it fails or finds nothing.
         """
         if not self.api_key:
             logger.error("No API Key provided for geocoding")
-            return (0.0, 0.0)
+            return None
 
         # Construct query string
         # Priority: explicit structure over free text
@@ -52,7 +85,7 @@ class LocationService:
         except Exception as e:
             logger.error(f"Geocoding Exception: {e}")
             
-        return (0.0, 0.0)
+        return None
 
     def haversine_distance(self, coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
         """
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import settings
+from backend.firebase_setup import db
+from backend.services import group_members
+
+logger = logging.getLogger(__name__)
+
+
+class MembershipCache:
+    """
+    group_id -> {user_id: full_name} for chat/group authorization, so the hot
+    path is a dict lookup instead of a members read.
+    - Populated on first access with a read of the members' names (plus a
+      field-masked group read for existence), bounded LRU per worker.
+    - Writers in this worker (create/join and member status updates) refresh the
+      entry directly.
+    - Joins made through another worker: a user missing from a cached entry
+      triggers a re-read, at most once per `recheck_seconds` per group.
+    - Removals (no leave path yet) are picked up within `ttl`; a future leave
+      path should call invalidate().
+    """
+
+    def __init__(self, max_groups: int = 10000, ttl: float = 300.0, recheck_seconds: float = 2.0):
+        self.max_groups = max_groups
+        self.ttl = ttl
+        self.recheck_seconds = recheck_seconds
+        self._lru: "OrderedDict[str, Tuple[float, Dict[str, Optional[str]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def members(self, group_id: str, refresh: bool = False) -> Optional[Dict[str, Optional[str]]]:
+        """
+        {user_id: full_name}, or None if the group doesn't exist.
+        """
+        if not refresh:
+            with self._lock:
+                entry = self._lru.get(group_id)
+                if entry and time.time() - entry[0] < self.ttl:
+                    self._lru.move_to_end(group_id)
+                    self.hits += 1
+                    return entry[1]
+
+        self.loads += 1
+        group_ref = db.collection('groups').document(group_id)
+        # Only legacy groups still carry the `members` array; others return next to nothing
+        snap = group_ref.get(field_paths=['members'])
+        if not snap.exists:
+            self.invalidate(group_id)
+            return None
+        members = group_members.read_members(group_ref, snap.to_dict() or {}, fields=['user_id', 'full_name'])
+        return self.update(group_id, members)
+
+    def is_member(self, group_id: str, user_id: str) -> Optional[bool]:
+        """
+        None when the group doesn't exist.
+        """
+        members = self.members(group_id)
+        if members is None:
+            return None
+        if user_id in members:
+            return True
+        with self._lock:
+            entry = self._lru.get(group_id)
+            stale = entry is None or time.time() - entry[0] >= self.recheck_seconds
+        if not stale:
+            return False
+        # May have joined through another worker since this entry was loaded
+        members = self.members(group_id, refresh=True)
+        return members is not None and user_id in members
+
+    def member_name(self, group_id: str, user_id: str) -> Optional[str]:
+        members = self.members(group_id) or {}
+        return members.get(user_id)
+
+    def update(self, group_id: str, members: List[Dict]) -> Dict[str, Optional[str]]:
+        entry = {m['user_id']: m.get('full_name') for m in members if m.get('user_id')}
+        with self._lock:
+            self._lru[group_id] = (time.time(), entry)
+            self._lru.move_to_end(group_id)
+            while len(self._lru) > self.max_groups:
+                self._lru.popitem(last=False)
+        return entry
+
+    def invalidate(self, group_id: str):
+        with self._lock:
+            self._lru.pop(group_id, None)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.loads
+        return {
+            "groups": len(self._lru),
+            "max_groups": self.max_groups,
+            "hits": self.hits,
+            "loads": self.loads,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+membership_cache = MembershipCache(
+    max_groups=settings.MEMBERSHIP_CACHE_SIZE,
+    ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+)
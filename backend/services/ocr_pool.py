@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process EasyOCR reader, created once by the pool initializer
+_reader = None
+
+
+class OCRPoolSaturated(Exception):
+    """Raised when the OCR queue is full; callers should answer 429."""
+
+
+def _init_worker():
+    global _reader
+    try:
+        import easyocr
+        _reader = easyocr.Reader(['en'], verbose=False)
+    except Exception as e:
+        logger.error(f"OCR worker failed to load EasyOCR: {e}")
+        _reader = None
+
+
+def prepare_image(path: str, max_side: int):
+    """
+    Normalizes a screenshot for OCR: honours EXIF rotation, converts to
+    grayscale, boosts contrast and downscales so the long side is <= max_side.
+    """
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("L")
+        image.thumbnail((max_side, max_side))
+        image = ImageOps.autocontrast(image)
+        return np.array(image)
+
+
+def _ocr_file(path: str, max_side: int) -> str:
+    try:
+        if _reader is None:
+            return ""
+        result = _reader.readtext(prepare_image(path, max_side))
+        return " ".join([res[1] for res in result])
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class OCRPool:
+    """
+    Runs OCR in worker processes so it never holds the GIL, the event loop or
+    the API threadpool. At most `max_pending` images are queued or running;
+    beyond that `submit` fails fast with OCRPoolSaturated (backpressure).
+    """
+
+    def __init__(self, workers: int = 1, max_pending: int = 8, max_side: int = 1600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_side = max_side
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failed = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed - self.failed
+
+    def submit(self, path: str) -> Future:
+        """
+        Queues OCR for an image file. The pool owns the file and deletes it when done.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            os.remove(path)
+            raise OCRPoolSaturated(f"OCR queue full ({self.max_pending} pending)")
+
+        try:
+            try:
+                future = self._get_executor().submit(_ocr_file, path, self.max_side)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a huge image); start a fresh pool
+                self.shutdown()
+                future = self._get_executor().submit(_ocr_file, path, self.max_side)
+        except Exception:
+            self._slots.release()
+            os.remove(path)
+            raise
+        self.submitted += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def _on_done(self, future: Future):
+        self._slots.release()
+        if future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: never fork a process that already runs torch/loader threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                    )
+        return self._executor
+
+
+ocr_pool = OCRPool(
+    workers=settings.OCR_WORKERS,
+    max_pending=settings.OCR_MAX_PENDING,
+    max_side=settings.OCR_MAX_IMAGE_SIDE,
+)
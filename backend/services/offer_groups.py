@@ -0,0 +1,122 @@
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+from backend.firebase_setup import db
+from backend.services.ann_index import offer_index
+from backend.services.firestore_limits import BATCH_WRITE_LIMIT, IN_QUERY_LIMIT, chunked
+
+logger = logging.getLogger(__name__)
+
+# Offer fields copied into groups.offer_summary: enough for a valid OfferResponse
+OFFER_SUMMARY_FIELDS = [
+    "title", "price", "currency", "product_url", "offer_image",
+    "status", "location", "posted_by_id", "verification_score",
+]
+
+
+def group_ids_for_offers(offer_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    {offer_id: group_id} for the offers that have a group.
+    The offer index already holds offers.group_id (maintained by create_group), so
+    most lookups cost no reads; offers it can't answer for are resolved with one
+    `offer_id in [...]` query per IN_QUERY_LIMIT ids instead of one query each.
+    """
+    found: Dict[str, str] = {}
+    pending = []
+    for offer_id in dict.fromkeys(oid for oid in offer_ids if oid):
+        group_id = offer_index.group_id_of(offer_id)
+        if group_id:
+            found[offer_id] = group_id
+        else:
+            pending.append(offer_id)
+
+    for chunk in chunked(pending):
+        docs = db.collection('groups').where('offer_id', 'in', chunk).select(['offer_id']).stream()
+        for doc in docs:
+            # Same as the old per-offer lookup: any one group for the offer
+            found.setdefault(doc.to_dict().get('offer_id'), doc.id)
+    return found
+
+
+def offer_summary(offer_id: str, offer: Dict) -> Dict:
+    """
+    Compact copy of an offer embedded in its groups (groups.offer_summary), so a
+    group read answers with its nested offer without a second read.
+
+    Consistency: the summary is written with the group and re-propagated after
+    every offer write made through the API, so it is usually current. It is not
+    transactional with the offer: a crash between the two writes, or an edit made
+    outside the API, leaves drift until reconcile_offer_summaries repairs it, so
+    staleness is bounded by that job's schedule. `synced_at` records the last
+    sync. Anything involving money (pay, escrow release) reads the offer
+    document itself, never the summary.
+    """
+    summary = {field: offer.get(field) for field in OFFER_SUMMARY_FIELDS}
+    summary["currency"] = summary["currency"] or "INR"
+    summary["id"] = offer_id
+    summary["synced_at"] = time.time()
+    return summary
+
+
+def summary_differs(current: Optional[Dict], fresh: Dict) -> bool:
+    if not current:
+        return True
+    return any(current.get(key) != fresh.get(key) for key in fresh if key != "synced_at")
+
+
+def propagate_offer_summary(offer_id: str, offer: Optional[Dict] = None) -> int:
+    """
+    Refreshes offer_summary on every group of this offer after an offer write.
+    Reads the offer when `offer` isn't given. Returns the number of groups rewritten.
+    """
+    if offer is None:
+        snap = db.collection('offers').document(offer_id).get()
+        if not snap.exists:
+            return 0
+        offer = snap.to_dict()
+
+    fresh = offer_summary(offer_id, offer)
+    updated = 0
+    batch = db.batch()
+    for doc in db.collection('groups').where('offer_id', '==', offer_id).select(['offer_summary']).stream():
+        if not summary_differs(doc.to_dict().get('offer_summary'), fresh):
+            continue
+        batch.update(doc.reference, {"offer_summary": fresh})
+        updated += 1
+        if updated % BATCH_WRITE_LIMIT == 0:
+            batch.commit()
+            batch = db.batch()
+    if updated % BATCH_WRITE_LIMIT:
+        batch.commit()
+    return updated
+
+
+def hydrate_offers(groups: List[Dict]) -> List[Dict]:
+    """
+    Fills group['offer'] for every group whose offer exists. Groups carrying an
+    offer_summary answer from it; the rest fetch their offers in one db.get_all
+    round trip (each offer read once, however many groups share it). Groups
+    with a missing offer are left without 'offer'.
+    """
+    for group in groups:
+        if group.get('offer_summary'):
+            group['offer'] = dict(group['offer_summary'])
+
+    offer_ids = list(dict.fromkeys(g['offer_id'] for g in groups if g.get('offer_id') and 'offer' not in g))
+    if not offer_ids:
+        return groups
+
+    offers: Dict[str, Dict] = {}
+    refs = [db.collection('offers').document(offer_id) for offer_id in offer_ids]
+    for snap in db.get_all(refs):
+        if snap.exists:
+            data = snap.to_dict()
+            data['id'] = snap.id
+            offers[snap.id] = data
+
+    for group in groups:
+        offer = offers.get(group.get('offer_id'))
+        if offer is not None and 'offer' not in group:
+            group['offer'] = dict(offer)
+    return groups
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from firebase_admin import firestore
+
+# Response header carrying the token for the next page; list bodies stay plain lists
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(values: List) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> List:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise InvalidCursor("Malformed cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Cursor does not match this listing")
+    return [_decode_value(v) for v in values]
+
+
+def paginate(
+    query,
+    limit: int,
+    cursor: Optional[str] = None,
+    order_field: Optional[str] = "created_at",
+    descending: bool = True,
+    max_limit: int = 100,
+) -> Tuple[list, Optional[str]]:
+    """
+    One page of `query`, ordered by `order_field` then document ID (the tiebreak
+    makes the order total, so pages never skip or repeat documents).
+    `cursor` is the opaque token from the previous page; it encodes the last
+    document's sort values and resumes with start_after, so every page costs
+    `limit` + 1 reads however deep the client scrolls.
+    Returns (snapshots, next_cursor); next_cursor is None on the last page.
+    Documents missing `order_field` are not listed (Firestore ordering semantics):
+    pass order_field=None for collections whose documents don't all carry it,
+    or backfill it (backend/migrations/backfill_created_at.py).
+    """
+    limit = max(1, min(limit, max_limit))
+    direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+    if order_field:
+        query = query.order_by(order_field, direction=direction)
+    query = query.order_by(firestore.FieldPath.document_id(), direction=direction)
+    if cursor:
+        query = query.start_after(decode_cursor(cursor, 2 if order_field else 1))
+
+    docs = list(query.limit(limit + 1).stream())
+    if len(docs) <= limit:
+        return docs, None
+
+    docs = docs[:limit]
+    last = docs[-1]
+    values = ([last.get(order_field)] if order_field else []) + [last.id]
+    return docs, encode_cursor(values)
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from backend.config import settings
+from backend.firebase_setup import db
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeCache:
+    """
+    TTL cache of scraped product data ({"title", "price"} or {"error"}).
+    - Keyed by canonical product ID (AMZN:/FLIP:), falling back to the normalized URL
+    - Failures are cached too, with a much shorter TTL (negative caching)
+    - Tier 1: in-memory LRU per worker, Tier 2: Firestore collection shared by all workers
+      (skipped when persistent=False)
+    Only page data is cached; the price check against the user's price is always re-run.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, max_size: int = 5000, collection: str = "scrape_cache", persistent: bool = True):
+        self.ttl = ttl
+        self.persistent = persistent
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.collection = collection
+        self._lru: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        parsed = urlparse(url.strip())
+        host = parsed.netloc.lower().replace("www.", "")
+        return f"{host}{parsed.path.rstrip('/')}"
+
+    def key_for(self, url: str) -> str:
+        from backend.services.ai_core import to_matcher
+        return to_matcher.extract_product_id(url) or self.normalize_url(url)
+
+    def get_local(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.time():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return data
+
+    def get_shared(self, key: str) -> Optional[Dict]:
+        """
+        Blocking Firestore lookup; call from a worker thread.
+        """
+        if not self.persistent:
+            self.misses += 1
+            return None
+        try:
+            snap = db.collection(self.collection).document(self._doc_id(key)).get()
+        except Exception as e:
+            logger.warning(f"Scrape cache read failed: {e}")
+            snap = None
+
+        if snap is None or not snap.exists or snap.get('expires_at') < time.time():
+            self.misses += 1
+            return None
+
+        self.persistent_hits += 1
+        data = snap.get('data')
+        self._remember(key, snap.get('expires_at'), data)
+        return data
+
+    def put(self, key: str, data: Dict):
+        """
+        Stores a scrape result in both tiers (blocking; call from a worker thread).
+        """
+        expires_at = time.time() + (self.negative_ttl if "error" in data else self.ttl)
+        self._remember(key, expires_at, data)
+        if not self.persistent:
+            return
+        try:
+            db.collection(self.collection).document(self._doc_id(key)).set({
+                "key": key,
+                "data": data,
+                "expires_at": expires_at,
+            })
+        except Exception as e:
+            logger.warning(f"Scrape cache write failed: {e}")
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "size": len(self._lru),
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.persistent_hits) / lookups if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, expires_at: float, data: Dict):
+        with self._lock:
+            self._lru[key] = (expires_at, data)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    @staticmethod
+    def _doc_id(key: str) -> str:
+        # Firestore document IDs can't contain '/'
+        return key.replace("/", "|")
+
+
+scrape_cache = ScrapeCache(ttl=settings.SCRAPE_CACHE_TTL_SECONDS, negative_ttl=settings.SCRAPE_CACHE_NEGATIVE_TTL_SECONDS)
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _FlightStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "shared": self.shared,
+            "coalescing_ratio": self.shared / self.calls if self.calls else 0.0,
+            "in_flight": len(self._inflight),
+        }
+
+
+class AsyncSingleFlight(_FlightStats):
+    """
+    Coalesces concurrent coroutine calls with the same key: the first caller runs
+    `fn`, everyone arriving while it is in flight awaits the same result.
+    The call runs in its own task, so no caller owns it: a caller that is
+    cancelled (the leader included) just stops waiting, and the call is only
+    cancelled once nobody is waiting for it any more.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            self.executions += 1
+            task.add_done_callback(lambda t: self._done(key, t))
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and self._waiters.get(key) == 1:
+                # Last one waiting: nobody will read the result. Forget it now, so
+                # a caller arriving before the cancellation lands starts afresh
+                task.cancel()
+                del self._inflight[key]
+                del self._waiters[key]
+            raise
+        finally:
+            if self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        # Nobody may be waiting; mark any exception as retrieved
+        if not task.cancelled():
+            task.exception()
+
+
+class SingleFlight(_FlightStats):
+    """
+    Thread version of AsyncSingleFlight for blocking code in the threadpool.
+    Followers block on the leader's result; results are shared, so callers
+    must not mutate them.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.calls += 1
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+scrape_flight = AsyncSingleFlight("scrape")
+match_flight = SingleFlight("matching")
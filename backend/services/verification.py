@@ -1,11 +1,14 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import httpx
 from urllib.parse import urlparse
+from typing import Dict, Optional
+from backend.config import settings
 from backend.schemas import OfferVerificationResult
+from backend.services.extraction import extraction_engine
+from backend.services.scrape_cache import scrape_cache
+from backend.services.singleflight import scrape_flight
 import random
 import logging
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +18,110 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36",
 ]
 
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PageTooLarge(Exception):
+    pass
+
+
+# Describe the body as sent; fetch() hands back the decoded body instead
+_BODY_HEADERS = {b"content-encoding", b"content-length", b"transfer-encoding"}
+
+
+class ScrapeClient:
+    """
+    Shared async HTTP client for product pages.
+    - keep-alive connection pools per host (httpx pools by origin)
+    - HTTP/2 when the `h2` package is installed
+    - at most SCRAPE_MAX_PER_DOMAIN concurrent fetches per domain
+    - one overall deadline per fetch, including time spent waiting for a slot
+    - redirects followed; bodies over SCRAPE_MAX_BYTES abandoned with PageTooLarge
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self._domain_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                self._close_stale(self._client, self._loop)
+            # Disable SSL verify for local dev issues
+            self._client = httpx.AsyncClient(
+                http2=_http2_available(),
+                verify=False,
+                follow_redirects=True,
+                timeout=httpx.Timeout(settings.SCRAPE_DEADLINE_SECONDS, connect=3.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0),
+            )
+            self._loop = loop
+            self._domain_slots = {}
+        return self._client
+
+    @staticmethod
+    def _close_stale(client: httpx.AsyncClient, loop):
+        """
+        Closes a client being replaced (its loop went away or changed), so its
+        pooled connections aren't leaked. The close runs on the loop that owns
+        the connections when that loop is still alive.
+        """
+        def _log_failure(future):
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning(f"Closing replaced scrape client failed: {future.exception()}")
+
+        try:
+            if loop is not None and not loop.is_closed() and loop.is_running():
+                asyncio.run_coroutine_threadsafe(client.aclose(), loop).add_done_callback(_log_failure)
+            else:
+                asyncio.get_running_loop().create_task(client.aclose()).add_done_callback(_log_failure)
+        except Exception as e:
+            logger.warning(f"Closing replaced scrape client failed: {e}")
+
+    async def fetch(self, url: str) -> httpx.Response:
+        client = self._get_client()
+        domain = urlparse(url).netloc
+        slots = self._domain_slots.setdefault(domain, asyncio.Semaphore(settings.SCRAPE_MAX_PER_DOMAIN))
+        headers = {
+            "User-Agent": random.choice(USER_AGENTS),
+            "Accept-Language": "en-US,en;q=0.9",
+        }
+
+        async def _fetch():
+            async with slots:
+                async with client.stream("GET", url, headers=headers) as response:
+                    declared = response.headers.get("content-length", "")
+                    if declared.isdigit() and int(declared) > settings.SCRAPE_MAX_BYTES:
+                        raise PageTooLarge(f"Page is {declared} bytes")
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body += chunk
+                        if len(body) > settings.SCRAPE_MAX_BYTES:
+                            raise PageTooLarge(f"Page exceeds {settings.SCRAPE_MAX_BYTES} bytes")
+                    headers_out = [(k, v) for k, v in response.headers.raw if k.lower() not in _BODY_HEADERS]
+                    return httpx.Response(response.status_code, headers=headers_out, content=bytes(body),
+                                          request=response.request, history=response.history)
+
+        return await asyncio.wait_for(_fetch(), timeout=settings.SCRAPE_DEADLINE_SECONDS)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
 class VerificationService:
+    def __init__(self):
+        self.client = ScrapeClient()
+
     def get_domain(self, url: str) -> str:
         domain = urlparse(url).netloc
         if "amazon" in domain:
@@ -24,72 +130,69 @@ class VerificationService:
             return "flipkart"
         return "unknown"
 
-    def scrape_amazon(self, url: str) -> dict:
-        headers = {
-            "User-Agent": random.choice(USER_AGENTS),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
+    async def scrape(self, url: str, domain: str) -> dict:
+        """
+        Fetches the product page asynchronously; parsing runs in a worker thread
+        so large pages don't stall the event loop.
+        """
         try:
-            # Disable SSL verify for local dev issues
-            response = requests.get(url, headers=headers, timeout=10, verify=False)
-
+            response = await self.client.fetch(url)
             if response.status_code != 200:
                 return {"error": f"Status {response.status_code}"}
-            
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Title
-            title_tag = soup.find("span", {"id": "productTitle"})
-            title = title_tag.get_text().strip() if title_tag else None
-            
-            # Price
-            price = None
-            price_tag = soup.find("span", {"class": "a-price-whole"})
-            if price_tag:
-                price_str = price_tag.get_text().replace(",", "").replace(".", "").strip()
-                if price_str.isdigit():
-                    price = float(price_str)
-                    
-            return {"title": title, "price": price}
+
+            parse = self.parse_amazon if domain == "amazon" else self.parse_flipkart
+            return await asyncio.to_thread(parse, response.content, response.charset_encoding)
+        except asyncio.TimeoutError:
+            logger.error(f"{domain.capitalize()} Scrape Error: deadline exceeded")
+            return {"error": f"Timed out after {settings.SCRAPE_DEADLINE_SECONDS}s"}
         except Exception as e:
-            logger.error(f"Amazon Scrape Error: {e}")
+            logger.error(f"{domain.capitalize()} Scrape Error: {e}")
             return {"error": str(e)}
 
-    def scrape_flipkart(self, url: str) -> dict:
-        headers = {
-            "User-Agent": random.choice(USER_AGENTS),
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        try:
-            # Disable SSL verify for local dev issues
-            response = requests.get(url, headers=headers, timeout=10, verify=False)
+    def parse_amazon(self, content: bytes, encoding: Optional[str] = None) -> dict:
+        fields = extraction_engine.extract("amazon", content, encoding)
+        
+        # Price
+        price = None
+        if fields["price"]:
+            price_str = fields["price"].replace(",", "").replace(".", "").strip()
+            if price_str.isdigit():
+                price = float(price_str)
+                
+        return {"title": fields["title"], "price": price}
 
-            if response.status_code != 200:
-                return {"error": f"Status {response.status_code}"}
-            
-            soup = BeautifulSoup(response.content, "html.parser")
-            
-            # Title
-            title_tag = soup.find("span", {"class": "B_NuCI"})
-            if not title_tag:
-                 title_tag = soup.find("h1", {"class": "yhB1nd"})
-                 
-            title = title_tag.get_text().strip() if title_tag else None
-            
-            # Price
-            price = None
-            price_tag = soup.find("div", {"class": "_30jeq3 _16Jk6d"})
-            if price_tag:
-                price_str = price_tag.get_text().replace("₹", "").replace(",", "").strip()
-                if price_str.isdigit():
-                    price = float(price_str)
-                    
-            return {"title": title, "price": price}
-        except Exception as e:
-            logger.error(f"Flipkart Scrape Error: {e}")
-            return {"error": str(e)}
+    def parse_flipkart(self, content: bytes, encoding: Optional[str] = None) -> dict:
+        fields = extraction_engine.extract("flipkart", content, encoding)
+        
+        # Price
+        price = None
+        if fields["price"]:
+            price_str = fields["price"].replace("₹", "").replace(",", "").strip()
+            if price_str.isdigit():
+                price = float(price_str)
+                
+        return {"title": fields["title"], "price": price}
+
+    async def get_page_data(self, url: str, domain: str) -> dict:
+        """
+        Scraped page data via the scrape cache (product ID / URL keyed, with TTL).
+        Concurrent misses for the same product share one in-flight scrape.
+        """
+        key = scrape_cache.key_for(url)
+        data = scrape_cache.get_local(key)
+        if data is not None:
+            return data
+
+        async def load():
+            data = await asyncio.to_thread(scrape_cache.get_shared, key)
+            if data is None:
+                data = await self.scrape(url, domain)
+                await asyncio.to_thread(scrape_cache.put, key, data)
+            return data
+
+        return await scrape_flight.do(key, load)
 
-    def verify_offer_url(self, url: str, user_price: float) -> OfferVerificationResult:
+    async def verify_offer_url(self, url: str, user_price: float) -> OfferVerificationResult:
         domain = self.get_domain(url)
         
         warnings = []
@@ -110,11 +213,7 @@ class VerificationService:
                 warnings=warnings
             )
             
-        data = {}
-        if domain == "amazon":
-            data = self.scrape_amazon(url)
-        elif domain == "flipkart":
-            data = self.scrape_flipkart(url)
+        data = await self.get_page_data(url, domain)
         
         if "error" in data:
             warnings.append(f"Scraping failed: {data['error']}. Proceeding with manual verification.")
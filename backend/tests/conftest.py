@@ -0,0 +1,117 @@
+"""
+Tests run without Firebase credentials or network: backend.firebase_setup is
+replaced, before any service module imports it, by the in-memory Firestore
+stand-in from fakes.py. Every test starts with it empty. Scraping tests fetch
+from PageServer, a local HTTP server, instead of the shops.
+"""
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from backend.benchmarks._common import offline_firestore
+from backend.tests.fakes import FakeDB
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+fake_db = FakeDB(rpc_ms=0)
+offline_firestore(fake_db)
+
+
+@pytest.fixture(autouse=True)
+def db():
+    fake_db.docs.clear()
+    fake_db.times.clear()
+    fake_db.rpcs = 0
+    fake_db.lock_updates = 0
+    yield fake_db
+
+
+class PageServer:
+    """
+    Local stand-in for the shops: serves the fixture product pages on
+    127.0.0.1 and records how many requests each path got and how many were
+    in flight at once.
+    - /dp/<id>: Amazon fixture page
+    - /slow/<id>?delay=s: the same page after `delay` seconds
+    - /redirect/<id>: 302 to /dp/<id>
+    - /huge?bytes=n: n bytes of HTML, without a Content-Length
+    """
+
+    def __init__(self):
+        self.hits = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.page = (FIXTURES / "amazon_product.html").read_bytes()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                with server._lock:
+                    server.hits[url.path] += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    server.handle(self, url)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def handle(self, request, url):
+        query = parse_qs(url.query)
+        if url.path.startswith("/redirect/"):
+            request.send_response(302)
+            request.send_header("Location", url.path.replace("/redirect/", "/dp/", 1))
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+        if url.path == "/huge":
+            request.send_response(200)
+            request.send_header("Content-Type", "text/html")
+            request.send_header("Connection", "close")
+            request.end_headers()
+            request.close_connection = True
+            remaining = int(query["bytes"][0])
+            while remaining > 0:
+                chunk = b"<p>" + b"x" * min(65536, remaining) + b"</p>"
+                try:
+                    request.wfile.write(chunk)
+                except OSError:
+                    return
+                remaining -= len(chunk)
+            return
+        if url.path.startswith("/slow/"):
+            time.sleep(float(query.get("delay", ["0.2"])[0]))
+        request.send_response(200)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(self.page)))
+        request.end_headers()
+        request.wfile.write(self.page)
+
+    def url(self, path: str) -> str:
+        return self.base + path
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def page_server():
+    server = PageServer()
+    yield server
+    server.close()
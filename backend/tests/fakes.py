@@ -0,0 +1,285 @@
+"""
+In-memory Firestore stand-in for tests and offline benchmarks. It honours
+what the services rely on: create preconditions, atomic batches,
+Increment/ArrayUnion, merged sets, update-time preconditions,
+collection-group queries and projections. Every call can be given a delay
+(rpc_ms) so concurrent requests interleave, and every call is counted.
+
+Also here: seed() and check(), which set up a group and verify the group-join
+invariants.
+"""
+import random
+import threading
+import time
+import uuid
+
+from google.api_core import exceptions as gexc
+
+GROUP_ID = "bench-group"
+
+
+class _Snap:
+    def __init__(self, ref, data, update_time):
+        self.reference = ref
+        self.id = ref.id
+        self.exists = data is not None
+        self._data = data
+        self.update_time = update_time
+
+    def to_dict(self):
+        return None if self._data is None else dict(self._data)
+
+    def get(self, field):
+        return self._data[field]
+
+
+class FakeDB:
+    """Thread-safe in-memory documents keyed by path, one lock for every commit."""
+
+    def __init__(self, rpc_ms: float):
+        self.docs = {}
+        self.times = {}
+        self.lock = threading.Lock()
+        self.rpc_ms = rpc_ms
+        self.rpcs = 0
+        self.lock_updates = 0
+
+    def rpc(self):
+        self.rpcs += 1
+        time.sleep(self.rpc_ms / 1000 * random.uniform(0.5, 1.5))
+
+    def collection(self, name):
+        return _Collection(self, name)
+
+    def collection_group(self, name):
+        return _Query(self, lambda path: path.split("/")[-2] == name)
+
+    def batch(self):
+        return _Batch(self)
+
+    def write_option(self, last_update_time):
+        return last_update_time
+
+    def apply(self, path, kind, data, precondition=None):
+        """Caller holds the lock."""
+        current = self.docs.get(path)
+        if kind == "create" and current is not None:
+            raise gexc.AlreadyExists(f"{path} already exists")
+        if kind == "update":
+            if current is None:
+                raise gexc.NotFound(path)
+            if precondition is not None and self.times[path] != precondition:
+                raise gexc.FailedPrecondition(f"{path} changed since it was read")
+        if kind in ("update", "merge"):
+            current = dict(current or {})
+            for key, value in data.items():
+                name = type(value).__name__
+                if name == "Increment":
+                    current[key] = current.get(key, 0) + value.value
+                elif name == "ArrayUnion":
+                    current[key] = current.get(key, []) + [v for v in value.values if v not in current.get(key, [])]
+                else:
+                    current[key] = value
+            data = current
+        self.docs[path] = dict(data)
+        self.times[path] = time.monotonic_ns()
+
+
+class _Batch:
+    def __init__(self, db):
+        self.db = db
+        self.writes = []
+
+    def create(self, ref, data):
+        self.writes.append((ref.path, "create", data))
+
+    def set(self, ref, data, merge=False):
+        self.writes.append((ref.path, "merge" if merge else "set", data))
+
+    def update(self, ref, data):
+        self.writes.append((ref.path, "update", data))
+
+    def commit(self):
+        self.db.rpc()
+        with self.db.lock:
+            saved = {path: (self.db.docs.get(path), self.db.times.get(path)) for path, _, _ in self.writes}
+            try:
+                for path, kind, data in self.writes:
+                    self.db.apply(path, kind, data)
+            except Exception:
+                for path, (data, stamp) in saved.items():
+                    if data is None:
+                        self.db.docs.pop(path, None)
+                    else:
+                        self.db.docs[path], self.db.times[path] = data, stamp
+                raise
+
+
+OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: b in (a or []),
+}
+
+
+class _Query:
+    def __init__(self, db, match, filters=(), fields=None, orders=(), limit=None, after=None):
+        self.db = db
+        self.match = match
+        self.filters = list(filters)
+        self.fields = fields
+        self.orders = list(orders)
+        self._limit = limit
+        self.after = after
+
+    def _with(self, **changes):
+        args = dict(filters=self.filters, fields=self.fields, orders=self.orders, limit=self._limit, after=self.after)
+        args.update(changes)
+        return _Query(self.db, self.match, **args)
+
+    def where(self, field, op, value):
+        return self._with(filters=self.filters + [(field, op, value)])
+
+    def select(self, fields):
+        return self._with(fields=list(fields))
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._with(orders=self.orders + [(field, direction == "DESCENDING")])
+
+    def limit(self, count):
+        return self._with(limit=count)
+
+    def start_after(self, values):
+        return self._with(after=list(values))
+
+    def _key(self, path, data):
+        return [path.rsplit("/", 1)[1] if field == "__name__" else data.get(field) for field, _ in self.orders]
+
+    def _beyond(self, key) -> bool:
+        for value, cursor, (_, descending) in zip(key, self.after, self.orders):
+            if value != cursor:
+                return value < cursor if descending else value > cursor
+        return False
+
+    def stream(self):
+        self.db.rpc()
+        with self.db.lock:
+            items = [(path, dict(data)) for path, data in self.db.docs.items() if self.match(path)]
+        items = [(path, data) for path, data in items
+                 if all(OPS[op](data.get(f), v) for f, op, v in self.filters)
+                 # Like Firestore, ordering by a field leaves out documents without it
+                 and all(field == "__name__" or field in data for field, _ in self.orders)]
+        for i in reversed(range(len(self.orders))):
+            items.sort(key=lambda item: self._key(*item)[i], reverse=self.orders[i][1])
+        if self.after is not None:
+            items = [item for item in items if self._beyond(self._key(*item))]
+        if self._limit is not None:
+            items = items[:self._limit]
+        for path, data in items:
+            if self.fields is not None:
+                data = {f: data[f] for f in self.fields if f in data}
+            yield _Snap(_Document(self.db, path), data, None)
+
+
+class _Collection(_Query):
+    def __init__(self, db, path):
+        depth = path.count("/")
+        super().__init__(db, lambda p: p.rsplit("/", 1)[0] == path and p.count("/") == depth + 1)
+        self.path = path
+
+    def document(self, doc_id=None):
+        if doc_id is None:
+            doc_id = uuid.uuid4().hex
+        if not doc_id or "/" in doc_id:
+            raise ValueError(f"Invalid document ID {doc_id!r}")
+        return _Document(self.db, f"{self.path}/{doc_id}")
+
+
+class _Document:
+    def __init__(self, db, path):
+        self.db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[1]
+
+    def collection(self, name):
+        return _Collection(self.db, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        self.db.rpc()
+        with self.db.lock:
+            data = self.db.docs.get(self.path)
+            return _Snap(self, None if data is None else dict(data), self.db.times.get(self.path))
+
+    def update(self, data, option=None):
+        self.db.rpc()
+        with self.db.lock:
+            self.db.apply(self.path, "update", data, precondition=option)
+            if "receiver_id" in data:
+                self.db.lock_updates += 1
+
+    def set(self, data, merge=False):
+        self.db.rpc()
+        with self.db.lock:
+            self.db.apply(self.path, "merge" if merge else "set", data)
+
+    def delete(self):
+        self.db.rpc()
+        with self.db.lock:
+            self.db.docs.pop(self.path, None)
+            self.db.times.pop(self.path, None)
+
+
+def seed(db, target_size: int):
+    from backend.enums import GroupStatus
+    from backend.services import group_members
+
+    group_ref = db.collection("groups").document(GROUP_ID)
+    batch = db.batch()
+    batch.set(group_ref, {
+        "id": GROUP_ID,
+        "offer_id": "bench-offer",
+        "offer_summary": {"id": "bench-offer", "title": "Bench offer", "price": 1000.0, "currency": "INR",
+                          "product_url": "https://www.amazon.in/dp/B0BENCH001", "status": "VERIFIED"},
+        "target_size": target_size,
+        "current_size": 1,
+        "receiver_id": "creator",
+        "status": GroupStatus.FORMING,
+        "member_ids": ["creator"],
+    })
+    group_members.create_first_member(batch, group_ref, {
+        "user_id": "creator", "full_name": "Creator", "status": "JOINED", "trust_score": 80.0,
+        "joined_at": "0", "address": None, "coordinates": (12.97, 77.59),
+    })
+    batch.commit()
+
+
+def check(db, target_size: int, succeeded: int) -> list:
+    prefix = f"groups/{GROUP_ID}"
+    group = db.docs[prefix]
+    members = {p.rsplit("/", 1)[1]: d for p, d in db.docs.items() if p.startswith(f"{prefix}/members/")}
+    seats = {p.rsplit("/", 1)[1]: d["user_id"] for p, d in db.docs.items() if p.startswith(f"{prefix}/seats/")}
+    problems = []
+    if len(members) > target_size:
+        problems.append(f"{len(members)} members for {target_size} seats")
+    if len(members) != succeeded + 1:
+        problems.append(f"{succeeded} joins succeeded but {len(members) - 1} members were added")
+    if sorted(seats.values()) != sorted(members):
+        problems.append("seats and members disagree")
+    if sorted(str(m["seat"]) for m in members.values()) != sorted(seats):
+        problems.append("a seat is held twice or a member holds no seat")
+    if group["current_size"] != len(members):
+        problems.append(f"current_size={group['current_size']} but {len(members)} members")
+    if sorted(group["member_ids"]) != sorted(members):
+        problems.append("member_ids out of step with members")
+    full = len(members) == target_size
+    if full and (group["status"] != "LOCKED" or group["receiver_id"] not in members):
+        problems.append(f"group full but status={group['status']} receiver={group['receiver_id']}")
+    if full and db.lock_updates != 1:
+        problems.append(f"group locked {db.lock_updates} times")
+    return problems
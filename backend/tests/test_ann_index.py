@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from backend.services.ann_index import IVFIndex, OfferIndex
+
+
+def unit_vectors(n, dim=16, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bucketed_rows(index):
+    return sorted(row for rows in index._lists for row in rows)
+
+
+@pytest.mark.parametrize("min_train_size", [4096, 64])
+def test_readding_a_key_reuses_its_row(min_train_size):
+    index = IVFIndex(dim=16, nprobe=64, min_train_size=min_train_size)
+    vectors = unit_vectors(200)
+    for i, vector in enumerate(vectors):
+        index.add(f"offer-{i}", vector)
+    rows = len(index._keys)
+
+    replacements = unit_vectors(50, seed=1)
+    for _ in range(3):
+        for i, vector in enumerate(replacements):
+            index.add(f"offer-{i}", vector)
+
+    assert len(index) == 200 and len(index._keys) == rows
+    assert index.search(replacements[7], k=1)[0][0] == "offer-7"
+    if index._centroids is not None:
+        assert bucketed_rows(index) == list(range(rows))
+
+
+def test_tombstones_are_compacted():
+    index = IVFIndex(dim=16, nprobe=64, min_train_size=64)
+    index.COMPACT_MIN_TOMBSTONES = 10
+    vectors = unit_vectors(100)
+    for i, vector in enumerate(vectors):
+        index.add(f"offer-{i}", vector)
+    for i in range(60):
+        index.remove(f"offer-{i}")
+
+    assert len(index) == 40 and len(index._keys) < 100
+    assert bucketed_rows(index) == list(range(len(index._keys)))
+    assert index.search(vectors[80], k=1)[0][0] == "offer-80"
+    assert all(key not in {f"offer-{i}" for i in range(60)} for key, _ in index.search(vectors[0], k=40))
+
+
+def test_product_id_lookup_before_load_filters_status_in_query(db):
+    batch = db.batch()
+    for i in range(12):
+        batch.set(db.collection("offers").document(f"rejected-{i}"), {"product_id": "AMZN:B0TEST", "status": "REJECTED"})
+    batch.set(db.collection("offers").document("active"), {"product_id": "AMZN:B0TEST", "status": "APPROVED"})
+    batch.commit()
+    db.rpcs = 0
+
+    index = OfferIndex()
+    assert index.find_by_product_id("AMZN:B0TEST") == "active"
+    assert index.find_by_product_id("AMZN:B0OTHER") is None
+    assert db.rpcs == 2
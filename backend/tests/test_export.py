@@ -0,0 +1,93 @@
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.enums import OfferStatus
+from backend.services import export
+from backend.services.export import InvalidFilter, ndjson_chunks, parse_filter
+
+
+class Doc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+def docs(n):
+    return (Doc(f"offer-{i}", {"title": f"Offer {i}", "price": i * 10.0, "seller": {"city": "Pune"}})
+            for i in range(n))
+
+
+def lines(chunks):
+    return [json.loads(line) for line in b"".join(chunks).splitlines()]
+
+
+def test_one_object_per_line():
+    rows = lines(ndjson_chunks(docs(3)))
+    assert rows == [{"title": f"Offer {i}", "price": i * 10.0, "seller": {"city": "Pune"}, "id": f"offer-{i}"}
+                    for i in range(3)]
+
+
+def test_streams_in_bounded_chunks(monkeypatch):
+    monkeypatch.setattr(export, "CHUNK_BYTES", 256)
+    chunks = list(ndjson_chunks(docs(50)))
+    assert len(chunks) > 1
+    # A chunk never grows much past the limit: it is flushed after the line that crosses it
+    assert all(len(chunk) < 256 + 200 for chunk in chunks)
+    assert len(lines(chunks)) == 50
+
+
+def test_reads_documents_lazily():
+    pulled = []
+
+    def source():
+        for doc in docs(3):
+            pulled.append(doc.id)
+            yield doc
+
+    stream = ndjson_chunks(source())
+    assert pulled == []
+    next(stream)
+    assert pulled == ["offer-0", "offer-1", "offer-2"]
+
+
+def test_gzip_matches_plain():
+    plain = b"".join(ndjson_chunks(docs(200)))
+    assert gzip.decompress(b"".join(ndjson_chunks(docs(200), compress=True))) == plain
+
+
+def test_projection_and_nested_fields():
+    rows = lines(ndjson_chunks(docs(1), fields=["price", "seller.city", "missing"]))
+    assert rows == [{"price": 0.0, "seller.city": "Pune", "missing": None, "id": "offer-0"}]
+
+
+def test_firestore_values_are_serialized():
+    doc = Doc("o", {"created_at": datetime(2024, 5, 1, 12, 30), "status": OfferStatus.APPROVED})
+    assert lines(ndjson_chunks([doc])) == [{"created_at": "2024-05-01T12:30:00", "status": "APPROVED", "id": "o"}]
+
+
+def test_empty_collection():
+    assert list(ndjson_chunks([])) == []
+    assert gzip.decompress(b"".join(ndjson_chunks([], compress=True))) == b""
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("status,==,APPROVED", ("status", "==", "APPROVED")),
+    ("price,>=,100", ("price", ">=", 100)),
+    ('status,in,["APPROVED","PENDING"]', ("status", "in", ["APPROVED", "PENDING"])),
+    ("tags,array-contains,sale", ("tags", "array_contains", "sale")),
+    ("title,==,a,b", ("title", "==", "a,b")),
+])
+def test_parse_filter(raw, expected):
+    assert parse_filter(raw) == expected
+
+
+@pytest.mark.parametrize("raw", ["status", ",==,x", "status,~,x"])
+def test_parse_filter_rejects(raw):
+    with pytest.raises(InvalidFilter):
+        parse_filter(raw)
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pytest
+
+from backend.services.extraction import ExtractionEngine
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+# Backend -> module it needs
+BACKENDS = {"stream": None, "selectolax": "selectolax", "bs4": "bs4"}
+
+PAGES = {
+    "amazon": (FIXTURES / "amazon_product.html").read_bytes(),
+    "flipkart": (FIXTURES / "flipkart_product.html").read_bytes(),
+    # The second title selector appears first in the page
+    "flipkart_fallback_first": b"""<html><body>
+        <h1 class="yhB1nd">Fallback title</h1>
+        <span class="B_NuCI">Primary <b>title</b></span>
+        <div class="_30jeq3 _16Jk6d">&#8377;65,999</div>
+        <span class="B_NuCI">Later duplicate</span>
+    </body></html>""",
+    # Only the lower-priority selector matches
+    "flipkart_fallback_only": b'<h1 class="yhB1nd">Only <span>title</span></h1><p>No price</p>',
+    # The primary element sits inside the fallback one
+    "flipkart_nested": b'<h1 class="yhB1nd">Outer <span class="B_NuCI">Inner</span></h1>',
+    "generic": b"<html><head><title>Plain page</title></head><body></body></html>",
+}
+
+
+@pytest.fixture(params=BACKENDS)
+def engine(request):
+    if BACKENDS[request.param]:
+        pytest.importorskip(BACKENDS[request.param])
+    return ExtractionEngine(request.param)
+
+
+@pytest.mark.parametrize("page", list(PAGES))
+def test_backends_agree(engine, page):
+    pytest.importorskip("bs4")
+    domain = page.split("_")[0]
+    assert engine.extract(domain, PAGES[page]) == ExtractionEngine("bs4").extract(domain, PAGES[page])
+
+
+def test_stream_prefers_earlier_selector():
+    engine = ExtractionEngine("stream")
+    assert engine.extract("flipkart", PAGES["flipkart_fallback_first"]) == {
+        "title": "Primary title", "price": "₹65,999",
+    }
+    assert engine.extract("flipkart", PAGES["flipkart_fallback_only"]) == {"title": "Only title", "price": None}
+    assert engine.extract("flipkart", PAGES["flipkart_nested"]) == {"title": "Inner", "price": None}
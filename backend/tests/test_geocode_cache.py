@@ -0,0 +1,117 @@
+import threading
+
+import pytest
+
+from backend.services import geocode_cache as geocode_module
+from backend.services.geocode_cache import GeocodeCache
+from backend.services.location_service import location_service
+
+ADDRESS = {"street": "12, MG Road", "city": "Bengaluru", "state": "Karnataka", "pincode": "560001"}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = GeocodeCache(ttl=3600, persistent=False)
+    monkeypatch.setattr(geocode_module, "geocode_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def remote(monkeypatch):
+    """Stubbed geocoder: answers from `answers`, None (API failure) for anything else."""
+    answers, calls = {}, []
+
+    def geocode(address):
+        calls.append(address)
+        return answers.get(address["street"])
+
+    monkeypatch.setattr(location_service, "_geocode_remote", geocode)
+    return answers, calls
+
+
+def test_normalize_ignores_formatting():
+    variant = {"street": "  12 mg ROAD ", "city": "bengaluru", "state": "KARNATAKA", "pincode": " 560 001"}
+    assert GeocodeCache.normalize(variant) == GeocodeCache.normalize(ADDRESS)
+    assert GeocodeCache.normalize(dict(ADDRESS, street="14, MG Road")) != GeocodeCache.normalize(ADDRESS)
+
+
+def test_repeat_lookups_hit_the_cache(cache, remote):
+    answers, calls = remote
+    answers["12, MG Road"] = (12.97, 77.60)
+    assert location_service.geocode_address(ADDRESS) == (12.97, 77.60)
+    assert location_service.geocode_address(dict(ADDRESS, street="12 mg road")) == (12.97, 77.60)
+    assert len(calls) == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_failures_are_not_cached(cache, remote):
+    answers, calls = remote
+    assert location_service.geocode_address(ADDRESS) == (0.0, 0.0)
+    answers["12, MG Road"] = (12.97, 77.60)
+    assert location_service.geocode_address(ADDRESS) == (12.97, 77.60)
+    assert len(calls) == 2
+    assert (cache.stats()["api_calls"], cache.stats()["api_failures"], cache.stats()["unresolved"]) == (2, 1, 1)
+
+
+def test_failed_lookup_falls_back_to_pincode_centroid(cache, remote):
+    answers, _ = remote
+    answers.update({"1 Church Street": (12.0, 77.0), "3 Brigade Road": (13.0, 78.0)})
+    location_service.geocode_address(dict(ADDRESS, street="1 Church Street"))
+    location_service.geocode_address(dict(ADDRESS, street="3 Brigade Road"))
+
+    assert location_service.geocode_address(ADDRESS) == pytest.approx((12.5, 77.5))
+    assert cache.stats()["pincode_hits"] == 1
+    # Another pincode has no centroid
+    assert location_service.geocode_address(dict(ADDRESS, pincode="110001")) == (0.0, 0.0)
+    assert cache.stats()["unresolved"] == 1
+
+
+def test_prefer_centroid_skips_the_api(cache, remote):
+    answers, calls = remote
+    answers["1 Church Street"] = (12.0, 77.0)
+    location_service.geocode_address(dict(ADDRESS, street="1 Church Street"))
+    cache.prefer_centroid = True
+    assert location_service.geocode_address(ADDRESS) == (12.0, 77.0)
+    assert len(calls) == 1
+
+
+def test_lru_evicts_oldest():
+    cache = GeocodeCache(ttl=3600, max_size=2, persistent=False)
+    for key in ("a", "b", "c"):
+        cache.put(key, "", (1.0, 1.0))
+    assert cache.get("a") is None
+    assert cache.get("c") == (1.0, 1.0)
+
+
+def test_expired_entries_miss():
+    cache = GeocodeCache(ttl=-1, persistent=False)
+    cache.put("a", "", (1.0, 1.0))
+    assert cache.get("a") is None
+
+
+def test_shared_tier_serves_other_workers(db):
+    writer = GeocodeCache(ttl=3600)
+    writer.put("key", "560001", (12.0, 77.0))
+    writer.put("other", "560001", (13.0, 78.0))
+
+    reader = GeocodeCache(ttl=3600)
+    assert reader.get("key") == (12.0, 77.0)
+    assert reader.stats()["persistent_hits"] == 1
+    assert reader.centroid("560001") == pytest.approx((12.5, 77.5))
+
+
+def test_counters_are_thread_safe():
+    cache = GeocodeCache(ttl=3600, persistent=False)
+
+    def record():
+        for _ in range(2000):
+            cache.record_api_call(ok=False)
+            cache.record_pincode_hit()
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert stats["api_calls"] == stats["api_failures"] == stats["pincode_hits"] == 16000
@@ -0,0 +1,112 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+from backend.auth import UserInDB
+from backend.tests.fakes import GROUP_ID, check, seed
+from backend.enums import GroupStatus
+from backend.routers import groups
+from backend.schemas import GroupJoin
+from backend.services import group_members
+from backend.services.location_service import location_service
+
+JOIN = GroupJoin(address_details={"street": "1 Test Road", "city": "Bengaluru", "state": "KA", "pincode": "560001"})
+
+
+@pytest.fixture(autouse=True)
+def offline_geocoding(monkeypatch):
+    monkeypatch.setattr(location_service, "geocode_address",
+                        lambda address: (12.9 + random.random() / 10, 77.5 + random.random() / 10))
+
+
+def join_concurrently(db, joins: int):
+    """Fires `joins` joins at once; returns {outcome: count}."""
+    db.rpc_ms = 1.0
+    start = threading.Barrier(joins)
+    outcomes = {}
+    lock = threading.Lock()
+
+    def one(i):
+        user = UserInDB(id=f"user-{i}", full_name=f"User {i}")
+        start.wait()
+        try:
+            groups.join_group(GROUP_ID, JOIN, user)
+            outcome = "joined"
+        except HTTPException as e:
+            outcome = e.detail
+        with lock:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=joins) as pool:
+            list(pool.map(one, range(joins)))
+    finally:
+        db.rpc_ms = 0
+    return outcomes
+
+
+def test_simultaneous_joins_never_overfill(db):
+    seed(db, target_size=120)
+    outcomes = join_concurrently(db, 200)
+
+    assert outcomes.get("joined") == 119
+    assert check(db, 120, outcomes["joined"]) == []
+    assert db.docs[f"groups/{GROUP_ID}"]["status"] == GroupStatus.LOCKED
+    assert db.lock_updates == 1
+
+
+def test_joins_into_exactly_full_group(db):
+    seed(db, target_size=200)
+    outcomes = join_concurrently(db, 200)
+
+    assert outcomes.get("joined") == 199
+    assert check(db, 200, outcomes["joined"]) == []
+    assert db.lock_updates == 1
+
+
+def test_second_join_by_same_user_is_rejected(db):
+    seed(db, target_size=5)
+    user = UserInDB(id="user-1", full_name="User 1")
+    groups.join_group(GROUP_ID, JOIN, user)
+    with pytest.raises(HTTPException) as e:
+        groups.join_group(GROUP_ID, JOIN, user)
+    assert e.value.detail == "Already a member"
+    assert check(db, 5, 1) == []
+
+
+def test_concurrent_handoffs_release_escrow_once(db, monkeypatch):
+    from backend.services.otp import otp_service
+    from backend.services.wallet import wallet_service
+
+    released = []
+    monkeypatch.setattr(otp_service, "verify_otp", lambda otp, otp_hash: True)
+    monkeypatch.setattr(wallet_service, "release_escrow", lambda *args: released.append(args))
+
+    group_ref = db.collection("groups").document("delivered")
+    batch = db.batch()
+    batch.set(group_ref, {"id": "delivered", "status": GroupStatus.DELIVERED, "receiver_id": "receiver",
+                          "target_size": 5, "offer": {"price": 500.0}, "member_ids": []})
+    for user_id in ["receiver", "a", "b", "c", "d"]:
+        batch.set(group_members.member_ref(group_ref, user_id),
+                  {"user_id": user_id, "status": "PAID", "joined_at": user_id})
+    batch.commit()
+
+    db.rpc_ms = 1.0
+    receiver = UserInDB(id="receiver")
+    start = threading.Barrier(4)
+
+    def confirm(member_id):
+        start.wait()
+        return groups.verify_handoff("delivered", "123456", member_id, receiver)["status"]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        statuses = list(pool.map(confirm, ["a", "b", "c", "d"]))
+    db.rpc_ms = 0
+
+    assert statuses.count(GroupStatus.COMPLETED) == 1
+    assert db.docs["groups/delivered"]["status"] == GroupStatus.COMPLETED
+    assert sorted(r[0] for r in released) == ["a", "b", "c", "d"]
+    assert all(r[1:] == ("receiver", 100.0) for r in released)
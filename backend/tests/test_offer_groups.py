@@ -0,0 +1,77 @@
+import pytest
+
+from backend.services import firestore_limits
+from backend.services.ann_index import offer_index
+from backend.services.firestore_limits import IN_QUERY_LIMIT
+from backend.services.offer_groups import group_ids_for_offers
+
+
+@pytest.fixture
+def groups(db):
+    # A group for every even offer
+    batch = db.batch()
+    for i in range(0, 70, 2):
+        batch.set(db.collection("groups").document(f"group-{i}"), {"offer_id": f"offer-{i}"})
+    batch.commit()
+    db.rpcs = 0
+    return db
+
+
+def test_one_query_per_chunk(groups):
+    offer_ids = [f"offer-{i}" for i in range(70)]
+    found = group_ids_for_offers(offer_ids)
+    assert found == {f"offer-{i}": f"group-{i}" for i in range(0, 70, 2)}
+    assert groups.rpcs == -(-70 // IN_QUERY_LIMIT)
+
+
+def test_duplicates_and_missing_ids_are_skipped(groups):
+    found = group_ids_for_offers([None, "offer-2", "offer-2", "", "offer-3"])
+    assert found == {"offer-2": "group-2"}
+    assert groups.rpcs == 1
+
+
+def test_no_ids_no_reads(groups):
+    assert group_ids_for_offers([None]) == {}
+    assert groups.rpcs == 0
+
+
+def test_offer_index_answers_without_reads(groups, monkeypatch):
+    monkeypatch.setattr(offer_index, "group_id_of", lambda offer_id: f"indexed-{offer_id}")
+    assert group_ids_for_offers(["offer-1", "offer-2"]) == {"offer-1": "indexed-offer-1", "offer-2": "indexed-offer-2"}
+    assert groups.rpcs == 0
+
+
+def test_chunked():
+    assert list(firestore_limits.chunked(list(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(firestore_limits.chunked([], 3)) == []
+
+
+@pytest.mark.parametrize("similar_count", [1, 5, 12])
+def test_store_offer_enrichment_rpcs_do_not_grow_with_matches(db, monkeypatch, similar_count):
+    from backend.auth import UserInDB
+    from backend.routers import offers
+    from backend.schemas import OfferCreate, OfferVerificationResult
+
+    batch = db.batch()
+    for i in range(similar_count + 1):
+        batch.set(db.collection("groups").document(f"group-{i}"), {"offer_id": f"offer-{i}"})
+    batch.commit()
+
+    match = {
+        "duplicate": {"id": "offer-0", "reason": "Same product ID"},
+        "similar": [{"id": f"offer-{i}", "title": f"Offer {i}", "score": 0.9} for i in range(1, similar_count + 1)],
+    }
+    monkeypatch.setattr(offer_index, "ensure_loaded", lambda: None)
+    monkeypatch.setattr(offer_index, "upsert", lambda offer, embed=True: None)
+    monkeypatch.setattr(offers.to_matcher, "find_matches", lambda offer: match)
+    verification = OfferVerificationResult(is_valid=True, confidence_score=90.0, detected_platform="amazon",
+                                           detected_title="Headphones", detected_price=1000.0, warnings=[])
+    db.rpcs = 0
+
+    stored = offers._store_offer(OfferCreate(title="Headphones", price=1000.0), verification,
+                                 UserInDB(id="poster"))
+
+    assert stored["matched_group_id"] == "group-0"
+    assert [s["group_id"] for s in stored["similar_offers"]] == [f"group-{i}" for i in range(1, similar_count + 1)]
+    # One batched group lookup and the offer write, however many matches there are
+    assert db.rpcs == 2
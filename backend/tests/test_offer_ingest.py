@@ -0,0 +1,99 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.auth import UserInDB, get_current_user
+from backend.config import settings
+from backend.enums import OfferStatus
+from backend.routers import offers
+
+USER = UserInDB(id="poster", full_name="Poster")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    submitted = []
+
+    async def submit(payload):
+        # Accepted but never run: the offer stays PROCESSING
+        submitted.append(payload)
+
+    monkeypatch.setattr(offers.ingestion_queue, "submit", submit)
+    monkeypatch.setattr(offers.ingestion_queue, "has_capacity", lambda: True)
+    app = FastAPI()
+    app.include_router(offers.router, prefix="/offers")
+    app.dependency_overrides[get_current_user] = lambda: USER
+    client = TestClient(app)
+    client.submitted = submitted
+    return client
+
+
+def add_offer(db, offer_id, status, age_minutes):
+    batch = db.batch()
+    batch.set(db.collection("offers").document(offer_id), {
+        "id": offer_id, "posted_by_id": "someone", "title": f"Offer {offer_id}", "price": 100.0,
+        "status": status.value, "verification_score": 90.0,
+        "created_at": datetime.utcnow() - timedelta(minutes=age_minutes),
+    })
+    batch.commit()
+
+
+def test_listing_skips_offers_still_processing(db, client):
+    add_offer(db, "approved", OfferStatus.APPROVED, 10)
+    add_offer(db, "pending", OfferStatus.PENDING, 5)
+
+    # URL only: no title or price until verification runs
+    queued = client.post("/offers/?background=true", json={"product_url": "https://www.amazon.in/dp/B0TEST0001"})
+    assert queued.status_code == 202
+    assert client.submitted
+    provisional = db.docs[f"offers/{queued.json()['offer_id']}"]
+    assert provisional["status"] == OfferStatus.PROCESSING
+    assert provisional["title"] == "" and provisional["price"] == 0.0
+
+    listed = client.get("/offers/")
+    assert listed.status_code == 200
+    assert [o["id"] for o in listed.json()] == ["pending", "approved"]
+
+
+def test_listing_pages_past_processing_offers(db, client):
+    for i in range(5):
+        add_offer(db, f"offer-{i}", OfferStatus.APPROVED, i)
+        add_offer(db, f"processing-{i}", OfferStatus.PROCESSING, i)
+
+    seen, cursor = [], None
+    while True:
+        page = client.get("/offers/", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert page.status_code == 200
+        seen += [o["id"] for o in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [f"offer-{i}" for i in range(5)]
+
+
+def test_sweep_resubmits_stalled_offers(db, client, monkeypatch):
+    monkeypatch.setattr(offers, "propagate_offer_summary", lambda *args, **kwargs: None)
+    queued = client.post("/offers/?background=true", json={"product_url": "https://www.amazon.in/dp/B0TEST0001"})
+    offer_id, job_id = queued.json()["offer_id"], queued.json()["job_id"]
+    client.submitted.clear()
+
+    # Not stalled yet: left alone
+    assert asyncio.run(offers.reclaim_stalled_offers()) == 0
+
+    # Its worker died long ago; plus an offer from before jobs stored their payload, and one with no job at all
+    long_ago = time.time() - 2 * settings.INGEST_RECLAIM_AFTER_SECONDS
+    batch = db.batch()
+    batch.update(db.collection("offers").document(offer_id), {"processing_since": long_ago})
+    batch.update(db.collection("offer_jobs").document(job_id), {"updated_at": long_ago})
+    batch.set(db.collection("offers").document("no-job"), {"id": "no-job", "status": OfferStatus.PROCESSING.value})
+    batch.commit()
+
+    assert asyncio.run(offers.reclaim_stalled_offers()) == 1
+    assert [p["job_id"] for p in client.submitted] == [job_id]
+    assert db.docs["offers/no-job"]["status"] == OfferStatus.PENDING
+    # Claimed: a second sweep doesn't submit it again
+    assert asyncio.run(offers.reclaim_stalled_offers()) == 0
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.routers import admin
+from backend.services.pagination import InvalidCursor, paginate
+
+
+@pytest.fixture
+def offers(db):
+    batch = db.batch()
+    now = datetime.utcnow()
+    for i in range(7):
+        batch.set(db.collection("offers").document(f"offer-{i}"),
+                  {"title": f"Offer {i}", "created_at": now - timedelta(minutes=i)})
+    # Written before created_at was set on every offer
+    for i in range(3):
+        batch.set(db.collection("offers").document(f"legacy-{i}"), {"title": f"Legacy {i}"})
+    batch.commit()
+    return db
+
+
+def all_pages(fetch):
+    seen, cursor = [], None
+    while True:
+        docs, cursor = fetch(cursor)
+        seen += docs
+        if not cursor:
+            return seen
+
+
+def test_pages_newest_first_without_repeats(offers):
+    query = offers.collection("offers")
+    ids = [d.id for d in all_pages(lambda cursor: paginate(query, 3, cursor))]
+    assert ids == [f"offer-{i}" for i in range(7)]
+
+
+def test_document_id_order_lists_every_document(offers):
+    query = offers.collection("offers")
+    ids = [d.id for d in all_pages(lambda cursor: paginate(query, 4, cursor, order_field=None, descending=False))]
+    assert ids == sorted(ids) and len(ids) == 10
+
+
+def test_cursor_from_another_listing_is_rejected(offers):
+    _, cursor = paginate(offers.collection("offers"), 2, None, order_field=None)
+    with pytest.raises(InvalidCursor):
+        paginate(offers.collection("offers"), 2, cursor)
+
+
+def test_admin_listing_includes_documents_without_created_at(offers):
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/admin")
+    client = TestClient(app)
+
+    def fetch(cursor):
+        response = client.get("/admin/offers", params={"limit": 4, **({"cursor": cursor} if cursor else {})},
+                              headers={"X-Admin-Secret": "dealicious_admin_123"})
+        assert response.status_code == 200
+        return [o["id"] for o in response.json()], response.headers.get("X-Next-Cursor")
+
+    ids = all_pages(fetch)
+    assert sorted(ids) == sorted([f"offer-{i}" for i in range(7)] + [f"legacy-{i}" for i in range(3)])
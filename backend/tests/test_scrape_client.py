@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.config import settings
+from backend.services.scrape_cache import scrape_cache
+from backend.services.verification import PageTooLarge, ScrapeClient, VerificationService
+
+PRODUCT = "/dp/B0TEST0001"
+TITLE = "Sony WH-1000XM5 Wireless Noise Cancelling Headphones, 30Hrs Battery, Black"
+
+
+def run(coro_fn):
+    """Runs coro_fn(client) on a fresh loop with a fresh client, closing it after."""
+    client = ScrapeClient()
+
+    async def main():
+        try:
+            return await coro_fn(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def empty_scrape_cache():
+    scrape_cache._lru.clear()
+
+
+def test_fetches_fixture_page(page_server):
+    response = run(lambda client: client.fetch(page_server.url(PRODUCT)))
+    assert response.status_code == 200
+    assert response.charset_encoding == "utf-8"
+    assert response.content == page_server.page
+
+
+def test_follows_redirects(page_server):
+    response = run(lambda client: client.fetch(page_server.url("/redirect/B0TEST0001")))
+    assert response.status_code == 200
+    assert response.content == page_server.page
+    assert page_server.hits[PRODUCT] == 1
+
+
+def test_deadline(page_server, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_DEADLINE_SECONDS", 0.3)
+    began = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        run(lambda client: client.fetch(page_server.url("/slow/B0TEST0001?delay=2")))
+    assert time.monotonic() - began < 1.5
+
+
+def test_deadline_includes_waiting_for_a_slot(page_server, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_MAX_PER_DOMAIN", 1)
+    monkeypatch.setattr(settings, "SCRAPE_DEADLINE_SECONDS", 0.5)
+
+    async def two(client):
+        url = page_server.url("/slow/B0TEST0001?delay=0.35")
+        return await asyncio.gather(client.fetch(url), client.fetch(url), return_exceptions=True)
+
+    first, second = run(two)
+    assert first.status_code == 200
+    assert isinstance(second, asyncio.TimeoutError)
+
+
+def test_per_domain_concurrency_limit(page_server, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_MAX_PER_DOMAIN", 2)
+
+    async def many(client):
+        urls = [page_server.url(f"/slow/B0TEST{i:04d}?delay=0.15") for i in range(6)]
+        return await asyncio.gather(*(client.fetch(url) for url in urls))
+
+    began = time.monotonic()
+    responses = run(many)
+    assert [r.status_code for r in responses] == [200] * 6
+    assert page_server.max_in_flight == 2
+    # Three rounds of two
+    assert time.monotonic() - began >= 0.45
+
+
+def test_domains_have_separate_limits(page_server, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_MAX_PER_DOMAIN", 1)
+    other_host = page_server.base.replace("127.0.0.1", "localhost")
+
+    async def both(client):
+        return await asyncio.gather(client.fetch(page_server.url("/slow/B0TEST0001?delay=0.2")),
+                                    client.fetch(f"{other_host}/slow/B0TEST0002?delay=0.2"))
+
+    run(both)
+    assert page_server.max_in_flight == 2
+
+
+def test_oversized_page_is_abandoned(page_server, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_MAX_BYTES", 256 * 1024)
+    with pytest.raises(PageTooLarge):
+        run(lambda client: client.fetch(page_server.url("/huge?bytes=10000000")))
+    assert run(lambda client: client.fetch(page_server.url("/huge?bytes=100000"))).status_code == 200
+
+
+def test_verify_offer_url_against_local_server(page_server, monkeypatch):
+    service = VerificationService()
+    monkeypatch.setattr(service, "get_domain", lambda url: "amazon")
+
+    async def verify(_client):
+        try:
+            return await service.verify_offer_url(page_server.url(PRODUCT), 26990.0)
+        finally:
+            await service.client.aclose()
+
+    result = run(verify)
+    assert result.is_valid
+    assert result.confidence_score == 100.0
+    assert (result.detected_title, result.detected_price) == (TITLE, 26990.0)
+
+
+def test_verify_offer_url_reports_scrape_failure(page_server, monkeypatch):
+    monkeypatch.setattr(settings, "SCRAPE_DEADLINE_SECONDS", 0.3)
+    service = VerificationService()
+    monkeypatch.setattr(service, "get_domain", lambda url: "amazon")
+
+    async def verify(_client):
+        try:
+            return await service.verify_offer_url(page_server.url("/slow/B0TEST0003?delay=2"), 26990.0)
+        finally:
+            await service.client.aclose()
+
+    result = run(verify)
+    # Manual review, not a rejection
+    assert result.is_valid and result.confidence_score == 65.0
+    assert "Timed out" in result.warnings[0]
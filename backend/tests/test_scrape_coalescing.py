@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from backend.services.scrape_cache import scrape_cache
+from backend.services.singleflight import scrape_flight
+from backend.services.verification import VerificationService
+
+SLOW = "/slow/B0TEST0001"
+
+
+@pytest.fixture
+def service(monkeypatch):
+    scrape_cache._lru.clear()
+    service = VerificationService()
+    monkeypatch.setattr(service, "get_domain", lambda url: "amazon")
+    return service
+
+
+def run(service, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await service.client.aclose()
+
+    return asyncio.run(main())
+
+
+def test_concurrent_verifications_share_one_fetch(page_server, service):
+    url = page_server.url(f"{SLOW}?delay=0.3")
+    before = scrape_flight.stats()
+
+    async def burst():
+        return await asyncio.gather(*(service.verify_offer_url(url, 26990.0) for _ in range(20)))
+
+    results = run(service, burst())
+    assert page_server.hits[SLOW] == 1
+    assert all(r.detected_price == 26990.0 and r.confidence_score == 100.0 for r in results)
+    stats = scrape_flight.stats()
+    assert stats["executions"] - before["executions"] == 1
+    assert stats["shared"] - before["shared"] == 19
+
+
+def test_cache_serves_later_calls(page_server, service):
+    url = page_server.url(f"{SLOW}?delay=0.1")
+    run(service, service.get_page_data(url, "amazon"))
+    # Same product, different URL form: answered from the cache
+    run(service, service.get_page_data(url + "&ref=share", "amazon"))
+    assert page_server.hits[SLOW] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_fetch(page_server, service):
+    url = page_server.url(f"{SLOW}?delay=0.3")
+
+    async def main():
+        first = asyncio.create_task(service.get_page_data(url, "amazon"))
+        await asyncio.sleep(0.05)
+        others = [asyncio.create_task(service.get_page_data(url, "amazon")) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        # The caller that started the fetch goes away, e.g. its client disconnected
+        first.cancel()
+        others[0].cancel()
+        return first, await asyncio.gather(*others, return_exceptions=True)
+
+    first, results = run(service, main())
+    assert first.cancelled()
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert all(r["price"] == 26990.0 for r in results[1:])
+    assert page_server.hits[SLOW] == 1
+
+
+def test_fetch_is_abandoned_when_every_waiter_leaves(page_server, service):
+    url = page_server.url(f"{SLOW}?delay=0.3")
+
+    async def main():
+        waiters = [asyncio.create_task(service.get_page_data(url, "amazon")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        # Nothing left in flight; the next caller fetches afresh
+        return await service.get_page_data(url, "amazon")
+
+    assert run(service, main())["price"] == 26990.0
+    assert page_server.hits[SLOW] == 2
+    assert scrape_cache.get_local(scrape_cache.key_for(url)) is not None
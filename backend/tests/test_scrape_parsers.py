@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import pytest
+
+from backend.services.verification import verification_service
+
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures"
+
+
+def test_amazon_fixture():
+    data = verification_service.parse_amazon((FIXTURES / "amazon_product.html").read_bytes())
+    assert data == {
+        "title": "Sony WH-1000XM5 Wireless Noise Cancelling Headphones, 30Hrs Battery, Black",
+        "price": 26990.0,
+    }
+
+
+def test_flipkart_fixture():
+    data = verification_service.parse_flipkart((FIXTURES / "flipkart_product.html").read_bytes())
+    assert data == {"title": "Apple iPhone 15 (Black, 128 GB)", "price": 65999.0}
+
+
+@pytest.mark.parametrize("parse", [verification_service.parse_amazon, verification_service.parse_flipkart])
+def test_page_without_fields(parse):
+    assert parse(b"<html><body><p>Currently unavailable</p></body></html>") == {"title": None, "price": None}
+
+
+def test_declared_charset_is_used():
+    page = '<span id="productTitle">Caf\xe9 Cr\xe8me</span><span class="a-price-whole">1,499</span>'
+    data = verification_service.parse_amazon(page.encode("cp1252"), "windows-1252")
+    assert data == {"title": "Caf\xe9 Cr\xe8me", "price": 1499.0}
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.services.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def counting(result="page", delay=0.05):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+
+    return fn, calls
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = AsyncSingleFlight("test")
+    fn, calls = counting()
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fn) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["page"] * 10
+    assert len(calls) == 1
+    assert flight.stats()["shared"] == 9
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_do_not_coalesce():
+    flight = AsyncSingleFlight("test")
+    fn, calls = counting()
+
+    async def main():
+        await asyncio.gather(flight.do("a", fn), flight.do("b", fn))
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_exception_reaches_every_caller():
+    flight = AsyncSingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert [type(r) for r in results] == [ValueError, ValueError]
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flight = AsyncSingleFlight("test")
+    fn, calls = counting()
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(main()) == "page"
+    assert len(calls) == 1
+
+
+def test_cancelled_follower_does_not_cancel_leader():
+    flight = AsyncSingleFlight("test")
+    fn, _ = counting()
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", fn))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(main()) == "page"
+
+
+def test_call_is_cancelled_once_nobody_waits():
+    flight = AsyncSingleFlight("test")
+    started, finished = [], []
+
+    async def fn():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "stale"
+
+    async def main():
+        callers = [asyncio.create_task(flight.do("k", fn)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        # A new caller starts afresh instead of joining the cancelled call
+        fresh, calls = counting("fresh")
+        result = await flight.do("k", fresh)
+        await asyncio.sleep(0.06)
+        return result, calls
+
+    result, calls = asyncio.run(main())
+    assert result == "fresh" and len(calls) == 1
+    assert len(started) == 1 and not finished
+
+
+def test_thread_version_coalesces():
+    flight = SingleFlight("test")
+    calls = []
+    start = threading.Barrier(8)
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"duplicate": None}
+
+    results = []
+
+    def caller():
+        start.wait()
+        results.append(flight.do("k", fn))
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    assert len(calls) == 1